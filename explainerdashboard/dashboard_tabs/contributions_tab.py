@@ -201,22 +201,25 @@ def contributions_callbacks(explainer, app, round=2, **kwargs):
             [State('prediction-range-slider', 'value'),
              State('include-labels', 'value'),
              State('preds-or-ranks', 'value'),
+             State('label-store', 'data'),
              State('tabs', 'value')]
         )
-        def update_input_index(n_clicks, slider_range, include, preds_or_ranks, tab):
+        def update_input_index(n_clicks, slider_range, include, preds_or_ranks, pos_label, tab):
             y = None
-            if include=='neg': y = 0 
-            elif include=='pos': y = 1
+            pos_label_index = explainer.pos_label_index(pos_label)
+            if include=='neg': 
+                y = [i for i in range(len(explainer.labels)) if i != pos_label_index]
+            elif include=='pos': y = pos_label_index
             return_str = True if explainer.idxs is not None else False
 
             if preds_or_ranks == 'preds':
                 idx = explainer.random_index(
                     y_values=y, pred_proba_min=slider_range[0], pred_proba_max=slider_range[1],
-                    return_str=return_str)
+                    return_str=return_str, pos_label=pos_label)
             elif preds_or_ranks == 'ranks':
                 idx = explainer.random_index(
                     y_values=y, pred_percentile_min=slider_range[0], pred_percentile_max=slider_range[1],
-                    return_str=return_str)
+                    return_str=return_str, pos_label=pos_label)
 
             if idx is not None:
                 return idx
@@ -261,10 +264,11 @@ def contributions_callbacks(explainer, app, round=2, **kwargs):
     def update_output_div(index, topx, pos_label):
         if index is None:
             raise PreventUpdate
-        prediction_result_md = explainer.prediction_result_markdown(index)
-        plot = explainer.plot_shap_contributions(index, topx=topx, round=round)
-        summary_table = explainer.contrib_summary_df(index, round=round)
-        tooltip_data = [{'Reason': desc} for desc in explainer.description_list(explainer.contrib_df(index)['col'])]
+        prediction_result_md = explainer.prediction_result_markdown(index, pos_label=pos_label)
+        plot = explainer.plot_shap_contributions(index, topx=topx, round=round, pos_label=pos_label)
+        summary_table = explainer.contrib_summary_df(index, round=round, pos_label=pos_label)
+        tooltip_data = [{'Reason': desc} for desc in explainer.description_list(
+                            explainer.contrib_df(index, pos_label=pos_label)['col'])]
         return (prediction_result_md, plot, summary_table.to_dict('records'), tooltip_data)
 
     @app.callback(
@@ -283,5 +287,4 @@ def contributions_callbacks(explainer, app, round=2, **kwargs):
          Input('label-store', 'data')]
     )
     def update_pdp_graph(idx, col, pos_label):
-        explainer.pos_label = pos_label #needed in case of multiple workers
-        return explainer.plot_pdp(col, idx, sample=100)
\ No newline at end of file
+        return explainer.plot_pdp(col, idx, sample=100, pos_label=pos_label)
\ No newline at end of file
@@ -1,4 +1,12 @@
 import inspect
+import hashlib
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from pathlib import Path
 
 import dash
 import dash_core_components as dcc
@@ -8,6 +16,8 @@ import dash_html_components as html
 from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
 
+import plotly.graph_objects as go
+
 
 # Stolen from https://www.fast.ai/2019/08/06/delegation/
 # then extended to deal with multiple inheritance
@@ -98,7 +108,314 @@ class TitleAndLabelSelector:
                 [Input('pos-label-selector', 'value')]
             )
             def change_positive_label(pos_label):
+                # the selected label gets passed explicitly to the explainer 
+                # by the other callbacks, so that the explainer itself stays 
+                # unchanged and can be shared between concurrent requests:
                 if pos_label is not None:
-                    self.explainer.pos_label = pos_label
                     return pos_label
                 return self.explainer.pos_label
+
+
+def precompute_shap(explainer):
+    """calculates shap values and predictions"""
+    _ = explainer.shap_values, explainer.preds, explainer.pred_percentiles
+    if explainer.cats is not None:
+        _ = explainer.shap_values_cats
+    if explainer.is_classifier:
+        _ = explainer.pred_probas
+
+
+def precompute_permutation(explainer):
+    """calculates permutation importances"""
+    _ = explainer.permutation_importances
+    if explainer.cats is not None:
+        _ = explainer.permutation_importances_cats
+
+
+def precompute_interactions(explainer):
+    """calculates shap interaction values"""
+    _ = explainer.shap_interaction_values
+    if explainer.cats is not None:
+        _ = explainer.shap_interaction_values_cats
+
+
+def precompute_trees(explainer):
+    """calculates the individual decision trees"""
+    _ = explainer.graphviz_available
+    _ = explainer.decision_trees
+    _ = explainer.leaf_value_table
+
+
+class ExplainerPrecomputer:
+    """Calculates the lazily loaded properties of an explainer, either 
+    directly with run() or in background threads with start(), so that a 
+    dashboard can be served before the properties are available.
+
+    Properties are grouped in chains ('shap', 'permutation', 'interactions' 
+    and 'trees') that get computed concurrently, and started in the order 
+    in which they are passed. A chain only starts calculating once the 
+    chains it depends on are done, e.g. 'interactions' waits for 'shap'.
+    """
+    chain_funcs = dict(shap=precompute_shap, 
+                       permutation=precompute_permutation,
+                       interactions=precompute_interactions, 
+                       trees=precompute_trees)
+    chain_dependencies = dict(interactions=['shap'])
+
+    def __init__(self, explainer, chains, max_workers=None):
+        """
+        :param explainer: an ExplainerBunch object
+        :param chains: list of chains to calculate, in order of priority
+        :type chains: list of str
+        :param max_workers: maximum number of chains to calculate 
+            simultaneously, defaults to None (all chains at once)
+        :type max_workers: int, optional
+        """
+        self.explainer = explainer
+        self.chains = []
+        for chain in chains:
+            self._add_chain(chain)
+        self.max_workers = max_workers
+        self.futures = {}
+
+    def _add_chain(self, chain):
+        assert chain in self.chain_funcs, \
+            f"chain should be in {list(self.chain_funcs.keys())}, but you passed {chain}!"
+        if chain not in self.chains:
+            for dependency in self.chain_dependencies.get(chain, []):
+                self._add_chain(dependency)
+            self.chains.append(chain)
+
+    def _run_chain(self, chain):
+        for dependency in self.chain_dependencies.get(chain, []):
+            self.futures[dependency].result()
+        self.chain_funcs[chain](self.explainer)
+
+    def run(self):
+        """calculate all chains one after the other in the current thread"""
+        for chain in self.chains:
+            self.chain_funcs[chain](self.explainer)
+        return self
+
+    def start(self):
+        """start calculating all chains in background threads"""
+        executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers or max(len(self.chains), 1),
+                        thread_name_prefix="precompute")
+        # dependencies always precede the chains that depend on them, so
+        # have been submitted (and will be picked up) before them:
+        for chain in self.chains:
+            self.futures[chain] = executor.submit(self._run_chain, chain)
+        executor.shutdown(wait=False)
+        return self
+
+    def is_ready(self, chains=None):
+        """returns True if all chains (default: all) have finished calculating"""
+        chains = self.chains if chains is None else chains
+        return all(chain in self.futures and self.futures[chain].done() 
+                        for chain in chains)
+
+    def exceptions(self, chains=None):
+        """returns a dict with the exceptions raised while calculating chains"""
+        chains = self.chains if chains is None else chains
+        return {chain: self.futures[chain].exception() for chain in chains
+                    if self.is_ready([chain]) and self.futures[chain].exception() is not None}
+
+    def wait(self):
+        """block until all chains have been calculated"""
+        for future in self.futures.values():
+            future.result()
+        return self
+
+
+class PrecomputePlaceholder:
+    """Placeholder that displays a 'computing' message until all chains
+    that tab depends on have been calculated by precomputer, and then
+    swaps in the actual tab.layout()
+    """
+    def __init__(self, tab, precomputer, chains, interval=1000):
+        self.tab = tab
+        self.precomputer = precomputer
+        self.chains = chains
+        self.interval = interval
+
+        self.tab_id = tab.tab_id
+        self.title = tab.title
+
+    def layout(self):
+        if self.precomputer.is_ready(self.chains) and not self.precomputer.exceptions(self.chains):
+            return self.tab.layout()
+        return html.Div([
+                dbc.Container([
+                    html.H3(f"Computing {', '.join(self.chains)}..."),
+                    html.P("This tab will become available once the calculations are done."),
+                ], fluid=True),
+                dcc.Interval(id=self.tab.tab_id + '-precompute-interval', 
+                                interval=self.interval)
+            ], id=self.tab.tab_id + '-precompute-container')
+
+    def register_callbacks(self, app):
+        @app.callback(
+            Output(self.tab.tab_id + '-precompute-container', 'children'),
+            [Input(self.tab.tab_id + '-precompute-interval', 'n_intervals')]
+        )
+        def swap_in_tab_layout(n_intervals):
+            if not self.precomputer.is_ready(self.chains):
+                raise PreventUpdate
+            exceptions = self.precomputer.exceptions(self.chains)
+            if exceptions:
+                return dbc.Container([
+                    dbc.Alert(f"Failed to calculate {chain}: {exception!r}", color="danger")
+                        for chain, exception in exceptions.items()], fluid=True)
+            return self.tab.layout()
+        self.tab.register_callbacks(app)
+
+
+class FigureCache:
+    """Thread-safe least recently used cache of serialized plotly figures.
+
+    Figures are stored as json strings. When the total size exceeds max_bytes
+    the least recently used figures get evicted, or spilled to disk if 
+    spill_dir was given (and get reloaded from there on the next hit).
+    """
+    def __init__(self, max_bytes=100*1024**2, spill_dir=None):
+        """
+        :param max_bytes: maximum total size of figures kept in memory, 
+            defaults to 100MB
+        :type max_bytes: int, optional
+        :param spill_dir: directory to spill evicted figures to. A new 
+            subdirectory gets created for every cache, so that figures of 
+            a previous run never get served. Defaults to None (discard evicted
+            figures)
+        :type spill_dir: str or Path, optional
+        """
+        self.max_bytes = max_bytes
+        if spill_dir is not None:
+            Path(spill_dir).mkdir(parents=True, exist_ok=True)
+            self.spill_dir = Path(tempfile.mkdtemp(prefix="figures-", dir=spill_dir))
+        else:
+            self.spill_dir = None
+        self._figures = OrderedDict()
+        self._spilled = set()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    @staticmethod
+    def make_key(method, args=(), kwargs=None, pos_label=None, state=None):
+        """returns a key for the figure generated by method(*args, **kwargs) 
+        for pos_label by the explainer identified by state"""
+        kwargs = {} if kwargs is None else kwargs
+        return hashlib.sha1(repr(
+            (state, method, tuple(args), sorted(kwargs.items()), pos_label)
+            ).encode()).hexdigest()
+
+    def get(self, key):
+        """returns the figure json stored under key or None"""
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return self._figures[key]
+            if key in self._spilled:
+                self.hits += 1
+                figure_json = (self.spill_dir / f"{key}.json").read_text()
+                self.put(key, figure_json)
+                return figure_json
+            self.misses += 1
+            return None
+
+    def put(self, key, figure_json):
+        """store figure_json under key, evicting least recently used figures
+        if needed"""
+        with self._lock:
+            if key in self._figures:
+                self._bytes -= len(self._figures.pop(key))
+            self._figures[key] = figure_json
+            self._bytes += len(figure_json)
+            while self._bytes > self.max_bytes and len(self._figures) > 1:
+                self._evict()
+
+    def _evict(self):
+        key, figure_json = self._figures.popitem(last=False)
+        self._bytes -= len(figure_json)
+        self.evictions += 1
+        if self.spill_dir is not None and key not in self._spilled:
+            (self.spill_dir / f"{key}.json").write_text(figure_json)
+            self._spilled.add(key)
+
+    def clear(self):
+        """remove all figures from memory and from spill_dir"""
+        with self._lock:
+            self._figures.clear()
+            self._bytes = 0
+            for key in self._spilled:
+                (self.spill_dir / f"{key}.json").unlink(missing_ok=True)
+            self._spilled.clear()
+
+    def stats(self):
+        """returns a dict with hits, misses, hit_ratio, evictions, number of 
+        figures in memory, their total size in bytes and the number of figures 
+        spilled to disk"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return dict(hits=self.hits, misses=self.misses, 
+                        hit_ratio=self.hits / lookups if lookups else 0.0,
+                        evictions=self.evictions, figures=len(self._figures),
+                        bytes=self._bytes, spilled=len(self._spilled))
+
+
+def get_figure_cache(figure_cache):
+    """returns a new FigureCache if figure_cache is True, None if it is
+    False or None, and figure_cache itself otherwise"""
+    if figure_cache is True:
+        return FigureCache()
+    if figure_cache is None or figure_cache is False:
+        return None
+    assert isinstance(figure_cache, FigureCache), \
+        "figure_cache should be True, False, None or a FigureCache!"
+    return figure_cache
+
+
+class CachedExplainer:
+    """Proxy around an explainer that memoizes the figures returned by its 
+    plot_* methods in a FigureCache, keyed by the state_token of the 
+    explainer, method name, arguments and pos_label. Cached figures get returned as (json decoded) dicts, which 
+    dash accepts as figure. Everything else gets passed on to the explainer.
+    """
+    def __init__(self, explainer, figure_cache=None):
+        """
+        :param explainer: an ExplainerBunch object
+        :param figure_cache: FigureCache to use, defaults to None (new 
+            FigureCache with default settings)
+        :type figure_cache: FigureCache, optional
+        """
+        object.__setattr__(self, 'explainer', explainer)
+        object.__setattr__(self, 'figure_cache', 
+            FigureCache() if figure_cache is None else figure_cache)
+
+    def __getattr__(self, name):
+        attr = getattr(self.explainer, name)
+        if name.startswith('plot_') and callable(attr):
+            return self._cached_plot(name, attr)
+        return attr
+
+    def __setattr__(self, name, value):
+        # e.g. explainer.pos_label = 0 should change the explainer itself:
+        setattr(self.explainer, name, value)
+
+    def _cached_plot(self, name, plot_func):
+        @wraps(plot_func)
+        def cached_plot_func(*args, **kwargs):
+            key = self.figure_cache.make_key(name, args, kwargs, 
+                        getattr(self.explainer, 'pos_label', None),
+                        getattr(self.explainer, 'state_token', id(self.explainer)))
+            figure_json = self.figure_cache.get(key)
+            if figure_json is None:
+                fig = plot_func(*args, **kwargs)
+                if not isinstance(fig, go.Figure):
+                    return fig
+                figure_json = fig.to_json()
+                self.figure_cache.put(key, figure_json)
+            return json.loads(figure_json)
+        return cached_plot_func
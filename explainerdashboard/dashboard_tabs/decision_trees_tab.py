@@ -94,11 +94,12 @@ def decision_trees_callbacks(explainer, app, round=2, **kwargs):
         [Input('tree-predictions-graph', 'clickData')],
          # Input('label-store', 'data')], #this causes issues for some reason, only on this tab??
         [State('tree-index-store', 'data'),
+         State('label-store', 'data'),
          State('tabs', 'value')])
-    def display_tree_click_data(clickdata, index, tab):
-        if clickdata is not None and idx is not None:
+    def display_tree_click_data(clickdata, index, pos_label, tab):
+        if clickdata is not None and index is not None:
             tree_idx = int(clickdata['points'][0]['text'].split('tree no ')[1].split(':')[0]) if clickdata is not None else 0
-            _, _, decisiontree_df = explainer.decisiontree_df_summary(tree_idx, index, round=round)
+            _, _, decisiontree_df = explainer.decisiontree_df_summary(tree_idx, index, round=round, pos_label=pos_label)
             columns = [{'id': c, 'name': c} for c in  decisiontree_df.columns.tolist()]
             return (decisiontree_df.to_dict('records'), columns)
         raise PreventUpdate
@@ -111,7 +112,7 @@ def decision_trees_callbacks(explainer, app, round=2, **kwargs):
         [State('tree-index-store', 'data'),
          State('tabs', 'value')])
     def display_click_data(clickData, index, tab):
-        if clickData is not None and idx is not None and explainer.graphviz_available:
+        if clickData is not None and index is not None and explainer.graphviz_available:
             tree_idx = int(clickData['points'][0]['text'].split('tree no ')[1].split(':')[0]) 
             svg_encoded = explainer.decision_path_encoded(tree_idx, index)
             return svg_encoded
@@ -127,7 +128,8 @@ def decision_trees_callbacks(explainer, app, round=2, **kwargs):
     def update_tree_graph(index, pos_label, clickdata, tab):
         if index is not None:
             highlight_tree = int(clickdata['points'][0]['text'].split('tree no ')[1].split(':')[0]) if clickdata is not None else None
-            return explainer.plot_trees(index, highlight_tree=highlight_tree, round=round)
+            return explainer.plot_trees(index, highlight_tree=highlight_tree, round=round, 
+                                        pos_label=pos_label)
         return {}
 
     @app.callback(
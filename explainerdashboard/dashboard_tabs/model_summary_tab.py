@@ -126,9 +126,8 @@ class ImportancesStats:
             [State('tabs', 'value')]
         )
         def update_importances(tablesize, cats, permutation_shap, pos_label, tab): 
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
             return self.explainer.plot_importances(
-                        kind=permutation_shap, topx=tablesize, cats=cats)
+                        kind=permutation_shap, topx=tablesize, cats=cats, pos_label=pos_label)
 
 class ClassifierModelStats:
     def __init__(self, explainer, bin_size=0.1, quantiles=10, cutoff=0.5):
@@ -317,8 +316,8 @@ class ClassifierModelStats:
             [State('tabs', 'value')],
         )
         def update_precision_graph(percentage, cutoff, pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
-            return self.explainer.plot_lift_curve(cutoff=cutoff, percentage=percentage)
+            return self.explainer.plot_lift_curve(cutoff=cutoff, percentage=percentage, 
+                                                    pos_label=pos_label)
 
         @app.callback(
             Output('precision-graph', 'figure'),
@@ -331,13 +330,12 @@ class ClassifierModelStats:
             [State('tabs', 'value')],
         )
         def update_precision_graph(bin_size, quantiles, bins, cutoff, multiclass, pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
             if bins=='bin_size':
                 return self.explainer.plot_precision(
-                    bin_size=bin_size, cutoff=cutoff, multiclass=multiclass)
+                    bin_size=bin_size, cutoff=cutoff, multiclass=multiclass, pos_label=pos_label)
             elif bins=='quantiles':
                 return self.explainer.plot_precision(
-                    quantiles=quantiles, cutoff=cutoff, multiclass=multiclass)
+                    quantiles=quantiles, cutoff=cutoff, multiclass=multiclass, pos_label=pos_label)
             raise PreventUpdate
 
         @app.callback(
@@ -348,8 +346,8 @@ class ClassifierModelStats:
             [State('tabs', 'value')],
         )
         def update_precision_graph(percentage, cutoff, pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
-            return self.explainer.plot_classification(cutoff=cutoff, percentage=percentage)
+            return self.explainer.plot_classification(cutoff=cutoff, percentage=percentage,
+                                                        pos_label=pos_label)
 
         @app.callback(
              Output('confusionmatrix-graph', 'figure'),
@@ -360,9 +358,8 @@ class ClassifierModelStats:
             [State('tabs', 'value')],
         )
         def update_precision_graph(cutoff, normalized, binary, pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
             return self.explainer.plot_confusion_matrix(
-                        cutoff=cutoff, normalized=normalized, binary=binary)
+                        cutoff=cutoff, normalized=normalized, binary=binary, pos_label=pos_label)
 
         @app.callback(
             Output('roc-auc-graph', 'figure'),
@@ -371,8 +368,7 @@ class ClassifierModelStats:
              Input('tabs', 'value')],
         )
         def update_precision_graph(cutoff, pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
-            return self.explainer.plot_roc_auc(cutoff=cutoff)
+            return self.explainer.plot_roc_auc(cutoff=cutoff, pos_label=pos_label)
 
         @app.callback(
             Output('pr-auc-graph', 'figure'),
@@ -381,15 +377,15 @@ class ClassifierModelStats:
             [State('tabs', 'value')],
         )
         def update_precision_graph(cutoff, pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
-            return self.explainer.plot_pr_auc(cutoff=cutoff)
+            return self.explainer.plot_pr_auc(cutoff=cutoff, pos_label=pos_label)
 
         @app.callback(
             Output('precision-cutoff', 'value'),
-            [Input('percentile-cutoff', 'value')]
+            [Input('percentile-cutoff', 'value')],
+            [State('label-store', 'data')]
         )
-        def update_cutoff(percentile):
-            return np.round(self.explainer.cutoff_from_percentile(percentile), 2)
+        def update_cutoff(percentile, pos_label):
+            return np.round(self.explainer.cutoff_from_percentile(percentile, pos_label=pos_label), 2)
 
 class RegressionModelStats:
     def __init__(self, explainer, round=2, logs=False, vs_actual=False, ratio=False):
@@ -478,7 +474,6 @@ class RegressionModelStats:
             [State('tabs', 'value')]
         )
         def update_model_summary(pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
             return self.explainer.metrics_markdown()
 
         Output('model-prediction', 'children')
@@ -489,7 +484,6 @@ class RegressionModelStats:
             [State('tabs', 'value')]
         )
         def update_predicted_vs_actual_graph(logs, pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
             return self.explainer.plot_predicted_vs_actual(logs=logs)
 
         @app.callback(
@@ -500,7 +494,6 @@ class RegressionModelStats:
             [State('tabs', 'value')],
         )
         def update_residuals_graph(pred_or_actual, ratio, pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
             vs_actual = pred_or_actual=='vs_actual'
             return self.explainer.plot_residuals(vs_actual=vs_actual, ratio=ratio)
 
@@ -512,7 +505,6 @@ class RegressionModelStats:
             [State('tabs', 'value')],
         )
         def update_residuals_graph(col, ratio, pos_label, tab):
-            self.explainer.pos_label = pos_label #needed in case of multiple workers
             return self.explainer.plot_residuals_vs_feature(col, ratio=ratio, dropna=True)
 
 
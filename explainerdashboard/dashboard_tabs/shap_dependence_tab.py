@@ -134,14 +134,13 @@ def shap_dependence_callbacks(explainer, app, **kwargs):
          Input('label-store', 'data')],
         [State('tabs', 'value')])
     def update_dependence_shap_scatter_graph(summary_type, cats, depth, pos_label, tab):
-        explainer.pos_label = pos_label #needed in case of multiple workers
         ctx = dash.callback_context
         if ctx.triggered:
             if summary_type=='aggregate':
                 plot = explainer.plot_importances(
-                        kind='shap', topx=depth, cats=cats)
+                        kind='shap', topx=depth, cats=cats, pos_label=pos_label)
             elif summary_type=='detailed':
-                plot = explainer.plot_shap_summary(topx=depth, cats=cats)
+                plot = explainer.plot_shap_summary(topx=depth, cats=cats, pos_label=pos_label)
 
             trigger = ctx.triggered[0]['prop_id'].split('.')[0]
 
@@ -172,7 +171,9 @@ def shap_dependence_callbacks(explainer, app, **kwargs):
         if clickdata is not None and clickdata['points'][0] is not None:
             if isinstance(clickdata['points'][0]['y'], float): # detailed
                 # if detailed, clickdata returns scatter marker location -> type==float
-                idx = clickdata['points'][0]['pointIndex']
+                # row index is stored in customdata, as points can be sampled:
+                idx = clickdata['points'][0].get('customdata', 
+                                                 clickdata['points'][0]['pointIndex'])
                 col = clickdata['points'][0]['text'].split('=')[0]                             
                 return (idx, col)
             elif isinstance(clickdata['points'][0]['y'], str): # aggregate
@@ -185,9 +186,10 @@ def shap_dependence_callbacks(explainer, app, **kwargs):
         [Output('dependence-color-col', 'options'),
          Output('dependence-color-col', 'value')],
         [Input('dependence-col', 'value')],
-        [State('dependence-group-categoricals', 'checked')])
-    def set_color_col_dropdown(col, cats):
-        sorted_interact_cols = explainer.shap_top_interactions(col, cats=cats)
+        [State('dependence-group-categoricals', 'checked'),
+         State('label-store', 'data')])
+    def set_color_col_dropdown(col, cats, pos_label):
+        sorted_interact_cols = explainer.shap_top_interactions(col, cats=cats, pos_label=pos_label)
         options = [{'label': col, 'value':col} 
                                     for col in sorted_interact_cols]
         value = sorted_interact_cols[1]                                
@@ -202,8 +204,7 @@ def shap_dependence_callbacks(explainer, app, **kwargs):
         [State('dependence-col', 'value'),
          State('dependence-group-categoricals', 'checked')])
     def update_dependence_graph(color_col, idx, pos_label, col, cats):
-        explainer.pos_label = pos_label #needed in case of multiple workers
         if color_col is not None:
             return explainer.plot_shap_dependence(
-                        col, color_col, highlight_idx=idx, cats=cats)
+                        col, color_col, highlight_idx=idx, cats=cats, pos_label=pos_label)
         raise PreventUpdate
\ No newline at end of file
@@ -34,6 +34,8 @@ class ExplainerDashboard:
                 shap_interaction=False,
                 decision_trees=False,
                 plotly_template="none",
+                background_precompute=False,
+                figure_cache=None,
                 **kwargs):
         """Constructs an ExplainerDashboard.
         
@@ -50,6 +52,15 @@ class ExplainerDashboard:
         :type shap_interaction: bool, optional
         :param decision_trees: display tab with individual decision tree of random forest, defaults to False
         :type decision_trees: bool, optional
+        :param background_precompute: start the dashboard directly and calculate 
+            shap values, importances, etc in background threads, in order of the 
+            tabs. Tabs display a placeholder until their properties are ready. 
+            Defaults to False (calculate everything before starting the dashboard)
+        :type background_precompute: bool, optional
+        :param figure_cache: if True (or a FigureCache) the figures generated 
+            by the dashboard callbacks get cached, so that the same combination 
+            of inputs does not get rendered twice, defaults to None (no caching)
+        :type figure_cache: bool or FigureCache, optional
         """
         self.explainer=explainer
         self.title = title
@@ -59,26 +70,26 @@ class ExplainerDashboard:
         self.shap_interaction = shap_interaction
         self.decision_trees = decision_trees
         self.plotly_template = plotly_template
+        self.background_precompute = background_precompute
+        self.figure_cache = get_figure_cache(figure_cache)
         self.kwargs = kwargs
 
-        # calculate lazily loaded properties before starting dashboard:
-        if shap_dependence or contributions or model_summary:
-            _ = explainer.shap_values, explainer.preds, explainer.pred_percentiles
-            if explainer.cats is not None:
-                _ = explainer.shap_values_cats
-            if explainer.is_classifier:
-                _ = explainer.pred_probas
-        if model_summary:
-            _ = explainer.permutation_importances
-            if explainer.cats is not None:
-                _ = explainer.permutation_importances_cats
-        if shap_interaction:
-            _ = explainer.shap_interaction_values
-            if explainer.cats is not None:
-                _ = explainer.shap_interaction_values_cats
-        if decision_trees:
-            _ = explainer.graphviz_available
-            _ = explainer.decision_trees
+        # lazily loaded properties that each tab needs, in order of the tabs:
+        self.tab_chains = dict(
+            model_summary=['shap', 'permutation'] if model_summary else [],
+            contributions=['shap'] if contributions else [],
+            shap_dependence=['shap'] if shap_dependence else [],
+            shap_interaction=['interactions'] if shap_interaction else [],
+            decision_trees=['trees'] if decision_trees else [])
+        self.precomputer = ExplainerPrecomputer(explainer, 
+            [chain for chains in self.tab_chains.values() for chain in chains])
+
+        # calculate lazily loaded properties before starting dashboard, 
+        # or start calculating them in the background:
+        if background_precompute:
+            self.precomputer.start()
+        else:
+            self.precomputer.run()
             
         self.app = dash.Dash(__name__)
         self.app.config['suppress_callback_exceptions']=True
@@ -88,11 +99,21 @@ class ExplainerDashboard:
         
         pio.templates.default = self.plotly_template
 
+        # tabs render their figures through the cache:
+        if self.figure_cache is not None:
+            self.explainer = CachedExplainer(explainer, self.figure_cache)
+
         # layout
         self.title_and_label_selector = TitleAndLabelSelector(explainer, title=title)
         self.tabs = [] if tabs is None else tabs
+        # custom tabs do not wait for any properties:
+        tabs_chains = [[] for tab in self.tabs] + [
+                            chains for chains in self.tab_chains.values() if chains]
         self._insert_tabs()
         assert len(self.tabs) > 0, 'need to pass at least one tab! e.g. model_summary=True'
+        if background_precompute:
+            self.tabs = [PrecomputePlaceholder(tab, self.precomputer, chains) 
+                            for tab, chains in zip(self.tabs, tabs_chains)]
         
         self.tab_layouts = [
             dcc.Tab(children=tab.layout(), label=tab.title, id=tab.tab_id, value=tab.tab_id) 
@@ -120,7 +141,7 @@ class ExplainerDashboard:
             self.tabs.append(ShapInteractionsTab(self.explainer, **self.kwargs))
         if self.decision_trees:
             assert hasattr(self.explainer, 'decision_trees'), \
-                """the explainer object has no shadow_trees property. This tab 
+                """the explainer object has no decision_trees property. This tab 
                 only works with a RandomForestClassifierBunch or RandomForestRegressionBunch""" 
             self.tabs.append(DecisionTreesTab(self.explainer, **self.kwargs))
         
@@ -140,14 +161,20 @@ class ExplainerDashboardStandaloneTab:
     which tabs to include, and pass kwargs to individual tabs.
     """
     def __init__(self, explainer, tab, title='Model Explainer', 
-                    plotly_template="none", **kwargs):
+                    plotly_template="none", figure_cache=None, **kwargs):
         """Constructs an ExplainerDashboard.
         
         :param explainer: an ExplainerBunch object
         :param title: Title of the dashboard, defaults to 'Model Explainer'
         :type title: str, optional
         :param tab: single tab to be run as dashboard
+        :param figure_cache: if True (or a FigureCache) the figures generated 
+            by the dashboard callbacks get cached, defaults to None (no caching)
+        :type figure_cache: bool or FigureCache, optional
         """
+        self.figure_cache = get_figure_cache(figure_cache)
+        if self.figure_cache is not None:
+            explainer = CachedExplainer(explainer, self.figure_cache)
         self.explainer = explainer
         self.title = title
 
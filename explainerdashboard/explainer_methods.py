@@ -1,12 +1,18 @@
 
 from functools import partial
+import hashlib
+import os
+import pickle
+import re
+import shutil
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
-from dtreeviz.trees import ShadowDecTree
+from joblib import Parallel, delayed, effective_n_jobs
 
-from sklearn.metrics import make_scorer
+from sklearn.metrics import make_scorer, roc_curve, precision_recall_curve
 from sklearn.base import clone
 from sklearn.model_selection import StratifiedKFold
 
@@ -37,9 +43,10 @@ def get_feature_dict(all_cols, cats=None):
         if len(cat_cols) > 1:
             feature_dict[col] = cat_cols
 
-    # add all the individual features
-    other_cols = list(set(all_cols) - set([item for sublist in list(feature_dict.values())
-                                                for item in sublist]))
+    # add all the individual features (in their original order)
+    grouped_cols = set([item for sublist in list(feature_dict.values())
+                                for item in sublist])
+    other_cols = [col for col in all_cols if col not in grouped_cols]
 
     for col in other_cols:
         feature_dict[col] = [col]
@@ -68,6 +75,17 @@ def retrieve_onehot_value(X, encoded_col):
     return pd.Series(feature_value).map(mapping)
 
 
+def get_merged_columns(all_cols, feature_dict):
+    """
+    Returns the list of columns after merging onehot encoded columns
+    as described by feature_dict (see get_feature_dict()): first all columns 
+    that were not onehot encoded in their original order, followed by 
+    the categorical features.
+    """
+    return ([col for col in all_cols if feature_dict.get(col) == [col]] 
+                + [col for col, col_list in feature_dict.items() if len(col_list) > 1])
+
+
 def merge_categorical_columns(X, cats=None):
     """
     Returns a new feature Dataframe X_cats where the onehotencoded
@@ -75,34 +93,67 @@ def merge_categorical_columns(X, cats=None):
     from the encodings.
     """
     feature_dict = get_feature_dict(X.columns, cats)
-    X_cats = X.copy()
+    merged_columns = get_merged_columns(X.columns, feature_dict)
+
+    cat_values = {}
     for col_name, col_list in feature_dict.items():
         if len(col_list) > 1:
-            X_cats[col_name] = retrieve_onehot_value(X, col_name)
-            X_cats.drop(col_list, axis=1, inplace=True)
-    return X_cats
+            onehot = X[col_list].values
+            # if not a single 1 then encoded feature must have been dropped,
+            # which maps to the last category: "NOT_ENCODED"
+            codes = np.where(onehot.max(axis=1) == 0, -1, onehot.argmax(axis=1))
+            categories = np.array([col[len(col_name) + 1:] for col in col_list] 
+                                    + ["NOT_ENCODED"], dtype=object)
+            cat_values[col_name] = categories[codes]
+
+    X_cats = pd.concat([
+                X[[col for col in merged_columns if col not in cat_values]],
+                pd.DataFrame(cat_values, index=X.index)], axis=1)
+    return X_cats[merged_columns]
+
 
 def merge_categorical_shap_values(X, shap_values, cats=None):
     """
-    Returns a new feature Dataframe X_cats and new shap values np.array
-    where the shap values of onehotencoded categorical features have been
-    added up.
+    Returns a new shap values np.array where the shap values of 
+    onehotencoded categorical features have been added up.
+
+    shap_values can also be a 3d np.array with the shap values of all
+    classes stacked, e.g. np.stack(shap_values_list), in which case all
+    classes get merged at once.
     """
     feature_dict = get_feature_dict(X.columns, cats)
-    shap_df = pd.DataFrame(shap_values, columns=X.columns)
-    for col_name, col_list in feature_dict.items():
-        if len(col_list) > 1:
-            shap_df[col_name] = shap_df[col_list].sum(axis=1)
-            shap_df.drop(col_list, axis=1, inplace=True)
-    return shap_df.values
+    G = get_grouping_matrix(X.columns, 
+                            get_merged_columns(X.columns, feature_dict),
+                            feature_dict)
+    return shap_values @ G
+
+
+def get_grouping_matrix(old_columns, new_columns, feature_dict):
+    """
+    Returns a np.array G of shape (len(old_columns), len(new_columns)) with 
+    G[i, j]=1 if old_columns[i] belongs to new_columns[j] according to 
+    feature_dict (see get_feature_dict()), and 0 otherwise. 
+    
+    Multiplying with G adds up the onehot encoded columns, 
+    e.g. shap_values @ G or G.T @ shap_interaction_values @ G.
+    """
+    old_idx = {col: i for i, col in enumerate(old_columns)}
+    G = np.zeros((len(old_columns), len(new_columns)))
+    for j, new_col in enumerate(new_columns):
+        G[[old_idx[col] for col in feature_dict[new_col]], j] = 1
+    return G
 
 
 def merge_categorical_shap_interaction_values(old_columns, new_columns,
-                                                shap_interaction_values):
+                                                shap_interaction_values, chunk_size=1000):
     """
     Returns a 3d numpy array shap_interaction_values where the categorical
     columns have been added up.
 
+    The merged values are calculated as G.T @ SIV @ G (with G the grouping
+    matrix from get_grouping_matrix()), in blocks of chunk_size rows to
+    limit the size of temporary arrays.
+
     Caution:
     Column names in new_columns that are not found in old_columns are
     assumed to be categorical feature names.
@@ -121,25 +172,198 @@ def merge_categorical_shap_interaction_values(old_columns, new_columns,
     cats = [col for col in new_columns if col not in old_columns]
     feature_dict = get_feature_dict(old_columns, cats)
 
-    siv = np.zeros((shap_interaction_values.shape[0],
-                    len(new_columns),
-                    len(new_columns)))
-
-    for new_col1 in new_columns:
-        for new_col2 in new_columns:
-            newcol_idx1 = new_columns.index(new_col1)
-            newcol_idx2 = new_columns.index(new_col2)
-            oldcol_idxs1 = [old_columns.index(col)
-                                for col in feature_dict[new_col1]]
-            oldcol_idxs2 = [old_columns.index(col)
-                                for col in feature_dict[new_col2]]
-            siv[:, newcol_idx1, newcol_idx2] = \
-                shap_interaction_values[:, oldcol_idxs1, :][:, :, oldcol_idxs2]\
-                .sum(axis=(1, 2))
+    dtype = np.result_type(shap_interaction_values.dtype, np.float32)
+    G = get_grouping_matrix(old_columns, new_columns, feature_dict).astype(dtype)
 
+    siv = np.empty((shap_interaction_values.shape[0],
+                    len(new_columns),
+                    len(new_columns)), dtype=dtype)
+
+    n_old, n_new = G.shape
+    for start in range(0, len(siv), chunk_size):
+        block = np.asarray(shap_interaction_values[start:start+chunk_size], dtype=dtype)
+        n = len(block)
+        # two batched matrix products, (SIV @ G) and then G.T @ (SIV @ G):
+        block = (block.reshape(n*n_old, n_old) @ G).reshape(n, n_old, n_new)
+        block = (block.transpose(0, 2, 1).reshape(n*n_new, n_old) @ G)
+        siv[start:start+n] = block.reshape(n, n_new, n_new).transpose(0, 2, 1)
     return siv
 
 
+def get_explainer_fingerprint(model, X, y=None, cats=None, shap="tree", **settings):
+    """
+    Returns a hex digest that identifies the combination of model, data and
+    settings. Used as key for the on-disk cache, so that cached values
+    automatically become stale whenever any of these change.
+
+    :param model: fitted model (needs to be picklable)
+    :param X: pd.DataFrame with the model features
+    :param y: target values, defaults to None
+    :param cats: list of onehot encoded categorical features, defaults to None
+    :param shap: type of shap explainer, defaults to "tree"
+    :param settings: any additional settings that influence computed values
+    :return: fingerprint
+    :rtype: str
+    """
+    fingerprint = hashlib.sha1()
+    fingerprint.update(pickle.dumps(model))
+    fingerprint.update(pickle.dumps(X.columns.tolist()))
+    fingerprint.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    if y is not None:
+        fingerprint.update(pd.util.hash_pandas_object(
+                                pd.Series(y), index=False).values.tobytes())
+    fingerprint.update(pickle.dumps(
+        (cats, str(shap), sorted((k, str(v)) for k, v in settings.items()))))
+    return fingerprint.hexdigest()
+
+
+def prune_cache_dir(cache_dir, fingerprint, cache_name=None):
+    """
+    Returns the (created if needed) directory for fingerprint in cache_dir.
+
+    If cache_name is given, cache_dir/<cache_name>.fingerprint keeps track of 
+    the last fingerprint used under that name, and when the fingerprint 
+    has changed (e.g. the model was retrained) the stale entry of 
+    that name gets removed. Entries of other names (e.g. other explainers 
+    sharing the same cache_dir) are left alone.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    if cache_name is not None:
+        pointer = cache_dir / (cache_name + ".fingerprint")
+        old_fingerprint = pointer.read_text().strip() if pointer.exists() else None
+        if (old_fingerprint is not None and old_fingerprint != fingerprint
+                and re.fullmatch(r"[0-9a-f]{40}", old_fingerprint)):
+            still_used = any(other.read_text().strip() == old_fingerprint 
+                                for other in cache_dir.glob("*.fingerprint") 
+                                if other != pointer)
+            if not still_used:
+                shutil.rmtree(cache_dir / old_fingerprint, ignore_errors=True)
+        tmp_pointer = pointer.with_name(pointer.name + f".{os.getpid()}.tmp")
+        tmp_pointer.write_text(fingerprint)
+        os.replace(tmp_pointer, pointer)
+    cache_path = cache_dir / fingerprint
+    cache_path.mkdir(exist_ok=True)
+    return cache_path
+
+
+def save_cached_value(cache_path, name, value):
+    """
+    Stores value in cache_path under name. np.arrays get stored as .npy,
+    lists of np.arrays (e.g. shap values per class) as .npz and anything else
+    (e.g. pd.DataFrames) gets pickled.
+    """
+    cache_path = Path(cache_path)
+    if isinstance(value, np.ndarray):
+        filename = cache_path / (name + ".npy")
+        save = lambda f: np.save(f, value)
+    elif (isinstance(value, list) and len(value) > 0
+            and all(isinstance(v, np.ndarray) for v in value)):
+        filename = cache_path / (name + ".npz")
+        save = lambda f: np.savez(f, *value)
+    else:
+        filename = cache_path / (name + ".pkl")
+        save = lambda f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # write to a temporary file first so that other processes never
+    # read a half written cache entry:
+    tmp_filename = filename.with_name(filename.name + f".{os.getpid()}.tmp")
+    with open(tmp_filename, "wb") as f:
+        save(f)
+    os.replace(tmp_filename, filename)
+
+
+def load_cached_value(cache_path, name):
+    """
+    Loads value stored with save_cached_value() from cache_path.
+    Returns None if no value for name was found.
+    """
+    cache_path = Path(cache_path)
+    if (cache_path / (name + ".npy")).exists():
+        return np.load(cache_path / (name + ".npy"))
+    if (cache_path / (name + ".npz")).exists():
+        with np.load(cache_path / (name + ".npz")) as arrays:
+            return [arrays["arr_" + str(i)] for i in range(len(arrays.files))]
+    if (cache_path / (name + ".pkl")).exists():
+        with open(cache_path / (name + ".pkl"), "rb") as f:
+            return pickle.load(f)
+    return None
+
+
+def save_memmapped(memmap_dir, name, value):
+    """
+    Writes value (an np.array or a list of np.array, e.g. one per class) to 
+    .npy files in memmap_dir and returns read-only memory mapped versions 
+    of the arrays.
+    """
+    memmap_dir = Path(memmap_dir)
+    memmap_dir.mkdir(parents=True, exist_ok=True)
+    if isinstance(value, list):
+        return [save_memmapped(memmap_dir, f"{name}_{i}", v) 
+                    for i, v in enumerate(value)]
+    np.save(memmap_dir / (name + ".npy"), value)
+    return np.load(memmap_dir / (name + ".npy"), mmap_mode='r')
+
+
+def is_memmapped(value, memmap_dir=None):
+    """
+    True if value is an np.memmap or a list of only np.memmap (and if 
+    memmap_dir is given, if they are backed by files in memmap_dir)
+    """
+    if isinstance(value, list):
+        return len(value) > 0 and all(is_memmapped(v, memmap_dir) for v in value)
+    if not isinstance(value, np.memmap):
+        return False
+    return (memmap_dir is None 
+                or Path(value.filename).parent == Path(memmap_dir).resolve())
+
+
+def load_memmapped(memmap_dir, name):
+    """
+    Reopens the arrays written by save_memmapped() read-only with memory mapping.
+    Returns None if no arrays for name are found in memmap_dir.
+    """
+    memmap_dir = Path(memmap_dir)
+    if (memmap_dir / (name + ".npy")).exists():
+        return np.load(memmap_dir / (name + ".npy"), mmap_mode='r')
+    n_arrays = len(list(memmap_dir.glob(name + "_[0-9]*.npy")))
+    if n_arrays > 0:
+        return [np.load(memmap_dir / f"{name}_{i}.npy", mmap_mode='r') 
+                    for i in range(n_arrays)]
+    return None
+
+
+def chunked_shap_values(shap_explainer, X, chunk_size=None, n_jobs=None):
+    """
+    Calculates shap values for X by splitting X into chunks of chunk_size rows
+    and evaluating these chunks on n_jobs processes. Progress gets reported
+    for every chunk. The results are concatenated back together in the 
+    original order of X.
+
+    :param shap_explainer: a shap explainer with a .shap_values() method
+    :param X: pd.DataFrame with model features
+    :param chunk_size: number of rows per chunk, defaults to None 
+        (divide X evenly over n_jobs)
+    :type chunk_size: int, optional
+    :param n_jobs: number of processes to use, -1 means all cores, defaults to None
+    :type n_jobs: int, optional
+    :return: shap_values, either a single np.array or a list of np.array 
+        (one for every class) depending on the output of shap_explainer
+    """
+    if chunk_size is None:
+        chunk_size = int(np.ceil(len(X) / effective_n_jobs(n_jobs)))
+    chunks = [X.iloc[start:start+chunk_size] for start in range(0, len(X), chunk_size)]
+
+    chunk_shap_values = Parallel(n_jobs=n_jobs, verbose=11)(
+        delayed(shap_explainer.shap_values)(chunk) for chunk in chunks)
+
+    if isinstance(chunk_shap_values[0], list):
+        # one np.array per class:
+        return [np.concatenate([sv[i] for sv in chunk_shap_values]) 
+                    for i in range(len(chunk_shap_values[0]))]
+    return np.concatenate(chunk_shap_values)
+
+
 def make_one_vs_all_scorer(metric, pos_label, greater_is_better=True):
     """
     Returns a binary one vs all scorer for a single class('pos_label') of a
@@ -158,78 +382,164 @@ def make_one_vs_all_scorer(metric, pos_label, greater_is_better=True):
     return _scorer
 
 
+def make_multi_one_vs_all_scorer(metric, pos_labels, greater_is_better=True):
+    """
+    Returns a scorer that returns an np.array with the binary one vs all
+    scores for each class in pos_labels, all based on a single call to
+    predict_proba.
+    """
+    sign = 1 if greater_is_better else -1
+
+    def _scorer(clf, X, y):
+        y_pred = clf.predict_proba(X)
+        return np.array([sign * metric((y == pos_label).astype(int), y_pred[:, pos_label])
+                            for pos_label in pos_labels])
+
+    return _scorer
+
+
+def _permutation_scores(model, X, y, scorer, col_lists, seeds, n_repeats=1):
+    """
+    Returns the scores of scorer after permuting each of the col_lists of X
+    in turn, n_repeats times per col_list. Output shape is 
+    (len(col_lists), n_repeats) or (len(col_lists), n_repeats, n_labels) 
+    when scorer returns a score per label.
+    """
+    X = X.copy()
+    scores = []
+    for col_list, seed in zip(col_lists, seeds):
+        rng = np.random.RandomState(seed)
+        old_cols = X[col_list].copy()
+        col_scores = []
+        for _ in range(n_repeats):
+            X[col_list] = old_cols.values[rng.permutation(len(X))]
+            col_scores.append(scorer(model, X, y))
+        X[col_list] = old_cols
+        scores.append(col_scores)
+    return np.array(scores)
+
+
 def permutation_importances(model, X, y, metric, cats=None,
                             greater_is_better=True, needs_proba=False,
-                            pos_label=None,
-                            sort=True, verbose=0):
+                            pos_label=None, sort=True, n_repeats=1,
+                            random_state=None, n_jobs=None, verbose=0):
     """
+    Returns the drop in metric when each feature (or group of onehot encoded
+    features in cats) is permuted, averaged over n_repeats permutations
+    (column 'Importance') together with the standard deviation over the
+    repeats (column 'Importance_std'). Feature groups get evaluated in 
+    parallel on n_jobs processes.
+
+    If pos_label is a list of labels, the one vs all metric of every label
+    gets calculated from the same permuted predictions, and a list of 
+    pd.DataFrames (one for each label) is returned.
+
     adapted from rfpimp
-    """
-    X = X.copy()
 
+    :param n_repeats: number of times to permute each feature, defaults to 1
+    :type n_repeats: int, optional
+    :param random_state: seed for the permutations, defaults to None
+    :type random_state: int, optional
+    :param n_jobs: number of processes to use, -1 means all cores, defaults to None
+    :type n_jobs: int, optional
+    """
     feature_dict = get_feature_dict(X.columns, cats)
 
-    if isinstance(metric, str):
-        scorer = make_scorer(metric, greater_is_better, needs_proba)
+    if isinstance(pos_label, list):
+        scorer = make_multi_one_vs_all_scorer(metric, pos_label, greater_is_better)
+    elif isinstance(metric, str):
+        scorer = make_scorer(metric, greater_is_better=greater_is_better, needs_proba=needs_proba)
     elif not needs_proba or pos_label is None:
-        scorer = make_scorer(metric, greater_is_better, needs_proba)
+        scorer = make_scorer(metric, greater_is_better=greater_is_better, needs_proba=needs_proba)
     else:
         scorer = make_one_vs_all_scorer(metric, pos_label, greater_is_better)
 
     baseline = scorer(model, X, y)
-    imp = pd.DataFrame({'Importance': []})
 
-    for col_name, col_list in feature_dict.items():
-        old_cols = X[col_list].copy()
-        X[col_list] = np.random.permutation(X[col_list])
+    col_names = list(feature_dict.keys())
+    col_lists = list(feature_dict.values())
+    # seeds are drawn per feature so results do not depend on n_jobs:
+    seeds = np.random.RandomState(random_state).randint(
+                np.iinfo(np.int32).max, size=len(col_lists))
+    n_chunks = min(effective_n_jobs(n_jobs), len(col_lists))
+    chunks = np.array_split(np.arange(len(col_lists)), n_chunks)
+
+    permutation_scores = np.concatenate(Parallel(n_jobs=n_jobs, verbose=verbose)(
+        delayed(_permutation_scores)(model, X, y, scorer, 
+                                     [col_lists[i] for i in chunk], seeds[chunk], n_repeats)
+            for chunk in chunks))
+    drop_in_metric = baseline - permutation_scores
+
+    def importances_df(drop):
+        imp = pd.DataFrame({
+                'Importance': drop.mean(axis=1), 
+                'Importance_std': drop.std(axis=1)}, 
+                index=pd.Index(col_names, name='Feature'))
+        if sort:
+            return imp.sort_values('Importance', ascending=False)
+        return imp
 
-        permutation_score = scorer(model, X, y)
+    if isinstance(pos_label, list):
+        return [importances_df(drop_in_metric[:, :, i]) for i in range(len(pos_label))]
+    return importances_df(drop_in_metric)
 
-        drop_in_metric = baseline - permutation_score
-        imp = imp.append(pd.DataFrame({'Importance': [drop_in_metric]}, index=[col_name]))
-        X[col_list] = old_cols
 
-    imp.index.name = 'Feature'
-    if sort:
-        return imp.sort_values('Importance', ascending=False)
-    else:
-        return imp
+def _fold_permutation_importances(model, X, y, metric, train_index, test_index, 
+                                    **kwargs):
+    """
+    Fits a clone of model on the train_index rows of X and returns the 
+    (unsorted) permutation importances on the test_index rows
+    """
+    model = clone(model).fit(X.iloc[train_index], y.iloc[train_index])
+    return permutation_importances(model, X.iloc[test_index], y.iloc[test_index],
+                                    metric, sort=False, n_jobs=1, **kwargs)
 
 
 def cv_permutation_importances(model, X, y, metric, cats=None, greater_is_better=True,
-                                needs_proba=False, pos_label=None, cv=None, verbose=0):
+                                needs_proba=False, pos_label=None, cv=None, n_repeats=1,
+                                random_state=None, n_jobs=None, verbose=0):
     """
-    Returns the permutation importances averages over `cv` cross-validated folds.
+    Returns the permutation importances averages over `cv` cross-validated folds
+    (column 'Importance'), together with the standard deviation over the folds 
+    (column 'Importance_fold_std'). The folds get fit and evaluated in parallel
+    on n_jobs processes.
+
+    If pos_label is a list of labels, the importances of all labels get
+    calculated from the same permuted predictions, and a list of pd.DataFrames
+    (one for each label) is returned.
     """
     if cv is None:
         return permutation_importances(model, X, y, metric, cats,
                                         greater_is_better=greater_is_better,
                                         needs_proba=needs_proba,
                                         pos_label=pos_label,
-                                        sort=False,
+                                        sort=True,
+                                        n_repeats=n_repeats,
+                                        random_state=random_state,
+                                        n_jobs=n_jobs,
                                         verbose=verbose)
 
     skf = StratifiedKFold(n_splits=cv, random_state=None, shuffle=False)
-    model = clone(model)
-    for i, (train_index, test_index) in enumerate(skf.split(X, y)):
-        X_train, X_test = X.iloc[train_index], X.iloc[test_index]
-        y_train, y_test = y.iloc[train_index], y.iloc[test_index]
-
-        model.fit(X_train, y_train)
-
-        imp = permutation_importances(model, X_test, y_test, metric, cats,
-                                        greater_is_better=greater_is_better,
-                                        needs_proba=needs_proba,
-                                        pos_label=pos_label,
-                                        sort=False,
-                                        verbose=verbose)
-        if i == 0:
-            imps = imp
-        else:
-            imps = imps.merge(imp, on='Feature', suffixes=("", "_" + str(i)))
-
-    return pd.DataFrame(imps.mean(axis=1), columns=['Importance'])\
-                        .sort_values('Importance', ascending=False)
+    fold_imps = Parallel(n_jobs=n_jobs, verbose=verbose)(
+        delayed(_fold_permutation_importances)(
+            model, X, y, metric, train_index, test_index, cats=cats,
+            greater_is_better=greater_is_better, needs_proba=needs_proba,
+            pos_label=pos_label, n_repeats=n_repeats, random_state=random_state)
+                for train_index, test_index in skf.split(X, y))
+    fold_imps = [imp if isinstance(pos_label, list) else [imp] for imp in fold_imps]
+
+    features = fold_imps[0][0].index
+    importances = np.zeros((cv, len(fold_imps[0]), len(features)))
+    for i, fold_imp in enumerate(fold_imps):
+        for j, imp in enumerate(fold_imp):
+            importances[i, j] = imp.Importance.reindex(features).values
+
+    imps = [pd.DataFrame({
+                'Importance': importances[:, j].mean(axis=0),
+                'Importance_fold_std': importances[:, j].std(axis=0)}, index=features)
+                    .sort_values('Importance', ascending=False)
+                        for j in range(importances.shape[1])]
+    return imps if isinstance(pos_label, list) else imps[0]
 
 
 def mean_absolute_shap_values(columns, shap_values, cats=None):
@@ -261,6 +571,10 @@ def get_precision_df(pred_probas, y_true, bin_size=None, quantiles=None, pos_lab
     only returns a single precision. If pred_probas containts probabilities for
     every class (typically a multiclass classifier), also returns precision
     for every class in every bin.
+
+    With bin_size the bins are [0, bin_size], (bin_size, 2*bin_size], etc. 
+    With quantiles the predictions are sorted and split into quantiles bins 
+    of (nearly) equal size.
     """
     if bin_size is None and quantiles is None:
         bin_size = 0.1
@@ -269,118 +583,174 @@ def get_precision_df(pred_probas, y_true, bin_size=None, quantiles=None, pos_lab
             or (bin_size is None and quantiles is not None)), \
         "either only pass bin_size or only pass quantiles!"
 
-    
+    pred_probas = np.asarray(pred_probas)
+    y_true = np.asarray(y_true)
     if len(pred_probas.shape) == 2:
         # in case the full binary classifier pred_proba is passed,
         # we only select the probability of the positive class
-        predictions_df = pd.DataFrame(
-            {'pred_proba': pred_probas[:, pos_label], 'target': y_true})
+        pred_proba = pred_probas[:, pos_label]
         n_classes = pred_probas.shape[1]
     else:
-        predictions_df = pd.DataFrame(
-            {'pred_proba': pred_probas, 'target': y_true})
+        pred_proba = pred_probas
         n_classes = 1
-        
-    predictions_df = predictions_df.sort_values('pred_proba')
-
-    # define a placeholder df:
-    columns = ['p_min', 'p_max', 'p_avg', 'bin_width', 'precision', 'count']
-    if n_classes > 1:
-        for i in range(n_classes):
-            columns.append('precision_' + str(i))
-
-    precision_df = pd.DataFrame(columns=columns)
 
     if bin_size:
-        thresholds = np.arange(0.0, 1.0, bin_size).tolist()
-        # loop through prediction intervals, and compute
-        for bin_min, bin_max in zip(thresholds, thresholds[1:] + [1.0]):
-            if bin_min != bin_max:
-                new_row_dict = {
-                    'p_min': [bin_min],
-                    'p_max': [bin_max],
-                    'p_avg': [bin_min + (bin_max - bin_min) / 2.0],
-                    'bin_width': [bin_max - bin_min]
-                }
-
-                if bin_min == 0.0:
-                    new_row_dict['p_avg'] = predictions_df[
-                            (predictions_df.pred_proba >= bin_min)
-                            & (predictions_df.pred_proba <= bin_max)
-                        ]['pred_proba'].mean()
-                    new_row_dict['precision'] = (
-                        predictions_df[
-                            (predictions_df.pred_proba >= bin_min)
-                            & (predictions_df.pred_proba <= bin_max)
-                        ].target == pos_label
-                    ).mean()
-                    new_row_dict['count'] = predictions_df[
-                            (predictions_df.pred_proba >= bin_min)
-                            & (predictions_df.pred_proba <= bin_max)
-                        ].target.count()
-                    if n_classes > 1:
-                        for i in range(n_classes):
-                            new_row_dict['precision_' + str(i)] = (
-                                predictions_df[
-                                    (predictions_df.pred_proba >= bin_min)
-                                    & (predictions_df.pred_proba <= bin_max)
-                                ].target == i
-                            ).mean()
-                else:
-                    new_row_dict['p_avg'] = predictions_df[
-                            (predictions_df.pred_proba > bin_min)
-                            & (predictions_df.pred_proba <= bin_max)
-                        ]['pred_proba'].mean()
-                    new_row_dict['precision'] = (
-                        predictions_df[
-                            (predictions_df.pred_proba > bin_min)
-                            & (predictions_df.pred_proba <= bin_max)
-                        ].target == pos_label
-                    ).mean()
-                    new_row_dict['count'] = (
-                        predictions_df[
-                            (predictions_df.pred_proba > bin_min)
-                            & (predictions_df.pred_proba <= bin_max)
-                        ].target == pos_label
-                    ).count()
-                    if n_classes > 1:
-                        for i in range(n_classes):
-                            new_row_dict['precision_' + str(i)] = (
-                                predictions_df[
-                                    (predictions_df.pred_proba > bin_min)
-                                    & (predictions_df.pred_proba <= bin_max)
-                                ].target == i
-                            ).mean()
-                new_row_df = pd.DataFrame(new_row_dict, columns=precision_df.columns)
-                precision_df = pd.concat([precision_df, new_row_df])
-        
+        bin_edges = np.append(np.arange(0.0, 1.0, bin_size), 1.0)
+        n_bins = len(bin_edges) - 1
+        # bin k holds bin_edges[k] < pred_proba <= bin_edges[k+1], 
+        # except for the first bin, which also includes 0.0:
+        bins = np.maximum(np.searchsorted(bin_edges, pred_proba, side='left') - 1, 0)
+        in_range = bins < n_bins
+        bins, pred_proba, y_true = bins[in_range], pred_proba[in_range], y_true[in_range]
+        p_min, p_max = bin_edges[:-1], bin_edges[1:]
     elif quantiles:
-        preds_quantiles = np.array_split(predictions_df.pred_proba.values, quantiles)
-        target_quantiles = np.array_split(predictions_df.target.values, quantiles)
-
-        last_p_max = 0.0
-        for preds, targets in zip(preds_quantiles, target_quantiles):
-            new_row_dict = {
-                    'p_min': [last_p_max],
-                    'p_max': [preds.max()],
-                    'p_avg': [preds.mean()],
-                    'bin_width': [preds.max() - last_p_max],
-                    'precision': [np.mean(targets==pos_label)],
-                    'count' : [len(preds)],
-
-                }
-            if n_classes > 1:
-                for i in range(n_classes):
-                    new_row_dict['precision_' + str(i)] = np.mean(targets==i)
-
-            new_row_df = pd.DataFrame(new_row_dict, columns=precision_df.columns)
-            precision_df = pd.concat([precision_df, new_row_df])
-            last_p_max = preds.max()
-    
+        sort_idx = np.argsort(pred_proba)
+        pred_proba, y_true = pred_proba[sort_idx], y_true[sort_idx]
+        # same bin sizes as np.array_split(pred_proba, quantiles):
+        bin_sizes = np.full(quantiles, len(pred_proba) // quantiles)
+        bin_sizes[:len(pred_proba) % quantiles] += 1
+        bin_sizes = bin_sizes[bin_sizes > 0]
+        n_bins = len(bin_sizes)
+        bins = np.repeat(np.arange(n_bins), bin_sizes)
+        p_max = pred_proba[np.cumsum(bin_sizes) - 1]
+        p_min = np.append(0.0, p_max[:-1])
+
+    counts = np.bincount(bins, minlength=n_bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        precision_df = pd.DataFrame({
+            'p_min': p_min,
+            'p_max': p_max,
+            'p_avg': np.bincount(bins, weights=pred_proba, minlength=n_bins) / counts,
+            'bin_width': p_max - p_min,
+            'precision': np.bincount(bins, weights=(y_true == pos_label), 
+                                        minlength=n_bins) / counts,
+            'count': counts,
+        })
+        if n_classes > 1:
+            # count all (bin, class) combinations in a single pass, with 
+            # targets outside of range(n_classes) in an extra column:
+            y_codes = np.where(np.isin(y_true, np.arange(n_classes)), 
+                                y_true, n_classes).astype(int)
+            class_counts = np.bincount(bins * (n_classes + 1) + y_codes, 
+                                        minlength=n_bins * (n_classes + 1))\
+                                .reshape(n_bins, n_classes + 1)
+            for i in range(n_classes):
+                precision_df['precision_' + str(i)] = class_counts[:, i] / counts
+
+    if bin_size:
+        # drop empty bins of zero width:
+        precision_df = precision_df[precision_df.bin_width > 0].reset_index(drop=True)
     return precision_df
 
 
-def get_lift_curve_df(pred_probas, y, pos_label=1):
+def get_threshold_index(pred_probas, y_binary):
+    """
+    Returns the predicted probabilities sorted in ascending order, and the
+    cumulative number of positives among them (starting with 0 for an empty
+    selection). This allows looking up the confusion matrix counts of any 
+    cutoff with get_cutoff_counts() in O(log N).
+
+    :param pred_probas: predicted probabilities of the positive class
+    :type pred_probas: np.array
+    :param y_binary: actual outcomes, encoded 1 for the positive class and 0 otherwise
+    :type y_binary: np.array
+    :return: sorted_probas, cum_positives
+    :rtype: tuple of np.array
+    """
+    sort_idx = np.argsort(pred_probas, kind='stable')
+    sorted_probas = np.asarray(pred_probas)[sort_idx]
+    cum_positives = np.append(0, np.cumsum(np.asarray(y_binary)[sort_idx] == 1))
+    return sorted_probas, cum_positives
+
+
+def get_cutoff_counts(threshold_index, cutoff, include_cutoff=False):
+    """
+    Returns the confusion matrix counts (tn, fp, fn, tp) when predicting the
+    positive class for pred_probas > cutoff (or >= cutoff if include_cutoff),
+    using a threshold_index generated by get_threshold_index()
+    """
+    sorted_probas, cum_positives = threshold_index
+    n_below = np.searchsorted(sorted_probas, cutoff, 
+                                side='left' if include_cutoff else 'right')
+    fn = cum_positives[n_below]
+    tp = cum_positives[-1] - fn
+    tn = n_below - fn
+    fp = len(sorted_probas) - n_below - tp
+    return tn, fp, fn, tp
+
+
+def get_cutoff_metrics(tn, fp, fn, tp):
+    """
+    Returns a dict with accuracy, precision, recall and f1 calculated from 
+    confusion matrix counts. Undefined precision, recall and f1 are set to 0,
+    as in sklearn.
+    """
+    precision = tp / (tp + fp) if tp + fp > 0 else 0.0
+    recall = tp / (tp + fn) if tp + fn > 0 else 0.0
+    return {
+        'accuracy': (tp + tn) / (tn + fp + fn + tp),
+        'precision': precision,
+        'recall': recall,
+        'f1': 2 * tp / (2 * tp + fp + fn) if tp > 0 else 0.0,
+    }
+
+
+def simplify_curve(x, y, tolerance=0.001):
+    """
+    Returns the indices of the points of the curve (x, y) to keep, such that 
+    no dropped point lies further than tolerance from the simplified curve
+    (Ramer-Douglas-Peucker). The first and last point are always kept.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    keep = np.zeros(len(x), dtype=bool)
+    keep[[0, -1]] = True
+    segments = [(0, len(x) - 1)]
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2:
+            continue
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        px, py = x[start+1:end] - x[start], y[start+1:end] - y[start]
+        length = np.hypot(dx, dy)
+        if length > 0:
+            distances = np.abs(dx * py - dy * px) / length
+        else:
+            distances = np.hypot(px, py)
+        max_idx = np.argmax(distances)
+        if distances[max_idx] > tolerance:
+            mid = start + 1 + max_idx
+            keep[mid] = True
+            segments.extend([(start, mid), (mid, end)])
+    return np.flatnonzero(keep)
+
+
+def get_roc_curve_df(pred_probas, y_binary, tolerance=0.001):
+    """
+    Returns a pd.DataFrame with the false positive rate ('fpr'), 
+    true positive rate ('tpr') and 'threshold' of the ROC curve, simplified 
+    with simplify_curve() so that the number of points does not grow with the
+    size of the dataset.
+    """
+    fpr, tpr, thresholds = roc_curve(y_binary, pred_probas)
+    keep = simplify_curve(fpr, tpr, tolerance)
+    return pd.DataFrame(dict(fpr=fpr[keep], tpr=tpr[keep], threshold=thresholds[keep]))
+
+
+def get_pr_curve_df(pred_probas, y_binary, tolerance=0.001):
+    """
+    Returns a pd.DataFrame with the 'precision', 'recall' and 'threshold' of the
+    precision-recall curve, simplified with simplify_curve() so that the number
+    of points does not grow with the size of the dataset.
+    """
+    precision, recall, thresholds = precision_recall_curve(y_binary, pred_probas)
+    # the last point (precision=1, recall=0) does not have a threshold:
+    thresholds = np.append(thresholds, np.nan)
+    keep = simplify_curve(precision, recall, tolerance)
+    return pd.DataFrame(dict(precision=precision[keep], recall=recall[keep], 
+                             threshold=thresholds[keep]))
+
+
+def get_lift_curve_df(pred_probas, y, pos_label=1, resolution=None):
     """returns a pd.DataFrame that can be used to generate a lift curve plot.
     
     :param pred_probas: predicted probabilities of the positive class
@@ -389,24 +759,50 @@ def get_lift_curve_df(pred_probas, y, pos_label=1):
     :type y: pd.Series, list of np.array
     :param pos_label: the label of the positive class [defaults to 1]
     :type pos_label: int
+    :param resolution: if given only return resolution rows, evenly spaced
+        over the percentiles of the sorted predictions (the last row is 
+        always included), defaults to None (all rows)
+    :type resolution: int, optional
     :return: lift_df
     :rtype: pd.DataFrame
     """
-    lift_df = pd.DataFrame(
-        {
-            'pred_proba' : pred_probas, 
-             'y' : y
-        }).sort_values('pred_proba', ascending=False).reset_index(drop=True)
-    lift_df['index'] = lift_df.index + 1
-    lift_df['index_percentage'] = 100*lift_df['index'] / len(lift_df)
-    lift_df['positives'] = (lift_df.y==pos_label).astype(int).cumsum()
-    lift_df['precision'] = 100 * (lift_df['positives'] /  lift_df['index'])
-    lift_df['cumulative_percentage_pos'] = 100 * (lift_df['positives'] / (lift_df.y==pos_label).astype(int).sum())
-    lift_df['random_pos'] = (lift_df.y==pos_label).astype(int).mean() * lift_df['index']
-    lift_df['random_precision'] = 100 * (lift_df['random_pos'] /  lift_df['index'])
-    lift_df['random_cumulative_percentage_pos'] = 100 * (lift_df['random_pos'] / (lift_df.y==pos_label).astype(int).sum())
-    for y_label in range(y.nunique()):
-        lift_df['precision_' + str(y_label)] = 100*(lift_df.y==y_label).astype(int).cumsum() / lift_df['index']
+    pred_probas, y = np.asarray(pred_probas), np.asarray(y)
+    sort_idx = np.argsort(-pred_probas)
+    pred_probas, y = pred_probas[sort_idx], y[sort_idx]
+    n_classes = len(np.unique(y))
+
+    if resolution is not None and resolution < len(y):
+        rows = np.unique(np.linspace(0, len(y) - 1, resolution).round().astype(int))
+    else:
+        rows = np.arange(len(y))
+
+    # count the outcomes between consecutive rows for all classes at once, 
+    # with outcomes outside of range(n_classes) in an extra column:
+    group = np.repeat(np.arange(len(rows)), np.diff(np.append(-1, rows)))
+    y_codes = np.where(np.isin(y, np.arange(n_classes)), y, n_classes).astype(int)
+    class_counts = np.cumsum(np.bincount(group * (n_classes + 1) + y_codes, 
+                                         minlength=len(rows) * (n_classes + 1))
+                                .reshape(len(rows), n_classes + 1), axis=0)
+
+    index = rows + 1
+    positives = np.cumsum(np.bincount(group, weights=(y == pos_label), 
+                                      minlength=len(rows))).astype(int)
+    total_pos = positives[-1] if len(rows) > 0 else 0
+    random_pos = (total_pos / len(y)) * index
+    lift_df = pd.DataFrame({
+        'pred_proba': pred_probas[rows],
+        'y': y[rows],
+        'index': index,
+        'index_percentage': 100 * index / len(y),
+        'positives': positives,
+        'precision': 100 * positives / index,
+        'cumulative_percentage_pos': 100 * positives / total_pos,
+        'random_pos': random_pos,
+        'random_precision': 100 * random_pos / index,
+        'random_cumulative_percentage_pos': 100 * random_pos / total_pos,
+    })
+    for y_label in range(n_classes):
+        lift_df['precision_' + str(y_label)] = 100 * class_counts[:, y_label] / index
     return lift_df
     
 
@@ -425,58 +821,164 @@ def get_contrib_df(shap_base_value, shap_values, X_row, topx=None, cutoff=None):
         """X is not the right shape: len(X.values[0]) should be 1. 
             Try passing X.iloc[[index]]""" 
 
-    # start with the shap_base_value
-    base_df = pd.DataFrame(
-        {
-            'col': ['base_value'],
-            'contribution': [shap_base_value],
-            'value': ['-']
-        })
-
-    contrib_df = pd.DataFrame(
-                    {
-                        'col': X_row.columns,
-                        'contribution': shap_values,
-                        'value': X_row.values[0]
-                    })
+    return get_contrib_dfs(shap_base_value, np.asarray(shap_values).reshape(1, -1), 
+                            X_row.iloc[[0]], topx, cutoff).drop('index', axis=1)
 
-    # sort the df by absolute value from highest to lowest:
-    contrib_df = contrib_df.reset_index(drop=True)
-    contrib_df = contrib_df.reindex(
-                    contrib_df.contribution.abs().sort_values(ascending=False).index)
 
-    contrib_df = pd.concat([base_df, contrib_df], ignore_index=True)
+def get_contrib_dfs(shap_base_value, shap_values, X, topx=None, cutoff=None, indexes=None):
+    """
+    Returns the contrib_df of every row of X (see get_contrib_df) stacked 
+    in a single DataFrame, with an extra 'index' column identifying the row.
+    Rows are sorted by absolute contribution, truncated to the topx 
+    contributions (counting the base_value) and/or the contributions above 
+    cutoff, with the remainder summed under 'REST'. All rows are 
+    computed at once with array operations on shap_values.
+
+    :param shap_base_value: shap base value
+    :type shap_base_value: float
+    :param shap_values: shap values of the rows of X
+    :type shap_values: np.ndarray(N,M)
+    :param X: features
+    :type X: pd.DataFrame(N,M)
+    :param topx: Only return topx features, remainder called REST, defaults to None
+    :type topx: int, optional
+    :param cutoff: only return features with at least cutoff contributions, defaults to None
+    :type cutoff: float, optional
+    :param indexes: value of the 'index' column for every row of X, 
+        defaults to None (0..N-1)
+    :type indexes: array-like, optional
+    :return: contrib_dfs
+    :rtype: pd.DataFrame
+    """
+    shap_values = np.asarray(shap_values)
+    n_rows, n_cols = shap_values.shape
+    indexes = np.arange(n_rows) if indexes is None else np.asarray(indexes)
+
+    # sort every row by absolute value from highest to lowest, after the base_value:
+    order = np.argsort(-np.abs(shap_values), axis=1, kind='stable')
+    col_pos = np.hstack([np.zeros((n_rows, 1), dtype=int), order + 1])
+    contributions = np.hstack([np.full((n_rows, 1), shap_base_value, dtype=float),
+                               np.take_along_axis(shap_values, order, axis=1)])
+    values = np.hstack([np.full((n_rows, 1), '-', dtype=object), X.values])
+    values = np.take_along_axis(values, col_pos, axis=1)
+    col_names = np.array(['base_value'] + X.columns.tolist(), dtype=object)[col_pos]
 
     # add cumulative contribution from top to bottom (for making graph):
-    contrib_df['cumulative'] = contrib_df.contribution.cumsum()
+    cumulative = contributions.cumsum(axis=1)
 
-    # if a cutoff is given for minimum contribution to be displayed, calculate what topx rows to return:
+    # number of contributions to show per row, the remainder goes under 'REST':
+    n_show = np.full(n_rows, n_cols + 1)
     if cutoff is not None:
-        cutoff = contrib_df.contribution[np.abs(contrib_df.contribution) >= cutoff].index.max()+1
-        if topx is not None and cutoff < topx:
-            topx = cutoff
-
-    # if only returning topx columns, sum the remainder contributions under 'REST'
+        above_cutoff = np.abs(contributions) >= cutoff
+        last_above = n_cols - np.argmax(above_cutoff[:, ::-1], axis=1)
+        n_show = np.where(above_cutoff.any(axis=1), last_above + 1, 1)
     if topx is not None:
-        if topx > len(contrib_df): topx = len(contrib_df)
-        old_cum = contrib_df.iloc[[topx - 1]].cumulative.item()
-        tot_cum = contrib_df.iloc[[-1]].cumulative.item()
-        diff = tot_cum-old_cum
-
-        rest_df = pd.DataFrame(
-            {
-                'col': ['REST'], 
-                'contribution': [diff], 
-                'value': ['-'], 
-                'cumulative': [tot_cum]
-            })
-
-        contrib_df = pd.concat([contrib_df.head(topx), rest_df], axis=0).reset_index(drop=True)
+        n_show = np.minimum(n_show, topx)
+
+    positions = np.tile(np.arange(n_cols + 1), (n_rows, 1))
+    show = positions < n_show[:, None]
+    contrib_dfs = pd.DataFrame({
+        'index': np.repeat(indexes, show.sum(axis=1)),
+        'col': col_names[show],
+        'contribution': contributions[show],
+        'value': values[show],
+        'cumulative': cumulative[show],
+        'position': positions[show],
+    })
+
+    if topx is not None or cutoff is not None:
+        tot_cum = cumulative[:, -1]
+        rest_df = pd.DataFrame({
+            'index': indexes,
+            'col': 'REST',
+            'contribution': tot_cum - cumulative[np.arange(n_rows), n_show - 1],
+            'value': '-',
+            'cumulative': tot_cum,
+            'position': n_show,
+        })
+        contrib_dfs = (pd.concat([contrib_dfs, rest_df], ignore_index=True)
+                        .iloc[np.lexsort((
+                            np.append(positions[show], n_show),
+                            np.append(np.repeat(np.arange(n_rows), show.sum(axis=1)), 
+                                      np.arange(n_rows))))])
 
     # add the cumulative before the current variable (i.e. the base of the
     # bar in the graph):
-    contrib_df['base']= contrib_df['cumulative'] - contrib_df['contribution']
-    return contrib_df
+    contrib_dfs['base'] = contrib_dfs['cumulative'] - contrib_dfs['contribution']
+    return contrib_dfs.drop('position', axis=1).reset_index(drop=True)
+
+
+def get_long_contrib_df(shap_base_value, shap_values, X, cats=None, 
+                        row_ids=None, name_ids=None, round=None, lang='en'):
+    """
+    Returns the contributions of every feature for every row of X in long 
+    format: per row a base_value row followed by a row for every feature, 
+    ordered by absolute contribution. The per row ranking is done with a single
+    argsort over the whole shap_values matrix. Used for exporting contributions
+    with get_dfs(), see formatted_contrib_df() for the format.
+
+    :param shap_base_value: shap base value
+    :type shap_base_value: float
+    :param shap_values: shap values of the rows of X
+    :type shap_values: np.ndarray(N,M)
+    :param X: features
+    :type X: pd.DataFrame(N,M)
+    :param cats: categorical features (whose values are not numeric), 
+        defaults to None
+    :type cats: list, optional
+    :param row_ids: row_id for every row of X, defaults to None (0..N-1)
+    :type row_ids: array-like, optional
+    :param name_ids: name_id for every row of X, defaults to None (row_ids)
+    :type name_ids: array-like, optional
+    :param round: rounding of continuous features, defaults to None
+    :type round: int, optional
+    :param lang: language of the column names ('en' or 'nl'), defaults to 'en'
+    :type lang: str, optional
+    :return: long_contrib_df
+    :rtype: pd.DataFrame
+    """
+    shap_values = np.asarray(shap_values)
+    n_rows, n_cols = shap_values.shape
+    row_ids = np.arange(n_rows) if row_ids is None else np.asarray(row_ids)
+    name_ids = row_ids if name_ids is None else np.asarray(name_ids)
+
+    # feature order per row, shifted by one to put base_value at position 0:
+    order = np.argsort(-np.abs(shap_values), axis=1, kind='stable')
+    col_pos = np.hstack([np.zeros((n_rows, 1), dtype=int), order + 1])
+
+    contributions = np.hstack([np.full((n_rows, 1), shap_base_value, dtype=float),
+                               np.take_along_axis(shap_values, order, axis=1)]).ravel()
+    values = np.hstack([np.full((n_rows, 1), np.nan, dtype=object),
+                        X.values])
+    values = np.take_along_axis(values, col_pos, axis=1).ravel()
+
+    col_names = np.array(['base_value'] + X.columns.tolist(), dtype=object)
+    col_is_cat = np.isin(col_names, [] if cats is None else cats)
+    is_cat = col_is_cat[col_pos].ravel()
+    is_cont = ~is_cat & (col_pos.ravel() > 0)
+
+    cat_values = np.where(is_cat, values, np.nan)
+    cont_values = np.full(len(values), np.nan)
+    cont_values[is_cont] = values[is_cont].astype(float)
+    if round is not None:
+        values = np.where(is_cat, cat_values, np.round(cont_values, round))
+
+    long_contrib_df = pd.DataFrame({
+        'row_id': np.repeat(row_ids, n_cols + 1),
+        'name_id': np.repeat(name_ids, n_cols + 1),
+        'SHAP': contributions,
+        'ABS_SHAP': np.abs(contributions),
+        'Feature': col_names[col_pos].ravel(),
+        'Value': values,
+        'Cat_Value': cat_values,
+        'Cont_Value': cont_values,
+        'Value_Type': np.where(is_cat, 'cat', 'cont'),
+        'Feature_Order': np.tile(np.arange(n_cols + 1), n_rows),
+    })
+    if lang == 'nl':
+        long_contrib_df.columns = ['row_id', 'name_id', 'SHAP', 'ABS_SHAP', 'Variabele', 'Waarde',
+                            'Cat_Waarde', 'Cont_Waarde', 'Waarde_Type', 'Variabele_Volgorde']
+    return long_contrib_df
 
 
 def get_contrib_summary_df(contrib_df, classification=False, round=2):
@@ -484,31 +986,24 @@ def get_contrib_summary_df(contrib_df, classification=False, round=2):
     returns a DataFrame that summarizes a contrib_df as a pair of
     Reasons+Effect.
     """
-    contrib_summary_df = pd.DataFrame(columns=['Reason', 'Effect'])
-
-    for _, row in contrib_df.iterrows():
-        if row['col'] == 'base_value':
-            reason = 'BASE VALUE'
-        else:
-            reason = f"{row['col']} = {row['value']}"
-        effect = f"{'+' if row['contribution'] >= 0 else ''}"
-        if classification:
-            effect += str(np.round(100*row['contribution'], round))+'%'
-        else:
-            effect +=  str(np.round(row['contribution'], round))
+    contrib_df = contrib_df.reset_index(drop=True)
+    contribution = contrib_df['contribution'].astype(float)
+    reason = contrib_df['col'].astype(str) + ' = ' + contrib_df['value'].astype(str)
+    reason = reason.where(contrib_df['col'] != 'base_value', 'BASE VALUE')
+    effect = pd.Series(np.where(contribution >= 0, '+', ''), dtype=object)
+    if classification:
+        effect += np.round(100*contribution, round).astype(str) + '%'
+    else:
+        effect += np.round(contribution, round).astype(str)
 
-        contrib_summary_df = contrib_summary_df.append(
-            pd.DataFrame({
-                'Reason': [reason],
-                'Effect': [effect]
-            }))
-    return contrib_summary_df.reset_index(drop=True)
+    return pd.DataFrame({'Reason': reason, 'Effect': effect}, columns=['Reason', 'Effect'])
 
 
 
 
 
-def normalize_shap_interaction_values(shap_interaction_values, shap_values=None):
+def normalize_shap_interaction_values(shap_interaction_values, shap_values=None,
+                                        inplace=False):
     """
     Normalizes shap_interaction_values to make sure that the rows add up to
     the shap_values.
@@ -520,8 +1015,11 @@ def normalize_shap_interaction_values(shap_interaction_values, shap_values=None)
     Opened an issue here: https://github.com/slundberg/shap/issues/723
 
     (so far doesn't seem to be fixed)
+
+    If inplace=True the diagonals of shap_interaction_values get overwritten
+    instead of a normalized copy being returned.
     """
-    siv = shap_interaction_values.copy()
+    siv = shap_interaction_values if inplace else shap_interaction_values.copy()
 
     orig_diags = np.einsum('ijj->ij', siv)
     row_sums = np.einsum('ijk->ij', siv)
@@ -543,67 +1041,180 @@ def normalize_shap_interaction_values(shap_interaction_values, shap_values=None)
     return siv
 
 
-def get_decision_trees(rf_model, X, y):
+def blockwise_shap_interaction_values(shap_explainer, X, shap_values=None,
+                                        block_size=1000, dtype=None, memmap_path=None,
+                                        add_negative_class=False):
+    """
+    Calculates shap interaction values for X in blocks of block_size rows. 
+    Each block gets normalized in place (if shap_values are given) and written
+    into a preallocated output array, so that peak memory is bounded by a 
+    single block plus the result.
+
+    :param shap_explainer: a shap explainer with a .shap_interaction_values() method
+    :param X: pd.DataFrame with model features
+    :param shap_values: if given, normalize the interaction values so that they
+        add up to shap_values (see normalize_shap_interaction_values()). Should
+        be a list with an np.array per class if shap_explainer returns a list
+        of interaction values, defaults to None
+    :param block_size: number of rows per block, defaults to 1000
+    :type block_size: int, optional
+    :param dtype: dtype of the output array, e.g. np.float32 to halve the 
+        memory footprint, defaults to None (float64)
+    :param memmap_path: if given, the output gets written to a memory mapped 
+        .npy file at memmap_path (with suffix _0, _1, etc for every class 
+        in case of multiple outputs), defaults to None
+    :type memmap_path: str or Path, optional
+    :param add_negative_class: if shap_explainer only returns the interaction 
+        values for the positive class of a binary classifier, also calculate
+        those of the negative class (1-siv) block by block, and return a list
+        [negative, positive]. shap_values should then be a list with the 
+        shap values of both classes, defaults to False
+    :type add_negative_class: bool, optional
+    :return: shap_interaction_values, either an np.array or a list of np.array
     """
-    Returns a list of ShadowDecTree from the dtreeviz package
+    dtype = np.float64 if dtype is None else dtype
+    shape = (len(X), len(X.columns), len(X.columns))
+    if memmap_path is not None:
+        memmap_path = Path(memmap_path)
+        memmap_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def output_array(path):
+        if path is None:
+            return np.empty(shape, dtype=dtype)
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+    siv, multi_output = None, False
+    n_blocks = int(np.ceil(len(X) / block_size))
+    for i, start in enumerate(range(0, len(X), block_size)):
+        print(f"Calculating shap interaction values for block {i+1} of {n_blocks}...")
+        stop = min(start+block_size, len(X))
+        block_siv = shap_explainer.shap_interaction_values(X.iloc[start:stop])
+        if add_negative_class and not isinstance(block_siv, list):
+            block_siv = [1-block_siv, block_siv]
+
+        if siv is None:
+            multi_output = isinstance(block_siv, list)
+            if multi_output and memmap_path is not None:
+                siv = [output_array(memmap_path.with_name(
+                            f"{memmap_path.stem}_{j}{memmap_path.suffix}"))
+                                for j in range(len(block_siv))]
+            elif multi_output:
+                siv = [output_array(None) for _ in block_siv]
+            else:
+                siv = output_array(memmap_path)
+
+        if multi_output:
+            for j, class_siv in enumerate(block_siv):
+                if shap_values is not None:
+                    normalize_shap_interaction_values(
+                        class_siv, shap_values[j][start:stop], inplace=True)
+                siv[j][start:stop] = class_siv
+        else:
+            if shap_values is not None:
+                normalize_shap_interaction_values(
+                    block_siv, shap_values[start:stop], inplace=True)
+            siv[start:stop] = block_siv
+    return siv
+
 
+def get_decision_trees(rf_model, X=None, y=None):
+    """
+    Returns the list of fitted sklearn DecisionTrees that make up rf_model. 
+    The decision paths get read directly from their tree_ arrays, 
+    see get_decisiontree_df(). (X and y are not needed anymore and ignored)
     """
     assert hasattr(rf_model, 'estimators_'), \
         """The model does not have an estimators_ attribute, so probably not
         actually a sklearn compatible random forest?"""
-    decision_trees = [ShadowDecTree(decision_tree,
-                                  X,
-                                  y,
-                                  feature_names=X.columns.tolist(),
-                                  class_names = ['Neg', 'Pos'])
-                        for decision_tree in rf_model.estimators_]
-    return decision_trees
+    return list(rf_model.estimators_)
 
 
-def get_decisiontree_df(decision_tree, observation, pos_label=1):
-    _, nodes = decision_tree.predict(observation)
-
-    decisiontree_df = pd.DataFrame(columns=['node_id', 'average', 'feature',
-                                     'value', 'split', 'direction',
-                                     'left', 'right', 'diff'])
-    if decision_tree.isclassifier()[0]:
-        def node_pred_proba(node):
-            return node.class_counts()[pos_label]/ sum(node.class_counts())
-        for node in nodes:
-            if not node.isleaf():
-                decisiontree_df = decisiontree_df.append({
-                    'node_id' : node.id,
-                    'average' : node_pred_proba(node),
-                    'feature' : node.feature_name(),
-                    'value' : observation[node.feature_name()],
-                    'split' : node.split(),
-                    'direction' : 'left' if observation[node.feature_name()] < node.split() else 'right',
-                    'left' : node_pred_proba(node.left),
-                    'right' : node_pred_proba(node.right),
-                    'diff' : node_pred_proba(node.left) - node_pred_proba(node) \
-                                if observation[node.feature_name()] < node.split() \
-                                else node_pred_proba(node.right) - node_pred_proba(node)
-                }, ignore_index=True)
+def get_leaf_value_table(rf_model):
+    """
+    Returns an np.ndarray(n_trees, max_n_nodes, n_outputs) with the prediction
+    of every node of every tree in rf_model: the class fractions for 
+    classifiers (n_outputs=n_classes) or the mean for regressors (n_outputs=1).
+    Trees with fewer nodes are padded with nan.
+    """
+    assert hasattr(rf_model, 'estimators_'), \
+        """The model does not have an estimators_ attribute, so probably not
+        actually a sklearn compatible random forest?"""
+    trees = [estimator.tree_ for estimator in rf_model.estimators_]
+    leaf_value_table = np.full((len(trees), max(tree.node_count for tree in trees), 
+                                trees[0].value.shape[2]), np.nan)
+    for i, tree in enumerate(trees):
+        values = tree.value[:, 0, :]
+        if tree.n_classes[0] > 1:
+            values = values / values.sum(axis=1, keepdims=True)
+        leaf_value_table[i, :tree.node_count] = values
+    return leaf_value_table
+
+
+def get_tree_predictions(rf_model, X, leaf_value_table=None):
+    """
+    Returns the predictions of every individual tree of rf_model for every 
+    row of X as an np.ndarray(n_rows, n_trees, n_outputs), computed in a single 
+    pass: the leaf indices of all trees come from rf_model.apply(X) and get
+    looked up in leaf_value_table (see get_leaf_value_table).
+
+    :param rf_model: fitted sklearn RandomForestClassifier or RandomForestRegressor
+    :param X: rows to predict
+    :type X: pd.DataFrame
+    :param leaf_value_table: precalculated get_leaf_value_table(rf_model), 
+        defaults to None (calculate)
+    :type leaf_value_table: np.ndarray, optional
+    :return: tree_predictions
+    :rtype: np.ndarray(n_rows, n_trees, n_outputs)
+    """
+    if leaf_value_table is None:
+        leaf_value_table = get_leaf_value_table(rf_model)
+    leaves = rf_model.apply(X)
+    return leaf_value_table[np.arange(leaves.shape[1]), leaves]
 
+
+def get_decisiontree_df(decision_tree, observation, pos_label=1):
+    """
+    Returns a DataFrame with a row for every decision node that observation 
+    passes through in decision_tree, with the average prediction at the node,
+    the feature, the value of observation, the split, the direction taken,
+    the average prediction of the left and right child nodes and the 
+    difference in average prediction after taking the split.
+
+    The path gets found with decision_tree.decision_path() and all node 
+    properties get read directly from the decision_tree.tree_ arrays.
+
+    :param decision_tree: fitted sklearn DecisionTreeClassifier or DecisionTreeRegressor
+    :param observation: single row of features, e.g. X.iloc[index]
+    :type observation: pd.Series
+    :param pos_label: class for which to return the average predictions
+        (only for classifiers), defaults to 1
+    :type pos_label: int, optional
+    :return: decisiontree_df
+    :rtype: pd.DataFrame
+    """
+    tree = decision_tree.tree_
+    if tree.n_classes[0] > 1: # classifier: fraction of pos_label at each node 
+        node_values = tree.value[:, 0, pos_label] / tree.value[:, 0, :].sum(axis=1)
     else:
-        def node_mean(node):
-            return decision_tree.tree_model.tree_.value[node.id].item()
-        for node in nodes:
-            if not node.isleaf():
-                decisiontree_df = decisiontree_df.append({
-                    'node_id' : node.id,
-                    'average' : node_mean(node),
-                    'feature' : node.feature_name(),
-                    'value' : observation[node.feature_name()],
-                    'split' : node.split(),
-                    'direction' : 'left' if observation[node.feature_name()] < node.split() else 'right',
-                    'left' : node_mean(node.left),
-                    'right' : node_mean(node.right),
-                    'diff' : node_mean(node.left) - node_mean(node) \
-                                if observation[node.feature_name()] < node.split() \
-                                else node_mean(node.right) - node_mean(node)
-                }, ignore_index=True)
-    return decisiontree_df
+        node_values = tree.value[:, 0, 0]
+
+    path = np.sort(decision_tree.decision_path(observation.values.reshape(1, -1)).indices)
+    nodes, next_nodes = path[:-1], path[1:] # the last node of the path is the leaf
+    features = tree.feature[nodes]
+    went_left = tree.children_left[nodes] == next_nodes
+
+    return pd.DataFrame({
+        'node_id' : nodes,
+        'average' : node_values[nodes],
+        'feature' : observation.index[features],
+        'value' : observation.values[features],
+        'split' : tree.threshold[nodes],
+        'direction' : np.where(went_left, 'left', 'right'),
+        'left' : node_values[tree.children_left[nodes]],
+        'right' : node_values[tree.children_right[nodes]],
+        'diff' : node_values[next_nodes] - node_values[nodes],
+    }, columns=['node_id', 'average', 'feature', 'value', 'split', 
+                    'direction', 'left', 'right', 'diff'])
 
 
 def decisiontree_df_summary(decisiontree_df, classifier=False, round=2):
@@ -617,22 +1228,19 @@ def decisiontree_df_summary(decisiontree_df, classifier=False, round=2):
                                 + decisiontree_df.iloc[[-1]]['diff'].item(), round)
 
 
-    decisiontree_summary_df = pd.DataFrame(columns=['value', 'condition', 'change', 'prediction'])
-
-    for _, row in decisiontree_df.iterrows():
-        if classifier:
-            decisiontree_summary_df = decisiontree_summary_df.append({
-                            'value' : (str(row['feature'])+'='+str(row['value'])).ljust(50),
-                            'condition' : str('>=' if row['direction'] == 'right' else '< ') + str(row['split']).ljust(10),
-                            'change' : str('+' if row['diff'] >= 0 else '') + str(np.round(100*row['diff'], round)) +'%',
-                            'prediction' : str(np.round(100*(row['average']+row['diff']), round)) + '%'
-                        }, ignore_index=True)
-        else:
-            decisiontree_summary_df = decisiontree_summary_df.append({
-                            'value' : (str(row['feature'])+'='+str(row['value'])).ljust(50),
-                            'condition' : str('>=' if row['direction'] == 'right' else '< ') + str(row['split']).ljust(10),
-                            'change' : str('+' if row['diff'] >= 0 else '') + str(np.round(row['diff'], round)),
-                            'prediction' : str(np.round((row['average']+row['diff']), round))
-                        }, ignore_index=True)
+    decisiontree_df = decisiontree_df.reset_index(drop=True)
+    diff = decisiontree_df['diff'].astype(float)
+    average = decisiontree_df['average'].astype(float)
+    multiplier, unit = (100, '%') if classifier else (1, '')
+
+    decisiontree_summary_df = pd.DataFrame({
+        'value' : (decisiontree_df['feature'].astype(str) + '=' 
+                        + decisiontree_df['value'].astype(str)).str.ljust(50),
+        'condition' : np.where(decisiontree_df['direction'] == 'right', '> ', '<=') 
+                        + decisiontree_df['split'].astype(str).str.ljust(10),
+        'change' : np.where(diff >= 0, '+', '') 
+                        + np.round(multiplier*diff, round).astype(str) + unit,
+        'prediction' : np.round(multiplier*(average+diff), round).astype(str) + unit,
+    }, columns=['value', 'condition', 'change', 'prediction'])
 
     return base_value, prediction, decisiontree_summary_df
\ No newline at end of file
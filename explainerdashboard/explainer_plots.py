@@ -5,9 +5,9 @@ from pandas.api.types import is_numeric_dtype, is_string_dtype
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
 
-from sklearn.metrics import (classification_report, confusion_matrix,
-                             precision_recall_curve, roc_curve, 
-                             roc_auc_score, average_precision_score)
+from sklearn.metrics import confusion_matrix
+
+from .explainer_methods import get_tree_predictions
 
 
 def plotly_contribution_plot(contrib_df, target="target", 
@@ -392,8 +392,9 @@ def plotly_lift_curve(lift_curve_df, cutoff=None, percentage=False, round=2):
 
 
 def plotly_cumulative_precision_plot(lift_curve_df, labels=None, pos_label=1):
+    n_classes = len([col for col in lift_curve_df.columns if col.startswith('precision_')])
     if labels is None:
-        labels = ['category ' + str(i) for i in range(lift_curve_df.y.max()+1)]
+        labels = ['category ' + str(i) for i in range(n_classes)]
     fig = go.Figure()
     text = [f"percentage sampled = top {round(idx_perc,2)}%"
                 for idx_perc in lift_curve_df['index_percentage'].values]
@@ -413,7 +414,7 @@ def plotly_cumulative_precision_plot(lift_curve_df, labels=None, pos_label=1):
                                    hoverinfo="text")) 
 
     cumulative_y = lift_curve_df['precision_' +str(pos_label)].values
-    for y_label in range(pos_label, lift_curve_df.y.max()+1):
+    for y_label in range(pos_label, n_classes):
         
         if y_label != pos_label:
             cumulative_y = cumulative_y + lift_curve_df['precision_' +str(y_label)].values
@@ -450,38 +451,66 @@ def plotly_cumulative_precision_plot(lift_curve_df, labels=None, pos_label=1):
 
 
 def plotly_dependence_plot(X, shap_values, col_name, interact_col_name=None, 
-                            highlight_idx=None, interaction=False, na_fill=-999, round=2):
+                            highlight_idx=None, interaction=False, na_fill=-999, round=2,
+                            webgl_threshold=5000, density_threshold=100000):
     """
     Returns a partial dependence plot based on shap values.
 
     Observations are colored according to the values in column interact_col_name
+
+    :param webgl_threshold: above this number of rows plot with WebGL 
+        (go.Scattergl) instead of SVG, defaults to 5000
+    :type webgl_threshold: int, optional
+    :param density_threshold: above this number of rows plot the density of 
+        observations as a heatmap of 50x50 bins instead of individual observations 
+        (not colored by interact_col_name), defaults to 100000. The binning
+        happens here, so the size of the figure does not grow with the number
+        of rows. Set to None to always plot individual observations.
+    :type density_threshold: int, optional
     """
     assert col_name in X.columns.tolist(), f'{col_name} not in X.columns'
     assert (interact_col_name is None and not interaction) or interact_col_name in X.columns.tolist(),\
             f'{interact_col_name} not in X.columns'
     
-    x = X[col_name].replace({-999:np.nan})
+    x = X[col_name].replace({na_fill:np.nan}).values
     if len(shap_values.shape)==2:
-        y = shap_values[:, X.columns.get_loc(col_name)]
+        y = np.asarray(shap_values[:, X.columns.get_loc(col_name)])
     elif len(shap_values.shape)==3 and interact_col_name is not None:
-        y = shap_values[:, X.columns.get_loc(col_name), X.columns.get_loc(interact_col_name)]
+        y = np.asarray(shap_values[:, X.columns.get_loc(col_name), X.columns.get_loc(interact_col_name)])
     else:
         raise Exception('Either provide shap_values or shap_interaction_values with an interact_col_name')
-    
+
+    Scatter = go.Scattergl if len(X) > webgl_threshold else go.Scatter
+    # hover texts get filled in by plotly from x, y and customdata:
+    hovertemplate = f"{col_name}=%{{x}}<br>SHAP=%{{y:.{round}f}}<extra></extra>"
     if interact_col_name is not None:
-        text = np.array([f'{col_name}={col_val}<br>{interact_col_name}={col_col_val}<br>SHAP={shap_val}' 
-                    for col_val, col_col_val, shap_val in zip(x, X[interact_col_name], np.round(y, round))])
-    else:
-        text = np.array([f'{col_name}={col_val}<br>SHAP={shap_val}' 
-                    for col_val, shap_val in zip(x, np.round(y, round))])  
+        hovertemplate = (f"{col_name}=%{{x}}<br>{interact_col_name}=%{{customdata}}"
+                         f"<br>SHAP=%{{y:.{round}f}}<extra></extra>")
         
     data = []
     
-    if interact_col_name is not None and is_string_dtype(X[interact_col_name]):
+    if density_threshold is not None and len(X) > density_threshold:
+        # nullable (Int64, Float64) columns do not support np.isfinite:
+        x_num = pd.to_numeric(X[col_name].replace({na_fill:np.nan}), errors='coerce')\
+                    .to_numpy(dtype=float, na_value=np.nan)
+        finite = np.isfinite(x_num) & np.isfinite(y)
+        counts, x_edges, y_edges = np.histogram2d(x_num[finite], y[finite], bins=50)
+        data.append(go.Heatmap(
+                        x=np.round((x_edges[:-1] + x_edges[1:]) / 2, round), 
+                        y=np.round((y_edges[:-1] + y_edges[1:]) / 2, round),
+                        # empty bins stay transparent:
+                        z=np.where(counts > 0, counts, np.nan).T,
+                        colorscale='Blues',
+                        showscale=False,
+                        hovertemplate=f"{col_name}=%{{x}}<br>SHAP=%{{y}}<br>count=%{{z}}<extra></extra>",
+                ))
+    elif interact_col_name is not None and is_string_dtype(X[interact_col_name]):
+        interact_values = X[interact_col_name].values
         for onehot_col in X[interact_col_name].unique().tolist():
-                data.append(go.Scatter(
-                                x=X[X[interact_col_name]==onehot_col][col_name].replace({-999:np.nan}),
-                                y=shap_values[X[interact_col_name]==onehot_col, X.columns.get_loc(col_name)],
+                mask = interact_values == onehot_col
+                data.append(Scatter(
+                                x=x[mask],
+                                y=y[mask],
                                 mode='markers',
                                 marker=dict(
                                       size=7,
@@ -491,48 +520,45 @@ def plotly_dependence_plot(X, shap_values, col_name, interact_col_name=None,
                                 
                                 showlegend=True,
                                 opacity=0.8,
-                                hoverinfo="text",
                                 name=onehot_col,
-                                text=[f'{col_name}={col_val}<br>{interact_col_name}={col_col_val}<br>SHAP={shap_val}' 
-                                        for col_val, col_col_val, shap_val in zip(
-                                            X[X[interact_col_name]==onehot_col][col_name], 
-                                            X[X[interact_col_name]==onehot_col][interact_col_name], 
-                                            np.round(shap_values[X[interact_col_name]==onehot_col, X.columns.get_loc(col_name)], round))],
+                                hovertemplate=(f"{col_name}=%{{x}}<br>{interact_col_name}={onehot_col}"
+                                               f"<br>SHAP=%{{y:.{round}f}}<extra></extra>"),
                                 ))
                 
     elif interact_col_name is not None and is_numeric_dtype(X[interact_col_name]):
-        data.append(go.Scatter(
-                        x=x[X[interact_col_name]!=na_fill],
-                        y=y[X[interact_col_name]!=na_fill], 
+        interact_values = X[interact_col_name].values
+        not_na = interact_values != na_fill
+        data.append(Scatter(
+                        x=x[not_na],
+                        y=y[not_na], 
                         mode='markers',
-                        text=text[X[interact_col_name]!=na_fill],
-                        hoverinfo="text",
+                        customdata=interact_values[not_na],
+                        hovertemplate=hovertemplate,
                         marker=dict(size=7, 
                                     opacity=0.6,
-                                    color=X[interact_col_name][X[interact_col_name]!=na_fill],
+                                    color=interact_values[not_na],
                                     colorscale='Bluered',
                                     colorbar=dict(
                                         title=interact_col_name
                                         ),
                                     showscale=True),    
                 ))
-        data.append(go.Scatter(
-                        x=x[X[interact_col_name]==na_fill],
-                        y=y[X[interact_col_name]==na_fill], 
+        data.append(Scatter(
+                        x=x[~not_na],
+                        y=y[~not_na], 
                         mode='markers',
-                        text=text[X[interact_col_name]==na_fill],
-                        hoverinfo="text",
+                        customdata=interact_values[~not_na],
+                        hovertemplate=hovertemplate,
                         marker=dict(size=7, 
                                     opacity=0.35,
                                     color='grey'),
                 ))
     else:
-        data.append(go.Scatter(
+        data.append(Scatter(
                         x=x, 
                         y=y, 
                         mode='markers',
-                        text=text,
-                        hoverinfo="text",
+                        hovertemplate=hovertemplate,
                         marker=dict(size=7, 
                                     opacity=0.6)  ,                    
                 ))
@@ -556,7 +582,7 @@ def plotly_dependence_plot(X, shap_values, col_name, interact_col_name=None,
     if interact_col_name is not None and is_string_dtype(X[interact_col_name]):
         fig.update_layout(showlegend=True)
                                                       
-    if isinstance(highlight_idx, int) and highlight_idx > 0 and highlight_idx < len(x):
+    if isinstance(highlight_idx, (int, np.integer)) and highlight_idx >= 0 and highlight_idx < len(x):
         fig.add_trace(go.Scatter(
                 x=[x[highlight_idx]], 
                 y=[y[highlight_idx]], 
@@ -844,10 +870,14 @@ def plotly_importances_plot(importance_df, descriptions=None, round=3):
     return fig
 
 
-def plotly_tree_predictions(model, observation, highlight_tree=None, round=2, pos_label=1):
+def plotly_tree_predictions(model, observation, highlight_tree=None, round=2, pos_label=1,
+                            predictions=None):
     """
     returns a plot with all the individual predictions of the 
-    DecisionTrees that make up the RandomForest.
+    DecisionTrees that make up the RandomForest. Either calculated from 
+    model and observation, or from precalculated predictions of each tree
+    (pos_label probabilities for classifiers), in which case 
+    observation is ignored.
     """
     assert (str(type(model)).endswith("RandomForestClassifier'>") 
             or str(type(model)).endswith("RandomForestRegressor'>")), \
@@ -858,28 +888,19 @@ def plotly_tree_predictions(model, observation, highlight_tree=None, round=2, po
         assert highlight_tree >= 0 and highlight_tree <= len(model.estimators_), \
             f"{highlight_tree} is out of range (0, {len(model.estimators_)})"
         colors[highlight_tree] = 'red'
-        
-    if model.estimators_[0].classes_[0] is not None: #if classifier
-        preds_df = (
-            pd.DataFrame({
-                'model' : range(len(model.estimators_)), 
-                'prediction' : [
-                        np.round(100*m.predict_proba(observation)[0, pos_label], round) 
-                                    for m in model.estimators_],
-                'color' : colors
-            })
-            .sort_values('prediction')\
-            .reset_index(drop=True))
-    else:
-        preds_df = (
-            pd.DataFrame({
-                'model' : range(len(model.estimators_)), 
-                'prediction' : [np.round(m.predict(observation)[0] , round)
-                                    for m in model.estimators_],
-                'color' : colors
-            })
-            .sort_values('prediction')\
-            .reset_index(drop=True))
+
+    is_classifier = hasattr(model, 'classes_')
+    if predictions is None:
+        predictions = get_tree_predictions(model, observation)[0, :, 
+                                            pos_label if is_classifier else 0]
+    preds_df = (
+        pd.DataFrame({
+            'model' : range(len(model.estimators_)), 
+            'prediction' : np.round(100*predictions if is_classifier else predictions, round),
+            'color' : colors
+        })
+        .sort_values('prediction')\
+        .reset_index(drop=True))
       
     trace0 = go.Bar(x=preds_df.index, 
                     y=preds_df.prediction, 
@@ -917,18 +938,23 @@ def plotly_tree_predictions(model, observation, highlight_tree=None, round=2, po
 
 
 
-def plotly_confusion_matrix(y_true, y_preds, labels = None, normalized=True):
-
-    cm = confusion_matrix(y_true, y_preds)
+def plotly_confusion_matrix(y_true, y_preds, labels = None, normalized=True, cm=None):
+    """
+    Returns a confusion matrix heatmap. Either calculated from y_true and 
+    y_preds, or from precalculated confusion matrix counts cm (in the format of 
+    sklearn.metrics.confusion_matrix), in which case y_true and y_preds are ignored.
+    """
+    if cm is None:
+        cm = confusion_matrix(y_true, y_preds)
+    cm = np.asarray(cm)
 
     if labels is None:
         labels = [str(i) for i in range(cm.shape[0])] 
 
+    zmax = cm.sum()
     if normalized:
         cm = np.round(100*cm / cm.sum(),1)
         zmax = 100
-    else:
-        zmax = len(y_true)
         
     data=[go.Heatmap(
                         z=cm,
@@ -964,14 +990,29 @@ def plotly_confusion_matrix(y_true, y_preds, labels = None, normalized=True):
     return fig
 
 
-def plotly_roc_auc_curve(true_y, pred_probas, cutoff=None):
-    fpr, tpr, thresholds = roc_curve(true_y, pred_probas)
-    roc_auc = roc_auc_score(true_y, pred_probas)
+def plotly_roc_auc_curve(roc_curve_df, roc_auc, cutoff=None, cutoff_metrics=None):
+    """
+    Returns ROC AUC curve, with the TPR and FPR of cutoff in crosshairs. 
+
+    :param roc_curve_df: generated with get_roc_curve_df()
+    :type roc_curve_df: pd.DataFrame
+    :param roc_auc: roc auc score
+    :type roc_auc: float
+    :param cutoff: cutoff to display, defaults to None
+    :type cutoff: float, optional
+    :param cutoff_metrics: dict with 'accuracy', 'precision', 'recall' ( = tpr), 
+        'f1' and 'fpr' for pred_probas >= cutoff, e.g. generated with 
+        get_cutoff_metrics(). If not given the crosshairs get interpolated 
+        from roc_curve_df and no metrics are displayed. Defaults to None.
+    :type cutoff_metrics: dict, optional
+    """
+    fpr, tpr = roc_curve_df.fpr.values, roc_curve_df.tpr.values
     trace0 = go.Scatter(x=fpr, y=tpr,
                     mode='lines',
                     name='ROC AUC CURVE',
-                    text=[f"threshold: {np.round(th,2)} <br> FP: {np.round(fp,2)} <br> TP: {np.round(tp,2)}" 
-                              for fp, tp, th in zip(fpr, tpr, thresholds)],
+                    text=("threshold: " + roc_curve_df.threshold.round(2).astype(str) 
+                            + " <br> FP: " + roc_curve_df.fpr.round(2).astype(str) 
+                            + " <br> TP: " + roc_curve_df.tpr.round(2).astype(str)).tolist(),
                     hoverinfo="text"
                 )
     data = [trace0]
@@ -999,59 +1040,77 @@ def plotly_roc_auc_curve(true_y, pred_probas, cutoff=None):
                             )]
     
     if cutoff is not None:
-        threshold_idx = np.argmin(np.abs(thresholds-cutoff))
+        if cutoff_metrics is not None:
+            cutoff_tpr, cutoff_fpr = cutoff_metrics['recall'], cutoff_metrics['fpr']
+        else:
+            # thresholds are descending:
+            thresholds = roc_curve_df.threshold.values[::-1]
+            cutoff_tpr = np.interp(cutoff, thresholds, tpr[::-1])
+            cutoff_fpr = np.interp(cutoff, thresholds, fpr[::-1])
         shapes.append(
             dict(type='line', xref='x', yref='y',
-                x0=0, x1=1, y0=tpr[threshold_idx], y1=tpr[threshold_idx],
+                x0=0, x1=1, y0=cutoff_tpr, y1=cutoff_tpr,
                 line=dict(color="lightslategray",width=1)))
         shapes.append(
             dict(type='line', xref='x', yref='y',
-                 x0=fpr[threshold_idx], x1=fpr[threshold_idx], y0=0, y1=1,
+                 x0=cutoff_fpr, x1=cutoff_fpr, y0=0, y1=1,
                  line=dict(color="lightslategray", width=1)))
         
-        rep = classification_report(true_y, np.where(pred_probas >= cutoff, 1,0), 
-                                    output_dict=True)
-        
         annotations = [go.layout.Annotation(x=0.6, y=0.45, 
                             text=f"Cutoff: {np.round(cutoff,3)}",
                             showarrow=False, align="right", 
-                            xanchor='left', yanchor='top'),
+                            xanchor='left', yanchor='top')]
+        if cutoff_metrics is not None:
+            annotations += [
                        go.layout.Annotation(x=0.6, y=0.4, 
-                            text=f"Accuracy: {np.round(rep['accuracy'],3)}",
+                            text=f"Accuracy: {np.round(cutoff_metrics['accuracy'],3)}",
                             showarrow=False, align="right", 
                             xanchor='left', yanchor='top'),
                        go.layout.Annotation(x=0.6, y=0.35, 
-                            text=f"Precision: {np.round(rep['1']['precision'], 3)}",
+                            text=f"Precision: {np.round(cutoff_metrics['precision'], 3)}",
                             showarrow=False, align="right", 
                             xanchor='left', yanchor='top'),
                        go.layout.Annotation(x=0.6, y=0.30, 
-                            text=f"Recall: {np.round(rep['1']['recall'], 3)}",
+                            text=f"Recall: {np.round(cutoff_metrics['recall'], 3)}",
                             showarrow=False, align="right", 
                             xanchor='left', yanchor='top'),
                        go.layout.Annotation(x=0.6, y=0.25, 
-                            text=f"F1-score: {np.round(rep['1']['f1-score'], 3)}",
+                            text=f"F1-score: {np.round(cutoff_metrics['f1'], 3)}",
                             showarrow=False, align="right", 
-                            xanchor='left', yanchor='top'),
-                       go.layout.Annotation(x=0.6, y=0.20, 
+                            xanchor='left', yanchor='top')]
+        annotations.append(go.layout.Annotation(x=0.6, y=0.20, 
                             text=f"roc-auc-score: {np.round(roc_auc, 3)}",
                             showarrow=False, align="right", 
-                            xanchor='left', yanchor='top'),]
+                            xanchor='left', yanchor='top'))
         fig.update_layout(annotations=annotations)
                                             
     fig.update_layout(shapes=shapes)
     return fig
 
 
-def plotly_pr_auc_curve(true_y, pred_probas, cutoff=None):
-    precision, recall, thresholds = precision_recall_curve(true_y, pred_probas)
-    pr_auc_score = average_precision_score(true_y, pred_probas)
+def plotly_pr_auc_curve(pr_curve_df, pr_auc_score, cutoff=None, cutoff_metrics=None):
+    """
+    Returns PR AUC curve, with the precision and recall of cutoff in crosshairs. 
+
+    :param pr_curve_df: generated with get_pr_curve_df()
+    :type pr_curve_df: pd.DataFrame
+    :param pr_auc_score: pr auc score (average precision)
+    :type pr_auc_score: float
+    :param cutoff: cutoff to display, defaults to None
+    :type cutoff: float, optional
+    :param cutoff_metrics: dict with 'accuracy', 'precision', 'recall' and 
+        'f1' for pred_probas > cutoff, e.g. generated with get_cutoff_metrics(). 
+        If not given the crosshairs get interpolated from pr_curve_df and no
+        metrics are displayed. Defaults to None.
+    :type cutoff_metrics: dict, optional
+    """
+    precision, recall = pr_curve_df.precision.values, pr_curve_df.recall.values
     trace0 = go.Scatter(x=precision, y=recall,
                     mode='lines',
                     name='PR AUC CURVE',
-                    text=[f"threshold: {np.round(th,2)} <br>" +\
-                          f"precision: {np.round(p,2)} <br>" +\
-                          f"recall: {np.round(r,2)}" 
-                            for p, r, th in zip(precision, recall, thresholds)],
+                    text=("threshold: " + pr_curve_df.threshold.round(2).astype(str) 
+                            + " <br>precision: " + pr_curve_df.precision.round(2).astype(str) 
+                            + " <br>recall: " + pr_curve_df.recall.round(2).astype(str)).tolist(),
                     hoverinfo="text"
                 )
     data = [trace0]
@@ -1067,72 +1126,104 @@ def plotly_pr_auc_curve(true_y, pred_probas, cutoff=None):
     shapes = [] 
     
     if cutoff is not None:
-        threshold_idx = np.argmin(np.abs(thresholds-cutoff))
+        if cutoff_metrics is not None:
+            cutoff_precision, cutoff_recall = cutoff_metrics['precision'], cutoff_metrics['recall']
+        else:
+            # thresholds are ascending, except for the last point, which has none:
+            thresholds = pr_curve_df.threshold.values[:-1]
+            cutoff_precision = np.interp(cutoff, thresholds, precision[:-1])
+            cutoff_recall = np.interp(cutoff, thresholds, recall[:-1])
         shapes.append(
             dict(type='line', xref='x', yref='y',
                 x0=0, x1=1, 
-                y0=recall[threshold_idx], y1=recall[threshold_idx],
+                y0=cutoff_recall, y1=cutoff_recall,
                 line=dict(color="lightslategray",width=1)))
         shapes.append(
             dict(type='line', xref='x', yref='y',
-                 x0=precision[threshold_idx], x1=precision[threshold_idx], 
+                 x0=cutoff_precision, x1=cutoff_precision, 
                  y0=0, y1=1,
                  line=dict(color="lightslategray", width=1)))
         
-        report = classification_report(
-                    true_y, np.where(pred_probas > cutoff, 1,0), 
-                    output_dict=True)
-        
         annotations = [go.layout.Annotation(x=0.15, y=0.45, 
                             text=f"Cutoff: {np.round(cutoff,3)}",
                             showarrow=False, align="right", 
-                            xanchor='left', yanchor='top'),
+                            xanchor='left', yanchor='top')]
+        if cutoff_metrics is not None:
+            annotations += [
                        go.layout.Annotation(x=0.15, y=0.4, 
-                            text=f"Accuracy: {np.round(report['accuracy'],3)}",
+                            text=f"Accuracy: {np.round(cutoff_metrics['accuracy'],3)}",
                             showarrow=False, align="right", 
                             xanchor='left', yanchor='top'),
                        go.layout.Annotation(x=0.15, y=0.35, 
-                            text=f"Precision: {np.round(report['1']['precision'], 3)}",
+                            text=f"Precision: {np.round(cutoff_metrics['precision'], 3)}",
                             showarrow=False, align="right", 
                             xanchor='left', yanchor='top'),
                        go.layout.Annotation(x=0.15, y=0.30, 
-                            text=f"Recall: {np.round(report['1']['recall'], 3)}",
+                            text=f"Recall: {np.round(cutoff_metrics['recall'], 3)}",
                             showarrow=False, align="right", 
                             xanchor='left', yanchor='top'),
                        go.layout.Annotation(x=0.15, y=0.25, 
-                            text=f"F1-score: {np.round(report['1']['f1-score'], 3)}",
+                            text=f"F1-score: {np.round(cutoff_metrics['f1'], 3)}",
                             showarrow=False, align="right", 
-                            xanchor='left', yanchor='top'),
-                       go.layout.Annotation(x=0.15, y=0.20, 
+                            xanchor='left', yanchor='top')]
+        annotations.append(go.layout.Annotation(x=0.15, y=0.20, 
                             text=f"pr-auc-score: {np.round(pr_auc_score, 3)}",
                             showarrow=False, align="right", 
-                            xanchor='left', yanchor='top'),]
+                            xanchor='left', yanchor='top'))
         fig.update_layout(annotations=annotations)
                                             
     fig.update_layout(shapes=shapes)
     return fig
 
 
-def plotly_shap_scatter_plot(shap_values, X, display_columns):
-    
+def plotly_shap_scatter_plot(shap_values, X, display_columns, 
+                             max_points=None, webgl_threshold=5000, random_state=None):
+    """
+    Returns a summary plot with for each of the display_columns a horizontal
+    scatter of the shap values of all rows, colored by feature value.
+
+    The row index of every point is stored in the customdata of the traces.
+
+    :param max_points: if X has more rows, plot a random sample of max_points 
+        rows, defaults to None (plot all rows)
+    :type max_points: int, optional
+    :param webgl_threshold: above this number of (sampled) rows, plot with
+        WebGL (go.Scattergl) instead of SVG, defaults to 5000
+    :type webgl_threshold: int, optional
+    :param random_state: seed for the sampling of rows and the vertical 
+        jitter of the points, so that repeated calls return the same plot, 
+        defaults to None (not seeded)
+    :type random_state: int, optional
+    """
+    rng = np.random.RandomState(random_state)
     # make sure that columns are actually in X:
     display_columns = [col for col in display_columns if col in X.columns.tolist()]    
-    shap_df = pd.DataFrame(shap_values, columns=X.columns)
     min_shap = np.round(shap_values.min()-0.01, 2)
     max_shap = np.round(shap_values.max()+0.01, 2)
 
+    if max_points is not None and len(X) > max_points:
+        rows = np.sort(rng.choice(len(X), max_points, replace=False))
+    else:
+        rows = np.arange(len(X))
+    Scatter = go.Scattergl if len(rows) > webgl_threshold else go.Scatter
+    rows_str = pd.Series(rows).astype(str).values
+
     fig =  make_subplots(rows=len(display_columns), cols=1, 
                          subplot_titles=display_columns, shared_xaxes=True)
     
     for i, col in enumerate(display_columns):
+        col_shap = np.asarray(shap_values[rows, X.columns.get_loc(col)])
+        col_shap_str = pd.Series(col_shap).round(3).astype(str).values
         
         if is_string_dtype(X[col]): 
             # if str type then categorical variable, 
             # so plot each category in a different color:
+            col_values = X[col].values[rows]
             for onehot_col in X[col].unique().tolist():
-                fig.add_trace(go.Scatter(
-                                x=shap_df[X[col]==onehot_col][col],
-                                y=np.random.rand(len(shap_df[X[col]==onehot_col])),
+                mask = col_values == onehot_col
+                fig.add_trace(Scatter(
+                                x=col_shap[mask],
+                                y=rng.rand(mask.sum()),
                                 mode='markers',
                                 marker=dict(
                                       size=5,
@@ -1143,19 +1234,20 @@ def plotly_shap_scatter_plot(shap_values, X, display_columns):
                                 showlegend=False,
                                 opacity=0.8,
                                 hoverinfo="text",
-                                text=[f"{col}={onehot_col}<br>shap={np.round(shap,3)}<br>index={i}" 
-                                      for i, shap in zip(shap_df[X[col]==onehot_col].index,
-                                                       shap_df[X[col]==onehot_col][col])],
+                                text=(f"{col}={onehot_col}<br>shap=" + col_shap_str[mask]
+                                        + "<br>index=" + rows_str[mask]).tolist(),
+                                customdata=rows[mask],
                                 ),
                      row=i+1, col=1);
         else:
             # numerical feature get a single bluered plot
-            fig.add_trace(go.Scatter(x=shap_df[col],
-                                   y=np.random.rand(len(shap_df)),
+            col_values = X[col].iloc[rows].replace({-999:np.nan})
+            fig.add_trace(Scatter(x=col_shap,
+                                   y=rng.rand(len(rows)),
                                   mode='markers',
                                   marker=dict(
                                       size=5,
-                                      color=X[col].replace({-999:np.nan}),
+                                      color=col_values,
                                       colorscale='Bluered',
                                       showscale=True,
                                       opacity=0.3,
@@ -1167,10 +1259,10 @@ def plotly_shap_scatter_plot(shap_values, X, display_columns):
                                 showlegend=False,
                                 opacity=0.8,
                                 hoverinfo="text",
-                                text=[f"{col}={value}<br>shap={np.round(shap,3)}<br>index={i}" 
-                                      for i, (shap, value) in enumerate(zip(
-                                            shap_df[col], 
-                                            X[col].replace({-999:np.nan})))],
+                                text=(f"{col}=" + col_values.astype(str).values 
+                                        + "<br>shap=" + col_shap_str 
+                                        + "<br>index=" + rows_str).tolist(),
+                                customdata=rows,
                                 ),
                      row=i+1, col=1);
         fig.update_xaxes(showgrid=False, zeroline=False, 
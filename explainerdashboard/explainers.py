@@ -1,13 +1,16 @@
 from abc import ABC, abstractmethod
 import warnings
 import base64
+import shutil
+import uuid
+from pathlib import Path
 
 import pandas as pd
 from pdpbox import pdp
 import shap
 from dtreeviz.trees import *
 
-from sklearn.metrics import roc_auc_score, accuracy_score, f1_score, precision_score, recall_score, log_loss
+from sklearn.metrics import roc_auc_score, average_precision_score, log_loss
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 
 from .explainer_methods import *
@@ -19,7 +22,10 @@ class BaseExplainerBunch(ABC):
     But does not yet have a defined shap_explainer.
     """
     def __init__(self, model, X, y=None, shap="tree", metric=r2_score,
-                    cats=None, idxs=None, descriptions=None, permutation_cv=None, na_fill=-999):
+                    cats=None, idxs=None, descriptions=None, permutation_cv=None, na_fill=-999,
+                    cache_dir=None, n_jobs=None, chunk_size=None, interactions_dtype=None,
+                    permutation_repeats=1, random_state=None, cache_name=None,
+                    memmap_dir=None):
         """init
 
         :param model: a model with a scikit-learn compatible .fit and .predict method
@@ -42,6 +48,37 @@ class BaseExplainerBunch(ABC):
         :type permutation_cv: int, optional
         :param na_fill: The filler used for missing values, defaults to -999
         :type na_fill: int, optional
+        :param cache_dir: directory in which to store lazily calculated properties 
+            such as shap values, so that they get reloaded instead of recalculated
+            on the next startup. Entries are keyed by a fingerprint of model, data 
+            and settings, so stale entries get discarded automatically, defaults to None
+        :type cache_dir: str or Path, optional
+        :param n_jobs: if given, shap values get calculated in parallel on n_jobs 
+            processes (-1 for all cores), defaults to None
+        :type n_jobs: int, optional
+        :param chunk_size: if given, shap values get calculated in chunks of 
+            chunk_size rows, and shap interaction values get calculated in 
+            blocks of chunk_size rows to bound peak memory, defaults to None
+        :type chunk_size: int, optional
+        :param interactions_dtype: dtype in which to store shap interaction
+            values, e.g. np.float32 to halve memory usage, defaults to None
+        :type interactions_dtype: np.dtype, optional
+        :param permutation_repeats: number of times each feature gets permuted
+            when calculating permutation importances, defaults to 1
+        :type permutation_repeats: int, optional
+        :param random_state: seed for the permutations of the permutation
+            importances, defaults to None
+        :type random_state: int, optional
+        :param cache_name: name under which this explainer keeps track of its 
+            entry in cache_dir, so that only its own stale entries get removed 
+            when e.g. the model changes. Give explainers that share a cache_dir 
+            different names, defaults to None (the name of the class)
+        :type cache_name: str, optional
+        :param memmap_dir: if given, shap interaction values get calculated 
+            block by block (of chunk_size rows, default 1000) directly into 
+            memory mapped .npy files in memmap_dir, so they never need to fit 
+            in memory all at once. See also memmap_shap_values(), defaults to None
+        :type memmap_dir: str or Path, optional
         """
         self.model  = model
         self.X = X.reset_index(drop=True)
@@ -66,6 +103,12 @@ class BaseExplainerBunch(ABC):
         self.descriptions = {} if descriptions is None else descriptions
         self.permutation_cv = permutation_cv
         self.na_fill=na_fill
+        self.cache_dir = cache_dir
+        self.cache_name = self.__class__.__name__ if cache_name is None else cache_name
+        self.n_jobs, self.chunk_size = n_jobs, chunk_size
+        self.interactions_dtype = interactions_dtype
+        self.permutation_repeats, self.random_state = permutation_repeats, random_state
+        self.memmap_dir = memmap_dir
         self.columns = self.X.columns.tolist()
         self.is_classifier = False
         self.is_regression = False
@@ -111,11 +154,83 @@ class BaseExplainerBunch(ABC):
     def __len__(self):
         return len(self.X)
 
+    @property
+    def idxs(self):
+        return self._idxs
+
+    @idxs.setter
+    def idxs(self, idxs):
+        """also builds the hash index that get_int_idx() uses to look up
+        the int position of a str index (first occurrence wins)"""
+        self._idxs = idxs
+        if idxs is not None:
+            idxs_index = pd.Index(idxs)
+            first = ~idxs_index.duplicated()
+            self._idxs_index = idxs_index[first]
+            self._idxs_positions = np.flatnonzero(first)
+            self._idxs_dict = dict(zip(self._idxs_index, self._idxs_positions.tolist()))
+        else:
+            self._idxs_index, self._idxs_positions, self._idxs_dict = None, None, {}
+
     def __contains__(self, index):
         if self.get_int_idx(index) is not None:
             return True
         return False
 
+    @property
+    def cache_path(self):
+        """directory inside cache_dir where the lazily calculated properties 
+        for this particular model, data and settings get stored"""
+        if not hasattr(self, '_cache_path'):
+            fingerprint = get_explainer_fingerprint(
+                self.model, self.X, self.y, self.cats, self.shap,
+                metric=getattr(self.metric, '__name__', self.metric),
+                permutation_cv=self.permutation_cv,
+                permutation_repeats=self.permutation_repeats,
+                random_state=self.random_state,
+                interactions_dtype=str(self.interactions_dtype))
+            self._cache_path = prune_cache_dir(self.cache_dir, fingerprint, self.cache_name)
+        return self._cache_path
+
+    def clear_cache(self):
+        """removes the entry of this explainer from cache_dir"""
+        if self.cache_dir is not None:
+            shutil.rmtree(self.cache_path, ignore_errors=True)
+            (Path(self.cache_dir) / (self.cache_name + ".fingerprint")).unlink(missing_ok=True)
+            del self._cache_path
+        self.reset_state_token()
+
+    @property
+    def state_token(self):
+        """unique token for this explainer and its calculated properties. 
+        Gets used to key cached figures (see CachedExplainer), and gets 
+        renewed by reset_state_token() and clear_cache()"""
+        if not hasattr(self, '_state_token'):
+            self._state_token = uuid.uuid4().hex
+        return self._state_token
+
+    def reset_state_token(self):
+        """renew state_token, so that figures cached for the previous state
+        of this explainer no longer get served"""
+        if hasattr(self, '_state_token'):
+            del self._state_token
+
+    def _load_cached(self, attr):
+        """load attr from cache_dir if available. Returns True if succesful."""
+        if self.cache_dir is None:
+            return False
+        value = load_cached_value(self.cache_path, attr)
+        if value is None:
+            return False
+        print(f"Loading {attr.strip('_')} from cache...")
+        setattr(self, attr, value)
+        return True
+
+    def _save_cached(self, attr):
+        """store attr in cache_dir (if cache_dir was given)"""
+        if self.cache_dir is not None:
+            save_cached_value(self.cache_path, attr, getattr(self, attr))
+
     @property
     def shap_explainer(self):
         if not hasattr(self, '_shap_explainer'):
@@ -139,6 +254,75 @@ class BaseExplainerBunch(ABC):
                 self._shap_explainer = shap.KernelExplainer(self.model)
         return self._shap_explainer
 
+    def __getstate__(self):
+        # memory mapped arrays do not get pickled, but get reopened from 
+        # memmap_dir in __setstate__ instead:
+        state = self.__dict__.copy()
+        if getattr(self, 'memmap_dir', None) is not None:
+            for attr in self._memmap_attrs:
+                if is_memmapped(state.get(attr)):
+                    state.pop(attr)
+        return state
+
+    def __setstate__(self, state):
+        idxs = state.pop('idxs', None) # explainers pickled before idxs got indexed
+        self.__dict__.update(state)
+        if idxs is not None:
+            self.idxs = idxs
+        if getattr(self, 'memmap_dir', None) is not None:
+            for attr in self._memmap_attrs:
+                value = load_memmapped(self.memmap_dir, attr.strip('_'))
+                if value is not None:
+                    setattr(self, attr, value)
+
+    _memmap_attrs = ['_shap_values', '_shap_values_cats', 
+                     '_shap_interaction_values', '_shap_interaction_values_cats']
+
+    def memmap_shap_values(self, memmap_dir, include_interactions=True):
+        """Dumps the shap values (and shap interaction values) to .npy files 
+        in memmap_dir and reopens them read-only with memory mapping.
+
+        When the explainer gets pickled afterwards (e.g. with joblib), these
+        arrays are not included, but get reopened from memmap_dir when 
+        unpickled. This way multiple dashboard workers share the same 
+        arrays through the page cache instead of each holding a private copy.
+
+        :param memmap_dir: directory to store the .npy files
+        :type memmap_dir: str or Path
+        :param include_interactions: also store shap interaction values,
+            calculating them if needed, defaults to True
+        :type include_interactions: bool, optional
+        """
+        _ = self.shap_values
+        if self.cats is not None:
+            _ = self.shap_values_cats
+        if include_interactions:
+            _ = self.shap_interaction_values
+            if self.cats is not None:
+                _ = self.shap_interaction_values_cats
+
+        for attr in self._memmap_attrs:
+            # values that were already calculated into memmap_dir stay as they are:
+            if hasattr(self, attr) and not is_memmapped(getattr(self, attr), memmap_dir):
+                setattr(self, attr, save_memmapped(
+                    memmap_dir, attr.strip('_'), getattr(self, attr)))
+        self.memmap_dir = memmap_dir
+
+    def _interactions_memmap_path(self):
+        """path of the memory mapped .npy file that shap interaction values 
+        get calculated into if memmap_dir was given (None otherwise)"""
+        if self.memmap_dir is None:
+            return None
+        return Path(self.memmap_dir) / "shap_interaction_values.npy"
+
+    def _calculate_shap_values(self):
+        """calculate shap values for X, in parallel chunks if either
+        n_jobs or chunk_size was specified"""
+        if self.n_jobs is None and self.chunk_size is None:
+            return self.shap_explainer.shap_values(self.X)
+        return chunked_shap_values(self.shap_explainer, self.X, 
+                                    self.chunk_size, self.n_jobs)
+
     def get_int_idx(self, index):
         """
         Always returns an int index.
@@ -146,14 +330,32 @@ class BaseExplainerBunch(ABC):
         if index is str, lookup corresponding int index and return
         if index not found, return None
         """
-        if isinstance(index, int):
+        if isinstance(index, (int, np.integer)):
             if index >= 0 and index < len(self):
-                return index
+                return int(index)
         elif isinstance(index, str):
-            if self.idxs is not None and index in self.idxs:
-                return self.idxs.index(index)
+            return self._idxs_dict.get(index)
         return None
 
+    def get_int_idxs(self, indexes):
+        """
+        Batch version of get_int_idx(): returns an np.array with the int
+        index for every index in indexes (either all int or all str).
+        Indexes that are not found get -1.
+        """
+        indexes = np.asarray(indexes)
+        if np.issubdtype(indexes.dtype, np.integer):
+            return np.where((indexes >= 0) & (indexes < len(self)), indexes, -1)
+        if self._idxs_index is None:
+            return np.full(len(indexes), -1)
+        positions = self._idxs_index.get_indexer(indexes.astype(str))
+        return np.where(positions >= 0, self._idxs_positions[positions], -1)
+
+    def get_prop_for_label(self, prop:str, pos_label=None):
+        """returns property prop. Only the properties of classifiers depend
+        on pos_label, so here pos_label gets ignored."""
+        return getattr(self, prop)
+
     def random_index(self, y_min=None, y_max=None, pred_min=None, pred_max=None, return_str=False):
         """
         Return a random index from dataset.
@@ -185,27 +387,28 @@ class BaseExplainerBunch(ABC):
     @property
     def preds(self):
         """model predictions"""
-        if not hasattr(self, '_preds'):
+        if not hasattr(self, '_preds') and not self._load_cached('_preds'):
             print("Calculating predictions...")
             self._preds = self.model.predict(self.X)
-            
+            self._save_cached('_preds')
         return self._preds
 
     @property
     def pred_percentiles(self):
-        if not hasattr(self, '_pred_percentiles'):
+        if not hasattr(self, '_pred_percentiles') and not self._load_cached('_pred_percentiles'):
             print("Calculating prediction percentiles...")
             self._pred_percentiles = (pd.Series(self.preds)
                                 .rank(method='min')
                                 .divide(len(self.preds))
                                 .values)
+            self._save_cached('_pred_percentiles')
         return self._pred_percentiles
 
-    def columns_ranked_by_shap(self, cats=False):
+    def columns_ranked_by_shap(self, cats=False, pos_label=None):
         if cats:
-            return self.mean_abs_shap_cats.Feature.tolist()
+            return self.get_prop_for_label('mean_abs_shap_cats', pos_label).Feature.tolist()
         else:
-            return self.mean_abs_shap.Feature.tolist()
+            return self.get_prop_for_label('mean_abs_shap', pos_label).Feature.tolist()
 
     def equivalent_col(self, col):
         """if col in self.columns, return equivalent col in self.columns_cats,
@@ -247,7 +450,7 @@ class BaseExplainerBunch(ABC):
         elif col in self.cats:
             return retrieve_onehot_value(self.X, col)
         
-    def get_col_value_plus_prediction(self, index, col):
+    def get_col_value_plus_prediction(self, index, col, pos_label=None):
         """return value of col and prediction for index
         helper function for get_pdp()"""
         assert index in self, f"index {index} not found"
@@ -262,7 +465,7 @@ class BaseExplainerBunch(ABC):
             col_value = retrieve_onehot_value(self.X, col).iloc[idx]
 
         try:
-            prediction = self.pred_probas[idx]
+            prediction = self.get_prop_for_label('pred_probas', pos_label)[idx]
         except:
             prediction = self.preds[idx]
 
@@ -271,22 +474,30 @@ class BaseExplainerBunch(ABC):
     @property
     def permutation_importances(self):
         """return the permatuation importances of the model features"""
-        if not hasattr(self, '_perm_imps'):
+        if not hasattr(self, '_perm_imps') and not self._load_cached('_perm_imps'):
             print("Calculating importances...")
             self._perm_imps = cv_permutation_importances(
                             self.model, self.X, self.y, self.metric,
                             cv=self.permutation_cv,
-                            needs_proba=self.is_classifier)
+                            needs_proba=self.is_classifier,
+                            n_repeats=self.permutation_repeats,
+                            random_state=self.random_state,
+                            n_jobs=self.n_jobs)
+            self._save_cached('_perm_imps')
         return self._perm_imps
 
     @property
     def permutation_importances_cats(self):
         """permutation importances with categoricals grouped"""
-        if not hasattr(self, '_perm_imps_cats'):
+        if not hasattr(self, '_perm_imps_cats') and not self._load_cached('_perm_imps_cats'):
             self._perm_imps_cats = cv_permutation_importances(
                             self.model, self.X, self.y, self.metric, self.cats,
                             cv=self.permutation_cv,
-                            needs_proba=self.is_classifier)
+                            needs_proba=self.is_classifier,
+                            n_repeats=self.permutation_repeats,
+                            random_state=self.random_state,
+                            n_jobs=self.n_jobs)
+            self._save_cached('_perm_imps_cats')
         return self._perm_imps_cats
 
     @property
@@ -309,44 +520,58 @@ class BaseExplainerBunch(ABC):
     def shap_base_value(self):
         """the intercept for the shap values. (i.e. 'what would the prediction be
         if we knew none of the features?')"""
-        if not hasattr(self, '_shap_base_value'):
+        if not hasattr(self, '_shap_base_value') and not self._load_cached('_shap_base_value'):
             self._shap_base_value = self.shap_explainer.expected_value
+            self._save_cached('_shap_base_value')
         return self._shap_base_value
 
     @property
     def shap_values(self):
         """SHAP values calculated using the shap library"""
-        if not hasattr(self, '_shap_values'):
+        if not hasattr(self, '_shap_values') and not self._load_cached('_shap_values'):
             print("Calculating shap values...")
-            self._shap_values = self.shap_explainer.shap_values(self.X)
+            self._shap_values = self._calculate_shap_values()
+            self._save_cached('_shap_values')
         return self._shap_values
 
     @property
     def shap_values_cats(self):
         """SHAP values when categorical features have been grouped"""
-        if not hasattr(self, '_shap_values_cats'):
+        if not hasattr(self, '_shap_values_cats') and not self._load_cached('_shap_values_cats'):
             print("Calculating shap values...")
             self._shap_values_cats = merge_categorical_shap_values(
                     self.X, self.shap_values, self.cats)
+            self._save_cached('_shap_values_cats')
         return self._shap_values_cats
 
     @property
     def shap_interaction_values(self):
         """SHAP interaction values calculated using shap library"""
-        if not hasattr(self, '_shap_interaction_values'):
+        if not hasattr(self, '_shap_interaction_values') and not self._load_cached('_shap_interaction_values'):
             print("Calculating shap interaction values...")
-            self._shap_interaction_values = \
-                self.shap_explainer.shap_interaction_values(self.X)
+            if self.chunk_size is not None or self.memmap_dir is not None:
+                self._shap_interaction_values = blockwise_shap_interaction_values(
+                    self.shap_explainer, self.X, 
+                    block_size=self.chunk_size or 1000, dtype=self.interactions_dtype,
+                    memmap_path=self._interactions_memmap_path())
+            else:
+                self._shap_interaction_values = \
+                    self.shap_explainer.shap_interaction_values(self.X)
+                if self.interactions_dtype is not None:
+                    self._shap_interaction_values = \
+                        self._shap_interaction_values.astype(self.interactions_dtype)
+            self._save_cached('_shap_interaction_values')
         return self._shap_interaction_values
 
     @property
     def shap_interaction_values_cats(self):
         """SHAP interaction values with categorical features grouped"""
-        if not hasattr(self, '_shap_interaction_values_cats'):
+        if not hasattr(self, '_shap_interaction_values_cats') and not self._load_cached('_shap_interaction_values_cats'):
             print("Calculating shap interaction values...")
             self._shap_interaction_values_cats = \
                 merge_categorical_shap_interaction_values(
                     self.X, self.X_cats, self.shap_interaction_values)
+            self._save_cached('_shap_interaction_values_cats')
         return self._shap_interaction_values_cats
 
     @property
@@ -403,7 +628,7 @@ class BaseExplainerBunch(ABC):
             metrics_markdown += f"### {k}: {np.round(v, round)}\n"
         return metrics_markdown
     
-    def mean_abs_shap_df(self, topx=None, cutoff=None, cats=False):
+    def mean_abs_shap_df(self, topx=None, cutoff=None, cats=False, pos_label=None):
         """returns a pd.DataFrame with the mean absolute shap values per features,
         sorted rom highest to lowest.
 
@@ -413,18 +638,22 @@ class BaseExplainerBunch(ABC):
         :type cutoff: float, optional
         :param cats: group categorical variables, defaults to False
         :type cats: bool, optional
+        :param pos_label: label for which to return the values (only for
+            classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return:shap_df
         :rtype pd.DataFrame
 
         """
-        shap_df = self.mean_abs_shap_cats if cats else self.mean_abs_shap
+        shap_df = self.get_prop_for_label(
+                    'mean_abs_shap_cats' if cats else 'mean_abs_shap', pos_label)
 
         if topx is None: topx = len(shap_df)
         if cutoff is None: cutoff = shap_df['MEAN_ABS_SHAP'].min()
         return (shap_df[shap_df['MEAN_ABS_SHAP'] >= cutoff]
                     .sort_values('MEAN_ABS_SHAP', ascending=False).head(topx))
 
-    def shap_top_interactions(self, col, topx=None, cats=False):
+    def shap_top_interactions(self, col, topx=None, cats=False, pos_label=None):
         """returns the features that interact with feature col in descending order.
 
         :param col: feature for which you want to get the interactions
@@ -433,6 +662,9 @@ class BaseExplainerBunch(ABC):
         :type topx: int, optional
         :param cats: Group categorical features, defaults to False
         :type cats: bool, optional
+        :param pos_label: label for which to return the interactions (only for
+            classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: top_interactions
         :rtype: list
 
@@ -441,9 +673,11 @@ class BaseExplainerBunch(ABC):
             if hasattr(self, '_shap_interaction_values'):
                 col_idx = self.X_cats.columns.get_loc(col)
                 top_interactions = self.X_cats.columns[np.argsort(-np.abs(
-                        self.shap_interaction_values_cats[:, col_idx, :]).mean(0))].tolist()
+                        self.get_prop_for_label('shap_interaction_values_cats', pos_label)\
+                            [:, col_idx, :]).mean(0))].tolist()
             else:
-                top_interactions = self.mean_abs_shap_cats.Feature.values.tolist()
+                top_interactions = self.get_prop_for_label(
+                        'mean_abs_shap_cats', pos_label).Feature.values.tolist()
                 top_interactions.insert(0, top_interactions.pop(
                     top_interactions.index(col))) #put col first
 
@@ -453,17 +687,18 @@ class BaseExplainerBunch(ABC):
             if hasattr(self, '_shap_interaction_values'):
                 col_idx = self.X.columns.get_loc(col)
                 top_interactions = self.X.columns[np.argsort(-np.abs(
-                            self.shap_interaction_values[:, col_idx, :]).mean(0))].tolist()
+                            self.get_prop_for_label('shap_interaction_values', pos_label)\
+                                [:, col_idx, :]).mean(0))].tolist()
             else:
                 interaction_idxs = shap.common.approximate_interactions(
-                    col, self.shap_values, self.X)
+                    col, self.get_prop_for_label('shap_values', pos_label), self.X)
                 top_interactions = self.X.columns[interaction_idxs].tolist()
                 top_interactions.insert(0, top_interactions.pop(-1)) #put col first
 
             if topx is None: topx = len(top_interactions)
             return top_interactions[:topx]
 
-    def shap_interaction_values_by_col(self, col, cats=False):
+    def shap_interaction_values_by_col(self, col, cats=False, pos_label=None):
         """
         returns the shap interaction values[np.array(N,N)] for feature col
 
@@ -471,17 +706,20 @@ class BaseExplainerBunch(ABC):
         :type col: str
         :param cats: group categorical, defaults to False
         :type cats: bool, optional
+        :param pos_label: label for which to return the values (only for
+            classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: shap_interaction_values
         :rtype: np.array(N,N)
         """
         if cats:
-            return self.shap_interaction_values_cats[:,
+            return self.get_prop_for_label('shap_interaction_values_cats', pos_label)[:,
                         self.X_cats.columns.get_loc(col), :]
         else:
-            return self.shap_interaction_values[:,
+            return self.get_prop_for_label('shap_interaction_values', pos_label)[:,
                         self.X.columns.get_loc(col), :]
 
-    def permutation_importances_df(self, topx=None, cutoff=None, cats=False):
+    def permutation_importances_df(self, topx=None, cutoff=None, cats=False, pos_label=None):
         """Returns pd.DataFrame with features ordered by permutation importance.
         For more about permutation importances see https://explained.ai/rf-importance/index.html
 
@@ -491,25 +729,29 @@ class BaseExplainerBunch(ABC):
         :type cutoff: float, optional
         :param cats: Group categoricals, defaults to False
         :type cats: bool, optional
+        :param pos_label: label for which to return the importances (only for
+            classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: importance_df
         :rtype: pd.DataFrame
         """
-        importance_df = self.permutation_importances_cats.reset_index() if cats \
-                                else self.permutation_importances.reset_index()
+        importance_df = self.get_prop_for_label(
+                'permutation_importances_cats' if cats else 'permutation_importances', 
+                pos_label).reset_index()
 
         if topx is None: topx = len(importance_df)
         if cutoff is None: cutoff = importance_df.Importance.min()
         return importance_df[importance_df.Importance > cutoff].head(topx)
 
-    def importances_df(self, kind="shap", topx=None, cutoff=None, cats=False):
+    def importances_df(self, kind="shap", topx=None, cutoff=None, cats=False, pos_label=None):
         """wrapper function for mean_abs_shap_df() and permutation_importance_df()"""
         assert kind=='shap' or kind=='permutation', "kind should either be 'shap' or 'permutation'!"
         if kind=='permutation':
-            return self.permutation_importances_df(topx, cutoff, cats)
+            return self.permutation_importances_df(topx, cutoff, cats, pos_label)
         elif kind=='shap':
-            return self.mean_abs_shap_df(topx, cutoff, cats)
+            return self.mean_abs_shap_df(topx, cutoff, cats, pos_label)
 
-    def contrib_df(self, index, cats=True, topx=None, cutoff=None):
+    def contrib_df(self, index, cats=True, topx=None, cutoff=None, pos_label=None):
         """returns a contrib_df pd.DataFrame with the shap value contributions
         to the prediction for index. Used as input for the plot_contributions()
         method.
@@ -522,35 +764,71 @@ class BaseExplainerBunch(ABC):
         :type topx: int, optional
         :param cutoff: only return features with at least cutoff contributions, defaults to None
         :type cutoff: float, optional
+        :param pos_label: label for which to return the contributions (only for
+            classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: contrib_df
         :rtype: pd.DataFrame
         """
         idx = self.get_int_idx(index)
+        shap_base_value = self.get_prop_for_label('shap_base_value', pos_label)
         if cats:
-            return get_contrib_df(self.shap_base_value, self.shap_values_cats[idx],
+            return get_contrib_df(shap_base_value, 
+                                    self.get_prop_for_label('shap_values_cats', pos_label)[idx],
                                     self.X_cats.iloc[[idx]], topx, cutoff)
         else:
-            return get_contrib_df(self.shap_base_value, self.shap_values[idx],
+            return get_contrib_df(shap_base_value, 
+                                    self.get_prop_for_label('shap_values', pos_label)[idx],
                                     self.X.iloc[[idx]], topx, cutoff)
 
+    def contrib_dfs(self, indexes, cats=True, topx=None, cutoff=None, pos_label=None):
+        """returns the contrib_df of every index in indexes stacked in a single
+        pd.DataFrame, with an 'index' column identifying the row. Computed 
+        for all indexes at once, so much faster than calling contrib_df()
+        in a loop.
+
+        :param indexes: indexes for which to calculate contributions
+        :type indexes: list of int or list of str
+        :param cats: Group categoricals, defaults to True
+        :type cats: bool, optional
+        :param topx: Only return topx features, remainder called REST, defaults to None
+        :type topx: int, optional
+        :param cutoff: only return features with at least cutoff contributions, defaults to None
+        :type cutoff: float, optional
+        :param pos_label: label for which to return the contributions (only for
+            classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
+        :return: contrib_dfs
+        :rtype: pd.DataFrame
+        """
+        idxs = self.get_int_idxs(indexes)
+        assert (idxs >= 0).all(), \
+            f"indexes not found: {list(np.asarray(indexes)[idxs < 0][:5])}"
+        shap_values = self.get_prop_for_label(
+                            'shap_values_cats' if cats else 'shap_values', pos_label)
+        return get_contrib_dfs(self.get_prop_for_label('shap_base_value', pos_label),
+                                shap_values[idxs], 
+                                (self.X_cats if cats else self.X).iloc[idxs], 
+                                topx, cutoff, indexes=indexes)
+
     def contrib_summary_df(self, index, cats=True,
-                            topx=None, cutoff=None, round=2):
+                            topx=None, cutoff=None, round=2, pos_label=None):
         """Takes a contrib_df, and formats it to a more human readable format"""
         idx = self.get_int_idx(index) # if passed str convert to int index
-        return get_contrib_summary_df(self.contrib_df(idx, cats, topx, cutoff),
+        return get_contrib_summary_df(self.contrib_df(idx, cats, topx, cutoff, pos_label),
                                         classification=self.is_classifier,
                                         round=round)
 
-    def interactions_df(self, col, cats=False, topx=None, cutoff=None):
+    def interactions_df(self, col, cats=False, topx=None, cutoff=None, pos_label=None):
         importance_df = mean_absolute_shap_values(
                             self.columns_cats if cats else self.columns, 
-                            self.shap_interaction_values_by_col(col, cats))
+                            self.shap_interaction_values_by_col(col, cats, pos_label))
 
         if topx is None: topx = len(importance_df)
         if cutoff is None: cutoff = importance_df.MEAN_ABS_SHAP.min()
         return importance_df[importance_df.MEAN_ABS_SHAP > cutoff].head(topx)
     
-    def formatted_contrib_df(self, index, round=None, lang='en'):
+    def formatted_contrib_df(self, index, round=None, lang='en', pos_label=None):
         """Our PowerBI specialist wanted this the contrib_df in a certain format in order
         to conventiently build powerbi dashboards from the output of get_dfs.
 
@@ -562,34 +840,46 @@ class BaseExplainerBunch(ABC):
         :type round: int, optional
         :param lang: language to name the columns, defaults to 'en'
         :type lang: str, optional
+        :param pos_label: label for which to return the contributions (only for
+            classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: formatted_contrib_df
         :rtype: pd.DataFrame
         """
-        cdf = self.contrib_df(index, cats=True).copy()
-        cdf.reset_index(inplace=True)
-        cdf.loc[cdf.col=='base_value', 'value'] = np.nan
-        cdf['row_id'] = self.get_int_idx(index)
-        cdf['name_id'] = self.idxs[self.get_int_idx(index)]
-        cdf['cat_value'] = np.where(cdf.col.isin(self.cats), cdf.value, np.nan)
-        cdf['cont_value'] = np.where(cdf.col.isin(self.cats), np.nan, cdf.value)
-        if round is not None:
-            rounded_cont = np.round(cdf['cont_value'].values.astype(float), round)
-            cdf['value'] = np.where(cdf.col.isin(self.cats), cdf.cat_value, rounded_cont)
-        cdf['type'] = np.where(cdf.col.isin(self.cats), 'cat', 'cont')
-        cdf['abs_contribution'] = np.abs(cdf.contribution)
-        cdf = cdf[['row_id', 'name_id', 'contribution', 'abs_contribution',
-                    'col', 'value', 'cat_value', 'cont_value', 'type', 'index']]
-        if lang == 'nl':
-            cdf.columns = ['row_id', 'name_id', 'SHAP', 'ABS_SHAP', 'Variabele', 'Waarde',
-                            'Cat_Waarde', 'Cont_Waarde', 'Waarde_Type', 'Variabele_Volgorde']
-            return cdf
-
-        cdf.columns = ['row_id', 'name_id', 'SHAP', 'ABS_SHAP', 'Feature', 'Value',
-                        'Cat_Value', 'Cont_Value', 'Value_Type', 'Feature_Order']
-        return cdf
+        idx = self.get_int_idx(index)
+        return get_long_contrib_df(
+                    self.get_prop_for_label('shap_base_value', pos_label),
+                    self.get_prop_for_label('shap_values_cats', pos_label)[[idx]],
+                    self.X_cats.iloc[[idx]], self.cats,
+                    row_ids=[idx], name_ids=[self.idxs[idx]], round=round, lang=lang)
+
+    def formatted_contrib_df_chunks(self, chunksize=10000, round=None, lang='en', pos_label=None):
+        """Generator that yields the formatted_contrib_df of all rows, 
+        concatenated in chunks of chunksize rows (so chunks have 
+        chunksize*(len(columns_cats)+1) rows). Allows exporting the 
+        contributions of large datasets without building them all in memory.
+
+        :param chunksize: number of rows per chunk, defaults to 10000
+        :type chunksize: int, optional
+        :param round: rounding of continuous features, defaults to None
+        :type round: int, optional
+        :param lang: language to name the columns, defaults to 'en'
+        :type lang: str, optional
+        :param pos_label: label for which to return the contributions (only for
+            classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
+        """
+        shap_base_value = self.get_prop_for_label('shap_base_value', pos_label)
+        shap_values_cats = self.get_prop_for_label('shap_values_cats', pos_label)
+        for start in range(0, len(self), chunksize):
+            stop = min(start + chunksize, len(self))
+            yield get_long_contrib_df(shap_base_value, shap_values_cats[start:stop],
+                        self.X_cats.iloc[start:stop], self.cats,
+                        row_ids=np.arange(start, stop), name_ids=self.idxs[start:stop],
+                        round=round, lang=lang)
 
     def get_pdp_result(self, col, index=None, drop_na=True,
-                        sample=500, num_grid_points=20):
+                        sample=500, num_grid_points=20, pos_label=None):
         """Uses the PDPBox to calculate partial dependences for feature col.
 
         :param col: Feature to calculate partial dependences for
@@ -602,6 +892,9 @@ class BaseExplainerBunch(ABC):
         :type sample: int, optional
         :param num_grid_points: Number of grid points to calculate, defaults to 20
         :type num_grid_points: int, optional
+        :param pos_label: label for which to calculate the pdp (only for
+            classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: pdp_result
         :rtype: PDPBox.pdp_result
         """
@@ -646,52 +939,77 @@ class BaseExplainerBunch(ABC):
                 pd.Series(pdp_result.feature_grids).str.split(col+'_').str[1].values
         return pdp_result
 
-    def get_dfs(self, cats=True, round=None, lang='en'):
-        """returns two pd.DataFrames. The first with id, prediction, actual and
-        feature values, and one with only id and shap values.
-        These can then be used to build your own custom dashboard on these data,
-        for example using PowerBI.
-
-        :param cats: group categorical variables, defaults to True
-        :type cats: bool, optional
-        :return: cols_df, shap_df
-        :rtype: pd.DataFrame, pd.DataFrame
-        """
+    def _get_cols_and_shap_dfs(self, cats=True, lang='en', pos_label=None, rows=slice(None)):
+        """returns the cols_df and shap_df of get_dfs() for the rows in slice rows"""
+        row_ids = np.arange(len(self))[rows]
         if cats:
-            cols_df = self.X_cats.copy()
-            shap_df = pd.DataFrame(self.shap_values_cats, columns = self.X_cats.columns)
+            cols_df = self.X_cats.iloc[rows].reset_index(drop=True)
+            shap_df = pd.DataFrame(self.get_prop_for_label('shap_values_cats', pos_label)[rows], 
+                                    columns = self.X_cats.columns)
         else:
-            cols_df = self.X.copy()
-            shap_df = pd.DataFrame(self.shap_values, columns = self.X.columns)
+            cols_df = self.X.iloc[rows].reset_index(drop=True)
+            shap_df = pd.DataFrame(self.get_prop_for_label('shap_values', pos_label)[rows], 
+                                    columns = self.X.columns)
 
         actual_str = 'Uitkomst' if lang == 'nl' else 'Actual'
         prediction_str = 'Voorspelling' if lang == 'nl' else 'Prediction'
         
-        cols_df.insert(0, actual_str, self.y )
+        cols_df.insert(0, actual_str, np.asarray(self.y)[rows])
         if self.is_classifier:
-            cols_df.insert(0, prediction_str, self.pred_probas)
+            cols_df.insert(0, prediction_str, self.get_prop_for_label('pred_probas', pos_label)[rows])
         else:
-            cols_df.insert(0, prediction_str, self.preds)
-        cols_df.insert(0, 'name_id', self.idxs)
-        cols_df.insert(0, 'row_id', range(len(self)))
+            cols_df.insert(0, prediction_str, self.preds[rows])
+        cols_df.insert(0, 'name_id', self.idxs[rows])
+        cols_df.insert(0, 'row_id', row_ids)
  
-        shap_df.insert(0, 'SHAP_base', np.repeat(self.shap_base_value, len(self)))
-        shap_df.insert(0, 'name_id', self.idxs)
-        shap_df.insert(0, 'row_id', range(len(self)))
-
-
-        contribs_df = None
-        for idx in range(len(self)):
-            fcdf = self.formatted_contrib_df(idx, round=round, lang=lang)
-            if contribs_df is None: contribs_df = fcdf
-            else: contribs_df = pd.concat([contribs_df, fcdf])
+        shap_df.insert(0, 'SHAP_base', np.repeat(
+                        self.get_prop_for_label('shap_base_value', pos_label), len(row_ids)))
+        shap_df.insert(0, 'name_id', self.idxs[rows])
+        shap_df.insert(0, 'row_id', row_ids)
+        return cols_df, shap_df
+
+    def _get_dfs_chunks(self, chunksize=10000, cats=True, round=None, lang='en', pos_label=None):
+        """Generator that yields (table, df) tuples, with table in 'COLS', 'SHAP'
+        and 'CONTRIB', for chunks of chunksize rows at a time. Concatenating
+        the dfs of each table gives the three dataframes of get_dfs()."""
+        contribs_chunks = self.formatted_contrib_df_chunks(chunksize, round, lang, pos_label)
+        for start in range(0, len(self), chunksize):
+            cols_df, shap_df = self._get_cols_and_shap_dfs(
+                    cats, lang, pos_label, slice(start, start+chunksize))
+            yield 'COLS', cols_df
+            yield 'SHAP', shap_df
+            yield 'CONTRIB', next(contribs_chunks)
+
+    def get_dfs(self, cats=True, round=None, lang='en', pos_label=None):
+        """returns three pd.DataFrames. The first with id, prediction, actual and
+        feature values, the second with only id and shap values, and the third
+        with the formatted_contrib_df of all rows in long format.
+        These can then be used to build your own custom dashboard on these data,
+        for example using PowerBI.
 
+        :param cats: group categorical variables, defaults to True
+        :type cats: bool, optional
+        :param round: rounding of continuous features in contribs_df, defaults to None
+        :type round: int, optional
+        :param lang: language to name the columns, defaults to 'en'
+        :type lang: str, optional
+        :param pos_label: label for which to return predictions and shap values
+            (only for classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
+        :return: cols_df, shap_df, contribs_df
+        :rtype: pd.DataFrame, pd.DataFrame, pd.DataFrame
+        """
+        cols_df, shap_df = self._get_cols_and_shap_dfs(cats, lang, pos_label)
+        contribs_df = get_long_contrib_df(
+                    self.get_prop_for_label('shap_base_value', pos_label),
+                    self.get_prop_for_label('shap_values_cats', pos_label),
+                    self.X_cats, self.cats, name_ids=self.idxs, round=round, lang=lang)
         return cols_df, shap_df, contribs_df
 
     def to_sql(self, conn, schema, name, if_exists='replace',
-                cats=True, round=None, lang='en'):
-        """Writes two dataframes generated by .get_dfs() to a sql server.
-        Tables will be called name_COLS and name_SHAP
+                cats=True, round=None, lang='en', chunksize=None, pos_label=None):
+        """Writes the three dataframes generated by .get_dfs() to a sql server.
+        Tables will be called name_COLS, name_SHAP and name_CONTRIB
 
         :param conn: database connecter acceptable for pd.to_sql
         :type conn: sqlalchemy.engine.Engine or sqlite3.Connection
@@ -703,16 +1021,113 @@ class BaseExplainerBunch(ABC):
         :type cats: bool, optional
         :param if_exists: How to behave if the table already exists.
         :type if_exists: {‘fail’, ‘replace’, ‘append’}, default ‘fail’
+        :param chunksize: if given, rows get inserted in batches of chunksize rows,
+            and the contributions get generated and inserted chunksize rows 
+            of the dataset at a time instead of all at once, defaults to None
+        :type chunksize: int, optional
+        :param pos_label: label for which to export predictions and shap values
+            (only for classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
+        """
+        written = set()
+        for table, df in self._get_dfs_chunks(
+                len(self) if chunksize is None else chunksize, cats, round, lang, pos_label):
+            df.to_sql(con=conn, schema=schema, name=name+"_"+table,
+                        if_exists='append' if table in written else if_exists, 
+                        index=False, chunksize=chunksize)
+            written.add(table)
+
+    def to_parquet(self, path, chunksize=10000, cats=True, round=None, lang='en', 
+                    file_format='parquet', labels=None):
+        """Writes the three tables generated by .get_dfs() (COLS, SHAP and 
+        CONTRIB) to files in directory path, chunksize rows at a time, 
+        so that memory use stays bounded for large datasets. Each chunk 
+        becomes a row group (parquet) or record batch (arrow) in the file.
+
+        For classifiers the tables are written for every label in 
+        hive-style partitions, e.g. path/SHAP/label=Yes/part-0.parquet, 
+        so that pyarrow.parquet.read_table(path/'SHAP') returns a label column.
+        For regression the files are written to e.g. path/SHAP/part-0.parquet.
+
+        Requires pyarrow (pip install pyarrow).
+
+        :param path: directory to write the tables to
+        :type path: str or Path
+        :param chunksize: number of rows of the dataset per batch, defaults to 10000
+        :type chunksize: int, optional
+        :param cats: group categorical variables, defaults to True
+        :type cats: bool, optional
+        :param round: rounding of continuous features in CONTRIB, defaults to None
+        :type round: int, optional
+        :param lang: language to name the columns, defaults to 'en'
+        :type lang: str, optional
+        :param file_format: 'parquet' or 'arrow' (Arrow IPC file format), 
+            defaults to 'parquet'
+        :type file_format: str, optional
+        :param labels: list of labels to write partitions for (only for 
+            classifiers), defaults to None (all labels)
+        :type labels: list of int or str, optional
         """
-        cols_df, shap_df, contribs_df = self.get_dfs(cats, round, lang)
-        cols_df.to_sql(con=conn, schema=schema, name=name+"_COLS",
-                        if_exists=if_exists, index=False)
-        shap_df.to_sql(con=conn, schema=schema, name=name+"_SHAP",
-                        if_exists=if_exists, index=False)
-        contribs_df.to_sql(con=conn, schema=schema, name=name+"_CONTRIB",
-                        if_exists=if_exists, index=False)
-
-    def plot_importances(self, kind='shap', topx=None, cats=False, round=3):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("to_parquet requires pyarrow: pip install pyarrow")
+        assert file_format in ['parquet', 'arrow'], \
+            "file_format should be either 'parquet' or 'arrow'!"
+
+        if self.is_classifier:
+            labels = self.labels if labels is None else labels
+            partitions = [(f"label={self.labels[self.pos_label_index(label)]}", label) 
+                                for label in labels]
+        else:
+            partitions = [('', None)]
+
+        for partition, pos_label in partitions:
+            writers, schemas = {}, {}
+            try:
+                for table, df in self._get_dfs_chunks(chunksize, cats, round, lang, pos_label):
+                    if table not in writers:
+                        schemas[table] = pa.schema([
+                            (col, pa.string() if dtype == object else pa.from_numpy_dtype(dtype)) 
+                                for col, dtype in df.dtypes.items()])
+                        table_dir = Path(path) / table / partition
+                        table_dir.mkdir(parents=True, exist_ok=True)
+                        file_path = str(table_dir / f"part-0.{file_format}")
+                        if file_format == 'parquet':
+                            writers[table] = pq.ParquetWriter(file_path, schemas[table])
+                        else:
+                            writers[table] = pa.ipc.new_file(file_path, schemas[table])
+                    # object columns (e.g. Value in CONTRIB) can mix str and float:
+                    for col in df.columns[df.dtypes == object]:
+                        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+                    writers[table].write_table(pa.Table.from_pandas(
+                        df, schema=schemas[table], preserve_index=False))
+            finally:
+                for writer in writers.values():
+                    writer.close()
+
+    def to_arrow(self, path, chunksize=10000, cats=True, round=None, lang='en', labels=None):
+        """Writes the three tables generated by .get_dfs() to Arrow IPC files
+        in directory path. See to_parquet() for the details.
+
+        :param path: directory to write the tables to
+        :type path: str or Path
+        :param chunksize: number of rows of the dataset per batch, defaults to 10000
+        :type chunksize: int, optional
+        :param cats: group categorical variables, defaults to True
+        :type cats: bool, optional
+        :param round: rounding of continuous features in CONTRIB, defaults to None
+        :type round: int, optional
+        :param lang: language to name the columns, defaults to 'en'
+        :type lang: str, optional
+        :param labels: list of labels to write partitions for (only for 
+            classifiers), defaults to None (all labels)
+        :type labels: list of int or str, optional
+        """
+        self.to_parquet(path, chunksize, cats, round, lang, file_format='arrow', labels=labels)
+
+    def plot_importances(self, kind='shap', topx=None, cats=False, round=3, pos_label=None):
         """return Plotly fig with barchart of importances in descending order.
 
         :param type: 'shap' for mean absolute shap values, 'permutation' for
@@ -722,10 +1137,13 @@ class BaseExplainerBunch(ABC):
         :type topx: int, optional
         :param cats: Group categoricals defaults to False
         :type cats: bool, optional
+        :param pos_label: label for which to plot (only for classifiers), 
+            defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: fig
         :rtype: plotly.fig
         """
-        importances_df = self.importances_df(kind=kind, topx=topx, cats=cats)
+        importances_df = self.importances_df(kind=kind, topx=topx, cats=cats, pos_label=pos_label)
         if self.descriptions:
             descriptions = self.description_list(importances_df.Feature)
             return plotly_importances_plot(importances_df, descriptions, round=round)
@@ -733,12 +1151,12 @@ class BaseExplainerBunch(ABC):
             return plotly_importances_plot(importances_df, round=round)
 
 
-    def plot_interactions(self, col, cats=False, topx=None):
-        interactions_df = self.interactions_df(col, cats=cats, topx=topx)
+    def plot_interactions(self, col, cats=False, topx=None, pos_label=None):
+        interactions_df = self.interactions_df(col, cats=cats, topx=topx, pos_label=pos_label)
         return plotly_importances_plot(interactions_df)
 
     def plot_shap_contributions(self, index, cats=True,
-                                    topx=None, cutoff=None, round=2):
+                                    topx=None, cutoff=None, round=2, pos_label=None):
         """reutn Plotly fig with waterfall plot of shap value contributions
         to the model prediction for index.
 
@@ -752,14 +1170,22 @@ class BaseExplainerBunch(ABC):
         :type cutoff: float, optional
         :param round: round contributions to round precision, defaults to 2
         :type round: int, optional
+        :param pos_label: label for which to plot (only for classifiers), 
+            defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: fig
         :rtype: plotly.Fig
         """
-        contrib_df = self.contrib_df(self.get_int_idx(index), cats, topx, cutoff)
+        contrib_df = self.contrib_df(self.get_int_idx(index), cats, topx, cutoff, pos_label)
         return plotly_contribution_plot(contrib_df,
                     classification=self.is_classifier, round=round)
 
-    def plot_shap_summary(self, topx=None, cats=False):
+    @property
+    def _plot_random_state(self):
+        """seed for sampling points in plots: random_state, or 0 if not given"""
+        return 0 if self.random_state is None else self.random_state
+
+    def plot_shap_summary(self, topx=None, cats=False, max_points=5000, pos_label=None):
         """Displays all individual shap value for each feature in a horizontal
         scatter chart in descending order by mean absolute shap value.
 
@@ -767,23 +1193,33 @@ class BaseExplainerBunch(ABC):
         :type topx: int, optional
         :param cats: Group categoricals , defaults to False
         :type cats: bool, optional
+        :param max_points: only plot a random sample of max_points rows 
+            (seeded with random_state, so repeated calls give the same sample), 
+            defaults to 5000
+        :type max_points: int, optional
+        :param pos_label: label for which to plot (only for classifiers), 
+            defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: fig
         :rtype: plotly.Fig
         """
         if cats:
             return plotly_shap_scatter_plot(
-                                self.shap_values_cats,
+                                self.get_prop_for_label('shap_values_cats', pos_label),
                                 self.X_cats,
-                                self.importances_df(type='shap', topx=topx, cats=True)\
-                                        ['Feature'].values.tolist())
+                                self.importances_df(kind='shap', topx=topx, cats=True, 
+                                        pos_label=pos_label)['Feature'].values.tolist(),
+                                max_points=max_points, random_state=self._plot_random_state)
         else:
             return plotly_shap_scatter_plot(
-                                self.shap_values,
+                                self.get_prop_for_label('shap_values', pos_label),
                                 self.X,
-                                self.importances_df(type='shap', topx=topx)\
-                                        ['Feature'].values.tolist())
+                                self.importances_df(kind='shap', topx=topx, 
+                                        pos_label=pos_label)['Feature'].values.tolist(),
+                                max_points=max_points, random_state=self._plot_random_state)
 
-    def plot_shap_interaction_summary(self, col, topx=None, cats=False):
+    def plot_shap_interaction_summary(self, col, topx=None, cats=False, max_points=5000, 
+                                        pos_label=None):
         """Displays all individual shap interaction values for each feature in a
         horizontal scatter chart in descending order by mean absolute shap value.
 
@@ -793,21 +1229,31 @@ class BaseExplainerBunch(ABC):
         :type topx: int, optional
         :param cats: [description], defaults to False
         :type cats: bool, optional
+        :param max_points: only plot a random sample of max_points rows 
+            (seeded with random_state, so repeated calls give the same sample), 
+            defaults to 5000
+        :type max_points: int, optional
+        :param pos_label: label for which to plot (only for classifiers), 
+            defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: [description]
         :rtype: [type]
         """
-        interact_cols = self.shap_top_interactions(col, cats=cats)
+        interact_cols = self.shap_top_interactions(col, cats=cats, pos_label=pos_label)
         if topx is None: topx = len(interact_cols)
         if cats:
             return plotly_shap_scatter_plot(
-                self.shap_interaction_values_by_col(col, cats=cats),
-                self.X_cats, interact_cols[:topx])
+                self.shap_interaction_values_by_col(col, cats=cats, pos_label=pos_label),
+                self.X_cats, interact_cols[:topx], max_points=max_points,
+                random_state=self._plot_random_state)
         else:
             return plotly_shap_scatter_plot(
-                self.shap_interaction_values_by_col(col),
-                self.X, interact_cols[:topx])
+                self.shap_interaction_values_by_col(col, pos_label=pos_label),
+                self.X, interact_cols[:topx], max_points=max_points,
+                random_state=self._plot_random_state)
 
-    def plot_shap_dependence(self, col, color_col=None, highlight_idx=None, cats=False):
+    def plot_shap_dependence(self, col, color_col=None, highlight_idx=None, cats=False, 
+                                pos_label=None):
         """
         Plots a shap dependence plot:
             - on the x axis the possible values of the feature `col`
@@ -816,23 +1262,26 @@ class BaseExplainerBunch(ABC):
         :param color_col: if color_col provided then shap values colored (blue-red) according to feature color_col
         :param highlight_idx: individual observation to be highlighed in the plot.
         :param cats: group categorical variables
+        :param pos_label: label for which to plot (only for classifiers), 
+            defaults to None (self.pos_label)
         """
         if cats:
+            shap_values_cats = self.get_prop_for_label('shap_values_cats', pos_label)
             if col in self.cats:
-                return plotly_shap_violin_plot(self.X_cats, self.shap_values_cats, col, color_col)
+                return plotly_shap_violin_plot(self.X_cats, shap_values_cats, col, color_col)
             else:
-                return plotly_dependence_plot(self.X_cats, self.shap_values_cats,
+                return plotly_dependence_plot(self.X_cats, shap_values_cats,
                                                 col, color_col,
                                                 highlight_idx=highlight_idx,
                                                 na_fill=self.na_fill)
         else:
-            return plotly_dependence_plot(self.X, self.shap_values,
+            return plotly_dependence_plot(self.X, self.get_prop_for_label('shap_values', pos_label),
                                             col, color_col,
                                             highlight_idx=highlight_idx,
                                             na_fill=self.na_fill)
 
     def plot_shap_interaction(self, col, interact_col,
-                                            highlight_idx=None, cats=False):
+                                            highlight_idx=None, cats=False, pos_label=None):
         """plots a dependence plot for shap interaction effects
 
         :param col: feature for which to find interaction values
@@ -843,22 +1292,25 @@ class BaseExplainerBunch(ABC):
         :type highlight_idx: int, optional
         :param cats: group categorical features, defaults to False
         :type cats: bool, optional
+        :param pos_label: label for which to plot (only for classifiers), 
+            defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: Plotly Fig
         :rtype: plotly.Fig
         """
         if cats and interact_col in self.cats:
             return plotly_shap_violin_plot(
                 self.X_cats, 
-                self.shap_interaction_values_by_col(col, cats),
+                self.shap_interaction_values_by_col(col, cats, pos_label),
                 interact_col, col, interaction=True)
         else:
             return plotly_dependence_plot(self.X_cats if cats else self.X,
-                self.shap_interaction_values_by_col(col, cats),
+                self.shap_interaction_values_by_col(col, cats, pos_label),
                 interact_col, col, highlight_idx=highlight_idx,
                 interaction=True)
 
     def plot_pdp(self, col, index=None, drop_na=True, sample=100,
-                    num_grid_lines=100, num_grid_points=10):
+                    num_grid_lines=100, num_grid_points=10, pos_label=None):
         """returns plotly fig for a partial dependence plot showing ice lines
         for num_grid_lines rows, average pdp based on sample of sample.
         If index is given, display pdp for this specific index.
@@ -875,16 +1327,19 @@ class BaseExplainerBunch(ABC):
         :type num_grid_lines: int, optional
         :param num_grid_points: number of points on the x axis to calculate the pdp for, defaults to 10
         :type num_grid_points: int, optional
+        :param pos_label: label for which to plot (only for classifiers), 
+            defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: fig
         :rtype: plotly.Fig
         """
         pdp_result = self.get_pdp_result(col, index,
                             drop_na=drop_na, sample=sample,
-                            num_grid_points=num_grid_points)
+                            num_grid_points=num_grid_points, pos_label=pos_label)
 
         if index is not None:
             try:
-                col_value, pred = self.get_col_value_plus_prediction(index, col)
+                col_value, pred = self.get_col_value_plus_prediction(index, col, pos_label)
                 return plotly_pdp(pdp_result,
                                 display_index=0, # the idx to be displayed is always set to the first row by self.get_pdp_result()
                                 index_feature_value=col_value, index_prediction=pred,
@@ -926,12 +1381,47 @@ class RandomForestExplainerBunch(BaseExplainerBunch):
 
     @property
     def decision_trees(self):
+        """list of the individual fitted DecisionTrees of the model"""
         if not hasattr(self, '_decision_trees'):
-            print("Generating ShadowDecTree for each individual decision tree...")
-            self._decision_trees = get_decision_trees(self.model, self.X, self.y)
+            self._decision_trees = get_decision_trees(self.model)
         return self._decision_trees
 
-    def decisiontree_df(self, tree_idx, index):
+    @property
+    def leaf_value_table(self):
+        """prediction of every node of every tree, see get_leaf_value_table()"""
+        if not hasattr(self, '_leaf_value_table'):
+            self._leaf_value_table = get_leaf_value_table(self.model)
+        return self._leaf_value_table
+
+    def tree_predictions(self, index, pos_label=None):
+        """returns the predictions of every individual tree for index (as 
+        np.ndarray(n_trees)) or for a list of indexes (np.ndarray(n_rows, n_trees)).
+        For classifiers the probability of pos_label. 
+
+        All rows that have not been requested before get calculated in a 
+        single pass and are then cached, so e.g. highlighting a different 
+        tree in the dashboard does not recalculate anything.
+
+        :param index: index or list of indexes
+        :type index: int, str or list
+        :param pos_label: label for which to return the probabilities (only 
+            for classifiers), defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
+        """
+        single = isinstance(index, (int, np.integer, str))
+        idxs = self.get_int_idxs([index] if single else index)
+        assert (idxs >= 0).all(), "invalid index"
+        if not hasattr(self, '_tree_predictions_cache'):
+            self._tree_predictions_cache = {}
+        new_idxs = np.unique([idx for idx in idxs if idx not in self._tree_predictions_cache])
+        if len(new_idxs) > 0:
+            self._tree_predictions_cache.update(zip(new_idxs, get_tree_predictions(
+                    self.model, self.X.iloc[new_idxs], self.leaf_value_table)))
+        predictions = np.stack([self._tree_predictions_cache[idx] for idx in idxs])
+        predictions = predictions[:, :, self.pos_label_index(pos_label) if self.is_classifier else 0]
+        return predictions[0] if single else predictions
+
+    def decisiontree_df(self, tree_idx, index, pos_label=None):
         """returns a pd.DataFrame with all decision nodes of a particular
                         tree (indexed by tree_idx) for a particular observation
                         (indexed by index)"""
@@ -942,14 +1432,14 @@ class RandomForestExplainerBunch(BaseExplainerBunch):
             f"=index {idx} outside 0 and size of X ({len(self.X)}) range"
         if self.is_classifier:
             return get_decisiontree_df(self.decision_trees[tree_idx], self.X.iloc[idx],
-                    pos_label=self.pos_label)
+                    pos_label=self.pos_label_index(pos_label))
         else:
             return get_decisiontree_df(self.decision_trees[tree_idx], self.X.iloc[idx])
 
-    def decisiontree_df_summary(self, tree_idx, index, round=2):
+    def decisiontree_df_summary(self, tree_idx, index, round=2, pos_label=None):
         """formats decisiontree_df in a slightly more human readable format."""
         idx=self.get_int_idx(index)
-        return decisiontree_df_summary(self.decisiontree_df(tree_idx, idx),
+        return decisiontree_df_summary(self.decisiontree_df(tree_idx, idx, pos_label),
                     classifier=self.is_classifier, round=round)
 
     def decision_path_file(self, tree_idx, index):
@@ -997,18 +1487,15 @@ class RandomForestExplainerBunch(BaseExplainerBunch):
         return svg_encoded
 
 
-    def plot_trees(self, index, highlight_tree=None, round=2):
+    def plot_trees(self, index, highlight_tree=None, round=2, pos_label=None):
         """returns a plotly barchart with the values of the predictions
                 of each individual tree for observation idx"""
         #print('explainer call')
         idx=self.get_int_idx(index)
         assert idx is not None, 'invalid index'
-        if self.is_classifier:
-            return plotly_tree_predictions(self.model, self.X.iloc[[idx]],
-                        highlight_tree=highlight_tree, round=round, pos_label=self.pos_label)
-        else:
-            return plotly_tree_predictions(self.model, self.X.iloc[[idx]], 
-                        highlight_tree=highlight_tree, round=round)
+        return plotly_tree_predictions(self.model, None, 
+                    highlight_tree=highlight_tree, round=round, 
+                    predictions=self.tree_predictions(idx, pos_label))
 
     def calculate_properties(self, include_interactions=True):
         _ = self.decision_trees
@@ -1019,7 +1506,10 @@ class ClassifierBunch(BaseExplainerBunch):
     """ExplainerBunch for classification models. Defines the shap values for
     each possible class in the classifications.
 
-    You assign the positive label class afterwards with e.g. .pos_label=0
+    You assign the positive label class afterwards with e.g. .pos_label=0,
+    or pass pos_label explicitly to the individual methods (which leaves the 
+    explainer unchanged, so that concurrent requests for different labels 
+    do not interfere).
 
     In addition defines a number of plots specific to classification problems
     such as a precision plot, confusion matrix, roc auc curve and pr auc curve.
@@ -1027,14 +1517,15 @@ class ClassifierBunch(BaseExplainerBunch):
     def __init__(self, model,  X, y=None, shap='tree', metric=roc_auc_score, 
                     cats=None, idxs=None, descriptions=None,
                     permutation_cv=None, na_fill=-999,
-                    labels=None, pos_label=1):
+                    labels=None, pos_label=1, **kwargs):
         """Combared to BaseExplainerBunch defines two additional parameters:
         :param labels: list of str labels for the different classes, defaults to e.g. ['0', '1'] for a binary classification
         :type labels: list of str, optional
         :param pos_label: class that should be used as the positive class, defaults to 1
         :type pos_label: int or str (if str, needs to be in labels), optional
         """
-        super().__init__(model, X, y, shap, metric, cats, idxs, descriptions, permutation_cv, na_fill)
+        super().__init__(model, X, y, shap, metric, cats, idxs, descriptions, 
+                            permutation_cv, na_fill, **kwargs)
 
         if labels is not None:
             self.labels = labels
@@ -1051,12 +1542,20 @@ class ClassifierBunch(BaseExplainerBunch):
 
     @pos_label.setter
     def pos_label(self, label):
-        if isinstance(label, int) and label >=0 and label <len(self.labels):
-            self._pos_label = label
-        elif isinstance(label, str) and label in self.labels:
-            self._pos_label = self.labels.index(label)
-        else:
-            raise ValueError(f"'{label}' not in labels")
+        if label is None:
+            raise ValueError("pos_label cannot be None")
+        self._pos_label = self.pos_label_index(label)
+
+    def pos_label_index(self, pos_label=None):
+        """returns the int index of pos_label (either int or str label),
+        defaults to self.pos_label"""
+        if pos_label is None:
+            return self.pos_label
+        if isinstance(pos_label, (int, np.integer)) and pos_label >=0 and pos_label <len(self.labels):
+            return int(pos_label)
+        elif isinstance(pos_label, str) and pos_label in self.labels:
+            return self.labels.index(pos_label)
+        raise ValueError(f"'{pos_label}' not in labels")
 
     @property
     def pos_label_str(self):
@@ -1066,12 +1565,35 @@ class ClassifierBunch(BaseExplainerBunch):
     def y_binary(self):
         return np.where(self.y.values==self.pos_label, 1, 0)
 
-    def get_prop_for_label(self, prop:str, label):
-        tmp = self.pos_label
-        self.pos_label = label
-        ret = getattr(self, prop)
-        self.pos_label = tmp
-        return ret
+    # properties that get calculated for all labels at once, and the
+    # attributes in which they are stored as a list with one entry per label:
+    _label_props = dict(
+        shap_base_value='_shap_base_value',
+        shap_values='_shap_values',
+        shap_values_cats='_shap_values_cats',
+        shap_interaction_values='_shap_interaction_values',
+        shap_interaction_values_cats='_shap_interaction_values_cats',
+        mean_abs_shap='_mean_abs_shap',
+        mean_abs_shap_cats='_mean_abs_shap_cats',
+        permutation_importances='_perm_imps',
+        permutation_importances_cats='_perm_imps_cats')
+
+    def get_prop_for_label(self, prop:str, pos_label=None):
+        """returns property prop for pos_label (defaults to self.pos_label).
+        Does not change self.pos_label, so is safe to use from multiple threads."""
+        if pos_label is None:
+            return getattr(self, prop)
+        pos_label = self.pos_label_index(pos_label)
+        if prop in self._label_props:
+            _ = getattr(self, prop) # make sure it has been calculated
+            return getattr(self, self._label_props[prop])[pos_label]
+        elif prop in ('pred_probas', 'pred_percentiles'):
+            return getattr(self, prop + '_raw')[:, pos_label]
+        elif prop == 'y_binary':
+            return np.where(self.y.values==pos_label, 1, 0)
+        elif prop == 'pos_label_str':
+            return self.labels[pos_label]
+        return getattr(self, prop)
 
     @property
     def pred_probas(self):
@@ -1086,49 +1608,59 @@ class ClassifierBunch(BaseExplainerBunch):
     @property
     def pred_probas_raw(self):
         """returns pred_probas with probability for each class"""
-        if not hasattr(self, '_pred_probas'):
+        if not hasattr(self, '_pred_probas') and not self._load_cached('_pred_probas'):
             print("Calculating prediction probabilities...")
             assert hasattr(self.model, 'predict_proba'), \
                 "model does not have a predict_proba method!"
             self._pred_probas =  self.model.predict_proba(self.X)
+            self._save_cached('_pred_probas')
         return self._pred_probas
 
     @property
     def pred_percentiles_raw(self):
-        if not hasattr(self, '_pred_percentiles_raw'):
+        if not hasattr(self, '_pred_percentiles_raw') and not self._load_cached('_pred_percentiles_raw'):
             print("Calculating pred_percentiles...")
             self._pred_percentiles_raw = (pd.DataFrame(self.pred_probas_raw)
                                 .rank(method='min')
                                 .divide(len(self.pred_probas_raw))
                                 .values)
+            self._save_cached('_pred_percentiles_raw')
         return self._pred_percentiles_raw
 
     @property
     def permutation_importances(self):
         """return the permatuation importances of the model features"""
-        if not hasattr(self, '_perm_imps'):
+        if not hasattr(self, '_perm_imps') and not self._load_cached('_perm_imps'):
             print("Calculating importances...")
-            self._perm_imps = [cv_permutation_importances(
+            self._perm_imps = cv_permutation_importances(
                             self.model, self.X, self.y, self.metric,
                             cv=self.permutation_cv,
                             needs_proba=self.is_classifier,
-                            pos_label=label) for label in range(len(self.labels))]
+                            pos_label=list(range(len(self.labels))),
+                            n_repeats=self.permutation_repeats,
+                            random_state=self.random_state,
+                            n_jobs=self.n_jobs)
+            self._save_cached('_perm_imps')
         return self._perm_imps[self.pos_label]
 
     @property
     def permutation_importances_cats(self):
         """permutation importances with categoricals grouped"""
-        if not hasattr(self, '_perm_imps_cats'):
-            self._perm_imps_cats = [cv_permutation_importances(
+        if not hasattr(self, '_perm_imps_cats') and not self._load_cached('_perm_imps_cats'):
+            self._perm_imps_cats = cv_permutation_importances(
                             self.model, self.X, self.y, self.metric, self.cats,
                             cv=self.permutation_cv,
                             needs_proba=self.is_classifier,
-                            pos_label=label) for label in range(len(self.labels))]
+                            pos_label=list(range(len(self.labels))),
+                            n_repeats=self.permutation_repeats,
+                            random_state=self.random_state,
+                            n_jobs=self.n_jobs)
+            self._save_cached('_perm_imps_cats')
         return self._perm_imps_cats[self.pos_label]
 
     @property
     def shap_base_value(self):
-        if not hasattr(self, '_shap_base_value'):
+        if not hasattr(self, '_shap_base_value') and not self._load_cached('_shap_base_value'):
             self._shap_base_value = self.shap_explainer.expected_value
             if isinstance(self._shap_base_value, np.ndarray):
                 self._shap_base_value = list(self._shap_base_value)
@@ -1137,51 +1669,70 @@ class ClassifierBunch(BaseExplainerBunch):
             assert len(self._shap_base_value)==len(self.labels),\
                 f"len(shap_explainer.expected_value)={len(self._shap_base_value)}"\
                  + "and len(labels)={len(self.labels)} do not match!"
+            self._save_cached('_shap_base_value')
         return self._shap_base_value[self.pos_label]
 
     @property
     def shap_values(self):
-        if not hasattr(self, '_shap_values'):
+        if not hasattr(self, '_shap_values') and not self._load_cached('_shap_values'):
             print("Calculating shap values...")
-            self._shap_values = self.shap_explainer.shap_values(self.X)
+            self._shap_values = self._calculate_shap_values()
             if not isinstance(self._shap_values, list) and len(self.labels)==2:
                 self._shap_values = [1-self._shap_values, self._shap_values]
 
             assert len(self._shap_values)==len(self.labels),\
                 f"len(shap_values)={len(self._shap_values)}"\
                  + f"and len(labels)={len(self.labels)} do not match!"
+            self._save_cached('_shap_values')
         return self._shap_values[self.pos_label]
 
     @property
     def shap_values_cats(self):
-        if not hasattr(self, '_shap_values_cats'):
+        if not hasattr(self, '_shap_values_cats') and not self._load_cached('_shap_values_cats'):
             _ = self.shap_values
-            self._shap_values_cats = [
-                merge_categorical_shap_values(
-                    self.X, sv, self.cats) for sv in self._shap_values]
+            self._shap_values_cats = list(merge_categorical_shap_values(
+                    self.X, np.stack(self._shap_values), self.cats))
+            self._save_cached('_shap_values_cats')
         return self._shap_values_cats[self.pos_label]
 
     @property
     def shap_interaction_values(self):
-        if not hasattr(self, '_shap_interaction_values'):
+        if not hasattr(self, '_shap_interaction_values') and not self._load_cached('_shap_interaction_values'):
             print("Calculating shap interaction values...")
             _ = self.shap_values #make sure shap values have been calculated
-            self._shap_interaction_values = self.shap_explainer.shap_interaction_values(self.X)
-            if not isinstance(self._shap_interaction_values, list) and len(self.labels)==2:
-                self._shap_interaction_values = [1-self._shap_interaction_values,
-                                                    self._shap_interaction_values]
-            self._shap_interaction_values = [
-                normalize_shap_interaction_values(siv, self.shap_values)
-                    for siv, sv in zip(self._shap_interaction_values, self._shap_values)]
+            if self.chunk_size is not None or self.memmap_dir is not None:
+                # shap only returns a list of interaction values for 
+                # models with multiple outputs:
+                multi_output = np.ndim(self.shap_explainer.expected_value) > 0
+                add_negative_class = not multi_output and len(self.labels)==2
+                self._shap_interaction_values = blockwise_shap_interaction_values(
+                    self.shap_explainer, self.X, 
+                    self._shap_values if multi_output or add_negative_class else self._shap_values[-1],
+                    block_size=self.chunk_size or 1000, dtype=self.interactions_dtype,
+                    memmap_path=self._interactions_memmap_path(),
+                    add_negative_class=add_negative_class)
+            else:
+                self._shap_interaction_values = self.shap_explainer.shap_interaction_values(self.X)
+                if not isinstance(self._shap_interaction_values, list) and len(self.labels)==2:
+                    self._shap_interaction_values = [1-self._shap_interaction_values,
+                                                        self._shap_interaction_values]
+                self._shap_interaction_values = [
+                    normalize_shap_interaction_values(siv, sv, inplace=True)
+                        for siv, sv in zip(self._shap_interaction_values, self._shap_values)]
+                if self.interactions_dtype is not None:
+                    self._shap_interaction_values = [siv.astype(self.interactions_dtype)
+                        for siv in self._shap_interaction_values]
+            self._save_cached('_shap_interaction_values')
         return self._shap_interaction_values[self.pos_label]
 
     @property
     def shap_interaction_values_cats(self):
-        if not hasattr(self, '_shap_interaction_values_cats'):
+        if not hasattr(self, '_shap_interaction_values_cats') and not self._load_cached('_shap_interaction_values_cats'):
             _ = self.shap_interaction_values
             self._shap_interaction_values_cats = [
                 merge_categorical_shap_interaction_values(
                     self.X, self.X_cats, siv) for siv in self._shap_interaction_values]
+            self._save_cached('_shap_interaction_values_cats')
         return self._shap_interaction_values_cats[self.pos_label]
 
     @property
@@ -1200,42 +1751,86 @@ class ClassifierBunch(BaseExplainerBunch):
                                 self.columns, sv, self.cats) for sv in self._shap_values]
         return self._mean_abs_shap_cats[self.pos_label]
 
-    def cutoff_from_percentile(self, percentile, pos_label=None):
-        if pos_label is None:
-            return pd.Series(self.pred_probas).nlargest(int((1-percentile)*len(self))).min()
-        else:
-            return pd.Series(self.pred_probas_raw[:, pos_label]).nlargest(int((1-percentile)*len(self))).min()
+    def _label_cached(self, attr, key, func):
+        """returns self.attr[key], calculating it with func() the first time.
+        Used for properties that get calculated once for every pos_label."""
+        if not hasattr(self, attr):
+            setattr(self, attr, {})
+        cache = getattr(self, attr)
+        if key not in cache:
+            cache[key] = func()
+        return cache[key]
+
+    def threshold_index(self, pos_label=None):
+        """pred_probas of pos_label sorted, together with the cumulative number
+        of positives, used to look up cutoff dependent metrics in O(log N).
+        Calculated once for every pos_label."""
+        pos_label = self.pos_label_index(pos_label)
+        return self._label_cached('_threshold_index', pos_label, 
+            lambda: get_threshold_index(self.get_prop_for_label('pred_probas', pos_label), 
+                                        self.get_prop_for_label('y_binary', pos_label)))
+
+    def cutoff_independent_metrics(self, pos_label=None):
+        """roc_auc_score, pr_auc_score and log_loss for pos_label"""
+        pos_label = self.pos_label_index(pos_label)
+        y_binary = self.get_prop_for_label('y_binary', pos_label)
+        pred_probas = self.get_prop_for_label('pred_probas', pos_label)
+        return self._label_cached('_cutoff_independent_metrics', pos_label, 
+            lambda: {
+                'roc_auc_score' : roc_auc_score(y_binary, pred_probas),
+                'pr_auc_score' : average_precision_score(y_binary, pred_probas),
+                'log_loss' : log_loss(y_binary, pred_probas)
+            })
+
+    def roc_curve_df(self, pos_label=None):
+        """simplified roc curve of pos_label, calculated once for every pos_label"""
+        pos_label = self.pos_label_index(pos_label)
+        return self._label_cached('_roc_curve_df', pos_label, 
+            lambda: get_roc_curve_df(self.get_prop_for_label('pred_probas', pos_label), 
+                                     self.get_prop_for_label('y_binary', pos_label)))
+
+    def pr_curve_df(self, pos_label=None):
+        """simplified precision-recall curve of pos_label, calculated once for
+        every pos_label"""
+        pos_label = self.pos_label_index(pos_label)
+        return self._label_cached('_pr_curve_df', pos_label, 
+            lambda: get_pr_curve_df(self.get_prop_for_label('pred_probas', pos_label), 
+                                    self.get_prop_for_label('y_binary', pos_label)))
 
-    def metrics(self, cutoff=0.5):
-        metrics_dict = {
-            'accuracy' : accuracy_score(self.y_binary, np.where(self.pred_probas > cutoff, 1, 0)),
-            'precision' : precision_score(self.y_binary, np.where(self.pred_probas > cutoff, 1, 0)),
-            'recall' : recall_score(self.y_binary, np.where(self.pred_probas > cutoff, 1, 0)),
-            'f1' : f1_score(self.y_binary, np.where(self.pred_probas > cutoff, 1, 0)),
-            'roc_auc_score' : roc_auc_score(self.y_binary, self.pred_probas),
-            'pr_auc_score' : average_precision_score(self.y_binary, self.pred_probas),
-            'log_loss' : log_loss(self.y_binary, self.pred_probas)
-        }
+    def cutoff_from_percentile(self, percentile, pos_label=None):
+        sorted_probas = self.threshold_index(pos_label)[0]
+        n_top = int((1-percentile)*len(self))
+        return sorted_probas[-n_top] if n_top > 0 else np.nan
+
+    def cutoff_counts(self, cutoff=0.5, include_cutoff=False, pos_label=None):
+        """returns confusion matrix counts (tn, fp, fn, tp) for predicting
+        pos_label when pred_probas > cutoff (or >= cutoff if include_cutoff)"""
+        return get_cutoff_counts(self.threshold_index(pos_label), cutoff, include_cutoff)
+
+    def metrics(self, cutoff=0.5, pos_label=None):
+        metrics_dict = get_cutoff_metrics(*self.cutoff_counts(cutoff, pos_label=pos_label))
+        metrics_dict.update(self.cutoff_independent_metrics(pos_label))
         return metrics_dict
 
     def get_pdp_result(self, col, index=None, drop_na=True,
-                        sample=1000, num_grid_points=20):
+                        sample=1000, num_grid_points=20, pos_label=None):
+        pos_label = self.pos_label_index(pos_label)
         pdp_result = super().get_pdp_result(
                                 col, index, drop_na, sample, num_grid_points)
         if len(self.labels)==2:
             # for binary classifer PDPBox only gives pdp for the positive class.
             # instead of a list of pdps for every class
             # so we simply inverse when predicting the negative class
-            if self.pos_label==0:
+            if pos_label==0:
                 pdp_result.pdp = 1 - pdp_result.pdp
                 pdp_result.ice_lines = 1-pdp_result.ice_lines
             return pdp_result
         else:
-             return pdp_result[self.pos_label]
+             return pdp_result[pos_label]
 
     def random_index(self, y_values=None, return_str=False,
                     pred_proba_min=None, pred_proba_max=None,
-                    pred_percentile_min=None, pred_percentile_max=None):
+                    pred_percentile_min=None, pred_percentile_max=None, pos_label=None):
         """
         Return a random index from dataset.
         if y_values is given select an index for which y in y_values
@@ -1246,24 +1841,28 @@ class ClassifierBunch(BaseExplainerBunch):
 
         if pred_percentile_min(max) is given, return an index with at least a predicted
         percentile of probabiity of positive class of pred_percentile_min(max)
+
+        positive class is pos_label, defaults to self.pos_label
         """
         if (y_values is None 
             and pred_proba_min is None and pred_proba_max is None
             and pred_percentile_min is None and pred_percentile_max is None):
             potential_idxs = self.y.index
         else:
+            pred_probas = self.get_prop_for_label('pred_probas', pos_label)
+            pred_percentiles = self.get_prop_for_label('pred_percentiles', pos_label)
             if y_values is None: y_values = self.y.unique().tolist()
             if not isinstance(y_values, list): y_values = [y_values]
-            if pred_proba_min is None: pred_proba_min = self.pred_probas.min()
-            if pred_proba_max is None: pred_proba_max = self.pred_probas.max()
+            if pred_proba_min is None: pred_proba_min = pred_probas.min()
+            if pred_proba_max is None: pred_proba_max = pred_probas.max()
             if pred_percentile_min is None: pred_percentile_min = 0.0
             if pred_percentile_max is None: pred_percentile_max = 1.0
             
             potential_idxs = self.y[(self.y.isin(y_values)) &
-                            (self.pred_probas >= pred_proba_min) &
-                            (self.pred_probas <= pred_proba_max) &
-                            (self.pred_percentiles > pred_percentile_min) &
-                            (self.pred_percentiles <= pred_percentile_max)].index
+                            (pred_probas >= pred_proba_min) &
+                            (pred_probas <= pred_proba_max) &
+                            (pred_percentiles > pred_percentile_min) &
+                            (pred_percentiles <= pred_percentile_max)].index
         if not potential_idxs.empty:
             idx = np.random.choice(potential_idxs)
         else:
@@ -1274,7 +1873,7 @@ class ClassifierBunch(BaseExplainerBunch):
             return self.idxs[idx]
         return idx
 
-    def precision_df(self, bin_size=None, quantiles=None, multiclass=False):
+    def precision_df(self, bin_size=None, quantiles=None, multiclass=False, pos_label=None):
         """returns a pd.DataFrame with predicted probabilities and actually
         observed number of positive cases (i.e. precision)
 
@@ -1284,22 +1883,40 @@ class ClassifierBunch(BaseExplainerBunch):
         :type quantiles: int, optional
         :param multiclass: whether to calculate precision for every class
         :type multiclass: bool, optional
+        :param pos_label: positive class, defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
         :return: precision_df
         :rtype: pd.DataFrame
         """
-        assert self.pred_probas is not None
         if bin_size is None and quantiles is None:
             bin_size=0.1 # defaults to bin_size=0.1
         if multiclass:
             return get_precision_df(self.pred_probas_raw, self.y,
-                                bin_size, quantiles, pos_label=self.pos_label)
+                                bin_size, quantiles, pos_label=self.pos_label_index(pos_label))
         else:
-            return get_precision_df(self.pred_probas, self.y_binary, bin_size, quantiles)
-
-    def lift_curve_df(self):
-        return get_lift_curve_df(self.pred_probas, self.y, self.pos_label)
+            return get_precision_df(self.get_prop_for_label('pred_probas', pos_label), 
+                                    self.get_prop_for_label('y_binary', pos_label), 
+                                    bin_size, quantiles)
+
+    def lift_curve_df(self, resolution=None, pos_label=None):
+        """returns a pd.DataFrame with the lift curve of pos_label, calculated 
+        once for every pos_label and resolution
+
+        :param resolution: number of rows to return, evenly spaced over the 
+            percentiles, defaults to None (one row for every prediction)
+        :type resolution: int, optional
+        :param pos_label: positive class, defaults to None (self.pos_label)
+        :type pos_label: int or str, optional
+        :return: lift_curve_df
+        :rtype: pd.DataFrame
+        """
+        pos_label = self.pos_label_index(pos_label)
+        return self._label_cached('_lift_curve_df', (pos_label, resolution),
+            lambda: get_lift_curve_df(self.get_prop_for_label('pred_probas', pos_label), 
+                                      self.y, pos_label, resolution))
 
-    def prediction_result_markdown(self, index, include_percentile=True, round=2, **kwargs):
+    def prediction_result_markdown(self, index, include_percentile=True, round=2, 
+                                    pos_label=None, **kwargs):
         int_idx = self.get_int_idx(index)
         
         def display_probas(pred_probas_raw, labels, round=2):
@@ -1317,10 +1934,12 @@ class ClassifierBunch(BaseExplainerBunch):
             isinstance(self.y[0], np.int64)):
             model_prediction += f"##### Actual Outcome: {self.labels[self.y[int_idx]]}\n\n"
         if include_percentile:
-            model_prediction += f'##### In top {np.round(100*(1-self.pred_percentiles[int_idx]))}% percentile probability {self.pos_label_str}'
+            pred_percentile = self.get_prop_for_label('pred_percentiles', pos_label)[int_idx]
+            model_prediction += f'##### In top {np.round(100*(1-pred_percentile))}% percentile probability {self.get_prop_for_label("pos_label_str", pos_label)}'
         return model_prediction
 
-    def plot_precision(self, bin_size=None, quantiles=None, cutoff=0.5, multiclass=False):
+    def plot_precision(self, bin_size=None, quantiles=None, cutoff=0.5, multiclass=False,
+                        pos_label=None):
         """plots predicted probability on the x-axis
         binned by bin_size, and observed precision (fraction of actual positive
         cases) on the y-axis"""
@@ -1328,55 +1947,69 @@ class ClassifierBunch(BaseExplainerBunch):
         if bin_size is None and quantiles is None:
             bin_size=0.1 # defaults to bin_size=0.1
         precision_df = self.precision_df(
-                bin_size=bin_size, quantiles=quantiles, multiclass=multiclass)
+                bin_size=bin_size, quantiles=quantiles, multiclass=multiclass, 
+                pos_label=pos_label)
         return plotly_precision_plot(precision_df,
-                    cutoff=cutoff, labels=self.labels, pos_label=self.pos_label)
+                    cutoff=cutoff, labels=self.labels, pos_label=self.pos_label_index(pos_label))
 
-    def plot_cumulative_precision(self):
-        return plotly_cumulative_precision_plot(
-                    self.lift_curve_df(), self.labels, self.pos_label)
-
-    def plot_confusion_matrix(self, cutoff=0.5, normalized=False, binary=False):
+    def plot_confusion_matrix(self, cutoff=0.5, normalized=False, binary=False, pos_label=None):
         """plots a standard 2d confusion
         matrix, depending on model cutoff. If normalized display percentage
         otherwise counts."""
         
         if binary:
+            pos_label_str = self.get_prop_for_label('pos_label_str', pos_label)
             if len(self.labels)==2:
                 def order_binary_labels(labels, pos_label):
                     pos_index = labels.index(pos_label)
                     return [labels[1-pos_index], labels[pos_index]]
-                labels = order_binary_labels(self.labels, self.pos_label_str)
+                labels = order_binary_labels(self.labels, pos_label_str)
             else:
-                labels = ['Not ' + self.pos_label_str, self.pos_label_str]
+                labels = ['Not ' + pos_label_str, pos_label_str]
 
-            return plotly_confusion_matrix(
-                    self.y_binary, np.where(self.pred_probas > cutoff, 1, 0),
-                    normalized=normalized, labels=labels)
+            tn, fp, fn, tp = self.cutoff_counts(cutoff, pos_label=pos_label)
+            return plotly_confusion_matrix(None, None, 
+                    normalized=normalized, labels=labels, cm=[[tn, fp], [fn, tp]])
         else:
             return plotly_confusion_matrix(
                 self.y, self.pred_probas_raw.argmax(axis=1),
                 normalized=normalized, labels=self.labels)
 
-    def plot_lift_curve(self, cutoff=None, percentage=False, round=2):
-        return plotly_lift_curve(self.lift_curve_df(), cutoff, percentage, round)
-
-    def plot_cumulative_precision(self):
-        return plotly_cumulative_precision_plot(self.lift_curve_df(), 
-                labels=self.labels, pos_label=self.pos_label)
-
-    def plot_classification(self, cutoff=0.5, percentage=True):
-        return plotly_classification_plot(self.pred_probas, self.y, self.labels, cutoff, percentage=percentage)
-
-    def plot_roc_auc(self, cutoff=0.5):
+    def plot_lift_curve(self, cutoff=None, percentage=False, round=2, resolution=1000,
+                        pos_label=None):
+        """plots lift curve, with the lift of cutoff displayed. To keep the 
+        plot light only resolution points get plotted."""
+        return plotly_lift_curve(self.lift_curve_df(resolution, pos_label), 
+                                    cutoff, percentage, round)
+
+    def plot_cumulative_precision(self, resolution=1000, pos_label=None):
+        """plots the cumulative percentage of every class when sampling the
+        top X% of model scores. To keep the plot light only resolution points 
+        get plotted."""
+        return plotly_cumulative_precision_plot(self.lift_curve_df(resolution, pos_label), 
+                labels=self.labels, pos_label=self.pos_label_index(pos_label))
+
+    def plot_classification(self, cutoff=0.5, percentage=True, pos_label=None):
+        return plotly_classification_plot(self.get_prop_for_label('pred_probas', pos_label), 
+                    self.y, self.labels, cutoff, percentage=percentage)
+
+    def plot_roc_auc(self, cutoff=0.5, pos_label=None):
         """plots ROC_AUC curve. The TPR and FPR of a particular
             cutoff is displayed in crosshairs."""
-        return plotly_roc_auc_curve(self.y_binary, self.pred_probas, cutoff=cutoff)
-
-    def plot_pr_auc(self, cutoff=0.5):
+        tn, fp, fn, tp = self.cutoff_counts(cutoff, include_cutoff=True, pos_label=pos_label)
+        cutoff_metrics = get_cutoff_metrics(tn, fp, fn, tp)
+        cutoff_metrics['fpr'] = fp / (fp + tn) if fp + tn > 0 else 0.0
+        return plotly_roc_auc_curve(self.roc_curve_df(pos_label), 
+                    self.cutoff_independent_metrics(pos_label)['roc_auc_score'], 
+                    cutoff=cutoff, cutoff_metrics=cutoff_metrics)
+
+    def plot_pr_auc(self, cutoff=0.5, pos_label=None):
         """plots PR_AUC curve. the precision and recall of particular
             cutoff is displayed in crosshairs."""
-        return plotly_pr_auc_curve(self.y_binary, self.pred_probas, cutoff=cutoff)
+        return plotly_pr_auc_curve(self.pr_curve_df(pos_label), 
+                    self.cutoff_independent_metrics(pos_label)['pr_auc_score'], 
+                    cutoff=cutoff, 
+                    cutoff_metrics=get_cutoff_metrics(*self.cutoff_counts(cutoff, pos_label=pos_label)))
 
     def calculate_properties(self, include_interactions=True):
         _ = self.pred_probas
@@ -1393,13 +2026,14 @@ class RegressionBunch(BaseExplainerBunch):
     def __init__(self, model,  X, y=None, shap="tree", metric=roc_auc_score,
                     cats=None, idxs=None, descriptions=None, 
                     permutation_cv=None, na_fill=-999,
-                    units=""):
+                    units="", **kwargs):
         """Combared to BaseExplainerBunch defines two additional parameters:
         :param units: units to display for regression quantity
         :type units: str, optional
 
         """
-        super().__init__(model, X, y, shap, metric, cats, idxs, descriptions, permutation_cv, na_fill)
+        super().__init__(model, X, y, shap, metric, cats, idxs, descriptions, 
+                            permutation_cv, na_fill, **kwargs)
         self.units = units
         self.is_regression = True
     
@@ -0,0 +1,160 @@
+import unittest
+import tempfile
+import threading
+import time
+
+import plotly.graph_objs as go
+
+from explainerdashboard.dashboard_tabs.dashboard_methods import *
+
+
+class FigureCacheTests(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = FigureCache(max_bytes=10)
+        cache.put('a', '12345')
+        cache.put('b', '12345')
+        self.assertEqual(cache.get('a'), '12345')
+        cache.put('c', '12345')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), '12345')
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(cache.stats()['bytes'], 10)
+
+    def test_spill_to_disk(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = FigureCache(max_bytes=10, spill_dir=tmpdir)
+            for key in 'abc':
+                cache.put(key, key * 5)
+            self.assertEqual(cache.stats()['spilled'], 1)
+            self.assertEqual(cache.get('a'), 'aaaaa')
+            cache.clear()
+            self.assertIsNone(cache.get('a'))
+
+
+class FakeExplainer:
+    def __init__(self, y):
+        self.y = y
+        self.pos_label = 1
+        self.state_token = 'state0'
+        self.calls = 0
+
+    def plot_line(self, topx=None, pos_label=None):
+        self.calls += 1
+        pos_label = self.pos_label if pos_label is None else pos_label
+        return go.Figure(go.Scatter(y=[self.y, pos_label, topx]))
+
+    def plot_nothing(self):
+        return None
+
+    def mean_abs_shap(self):
+        return 'mean abs shap'
+
+
+class CachedExplainerTests(unittest.TestCase):
+    def setUp(self):
+        self.explainer = FakeExplainer(1)
+        self.cache = FigureCache()
+        self.cached_explainer = CachedExplainer(self.explainer, self.cache)
+
+    def test_proxying(self):
+        self.assertEqual(self.cached_explainer.mean_abs_shap(), 'mean abs shap')
+        self.cached_explainer.pos_label = 0
+        self.assertEqual(self.explainer.pos_label, 0)
+
+    def test_hits_return_dicts(self):
+        fig = self.cached_explainer.plot_line(topx=5)
+        self.assertIsInstance(fig, dict)
+        self.assertEqual(self.cached_explainer.plot_line(topx=5), fig)
+        self.assertEqual(list(fig['data'][0]['y']), [1, 1, 5])
+        self.assertEqual(self.explainer.calls, 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_non_figures_pass_through(self):
+        self.assertIsNone(self.cached_explainer.plot_nothing())
+        self.assertEqual(self.cache.stats()['figures'], 0)
+
+    def test_pos_label_keys(self):
+        fig1 = self.cached_explainer.plot_line()
+        self.cached_explainer.pos_label = 0
+        fig0 = self.cached_explainer.plot_line()
+        self.assertEqual(list(fig1['data'][0]['y'])[1], 1)
+        self.assertEqual(list(fig0['data'][0]['y'])[1], 0)
+        self.assertEqual(self.cached_explainer.plot_line(pos_label=1), 
+                        self.cached_explainer.plot_line(pos_label=1))
+        self.assertEqual(self.explainer.calls, 3)
+
+    def test_shared_cache(self):
+        explainer2 = FakeExplainer(2)
+        explainer2.state_token = 'state1'
+        fig = self.cached_explainer.plot_line(topx=5)
+        fig2 = CachedExplainer(explainer2, self.cache).plot_line(topx=5)
+        self.assertNotEqual(fig, fig2)
+        self.assertEqual(list(fig2['data'][0]['y']), [2, 1, 5])
+        self.assertEqual(self.cache.stats()['hits'], 0)
+
+    def test_state_token(self):
+        self.cached_explainer.plot_line()
+        self.explainer.y = 3
+        self.explainer.state_token = 'state1'
+        fig = self.cached_explainer.plot_line()
+        self.assertEqual(list(fig['data'][0]['y'])[0], 3)
+        self.assertEqual(self.explainer.calls, 2)
+
+
+class ExplainerPrecomputerTests(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.shap_release = threading.Event()
+
+        def precompute_shap(explainer):
+            self.shap_release.wait(timeout=5)
+            self.calls.append('shap')
+
+        def precompute_interactions(explainer):
+            self.calls.append('interactions')
+
+        def precompute_permutation(explainer):
+            raise ValueError("no permutations today")
+
+        class TestPrecomputer(ExplainerPrecomputer):
+            chain_funcs = dict(shap=precompute_shap, 
+                               interactions=precompute_interactions,
+                               permutation=precompute_permutation)
+        self.Precomputer = TestPrecomputer
+
+    def test_dependency_ordering(self):
+        precomputer = self.Precomputer(None, ['interactions'])
+        self.assertEqual(precomputer.chains, ['shap', 'interactions'])
+        precomputer.start()
+        time.sleep(0.1)
+        # interactions waits for shap:
+        self.assertEqual(self.calls, [])
+        self.assertFalse(precomputer.is_ready())
+        self.shap_release.set()
+        precomputer.wait()
+        self.assertEqual(self.calls, ['shap', 'interactions'])
+        self.assertTrue(precomputer.is_ready())
+        self.assertEqual(precomputer.exceptions(), {})
+
+    def test_exceptions(self):
+        self.shap_release.set()
+        precomputer = self.Precomputer(None, ['shap', 'permutation']).start()
+        with self.assertRaises(ValueError):
+            precomputer.wait()
+        self.assertTrue(precomputer.is_ready(['permutation']))
+        exceptions = precomputer.exceptions()
+        self.assertEqual(list(exceptions.keys()), ['permutation'])
+        self.assertIsInstance(exceptions['permutation'], ValueError)
+
+    def test_placeholder(self):
+        class Tab:
+            tab_id, title = 'tab', 'Tab'
+            def layout(self):
+                return 'tab layout'
+        precomputer = self.Precomputer(None, ['shap']).start()
+        placeholder = PrecomputePlaceholder(Tab(), precomputer, ['shap'])
+        self.assertNotEqual(placeholder.layout(), 'tab layout')
+        self.shap_release.set()
+        precomputer.wait()
+        self.assertEqual(placeholder.layout(), 'tab layout')
@@ -0,0 +1,326 @@
+import unittest
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import numpy as np
+
+import shap
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score, roc_curve, precision_recall_curve
+
+from explainerdashboard.explainer_methods import *
+from explainerdashboard.datasets import titanic_survive
+
+
+class ExplainerCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.X_train, self.y_train, _, _ = titanic_survive()
+        self.model = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0)
+        self.model.fit(self.X_train, self.y_train)
+
+    def test_fingerprint(self):
+        fingerprint = get_explainer_fingerprint(self.model, self.X_train, self.y_train)
+        self.assertEqual(fingerprint, 
+            get_explainer_fingerprint(self.model, self.X_train, self.y_train))
+        self.assertNotEqual(fingerprint, 
+            get_explainer_fingerprint(self.model, self.X_train.iloc[1:], self.y_train.iloc[1:]))
+        self.assertNotEqual(fingerprint, 
+            get_explainer_fingerprint(self.model, self.X_train, self.y_train, cats=['Sex']))
+
+    def test_save_and_load_cached_value(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = prune_cache_dir(cache_dir, 
+                get_explainer_fingerprint(self.model, self.X_train, self.y_train), 'clf')
+            other_path = prune_cache_dir(cache_dir, 40*'1', 'other')
+            array, arrays = np.random.rand(5, 3), [np.random.rand(5, 3), np.random.rand(5, 3)]
+            df = pd.DataFrame({'Importance': [0.1, 0.2]}, index=['a', 'b'])
+            save_cached_value(cache_path, '_array', array)
+            save_cached_value(cache_path, '_arrays', arrays)
+            save_cached_value(cache_path, '_df', df)
+
+            np.testing.assert_array_equal(load_cached_value(cache_path, '_array'), array)
+            for loaded, orig in zip(load_cached_value(cache_path, '_arrays'), arrays):
+                np.testing.assert_array_equal(loaded, orig)
+            pd.testing.assert_frame_equal(load_cached_value(cache_path, '_df'), df)
+            self.assertIsNone(load_cached_value(cache_path, '_missing'))
+
+            # a new fingerprint should discard the old entry of the same name only:
+            prune_cache_dir(cache_dir, 40*'0', 'clf')
+            self.assertFalse(cache_path.exists())
+            self.assertTrue(other_path.exists())
+
+
+class ChunkedShapValuesTests(unittest.TestCase):
+    def setUp(self):
+        X_train, y_train, _, _ = titanic_survive()
+        self.X = X_train.iloc[:60]
+        self.classifier = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0)
+        self.classifier.fit(X_train, y_train)
+        self.regressor = RandomForestRegressor(n_estimators=5, max_depth=3, random_state=0)
+        self.regressor.fit(X_train, X_train.Age)
+
+    def test_chunked_shap_values_single_output(self):
+        shap_explainer = shap.TreeExplainer(self.regressor)
+        np.testing.assert_allclose(
+            chunked_shap_values(shap_explainer, self.X, chunk_size=25, n_jobs=2),
+            shap_explainer.shap_values(self.X))
+
+    def test_chunked_shap_values_per_class(self):
+        shap_explainer = shap.TreeExplainer(self.classifier)
+        chunked_sv = chunked_shap_values(shap_explainer, self.X, chunk_size=25, n_jobs=2)
+        sv = shap_explainer.shap_values(self.X)
+        self.assertIsInstance(chunked_sv, list)
+        self.assertEqual(len(chunked_sv), len(sv))
+        for chunked_class_sv, class_sv in zip(chunked_sv, sv):
+            np.testing.assert_allclose(chunked_class_sv, class_sv)
+
+
+class BlockwiseShapInteractionValuesTests(unittest.TestCase):
+    def setUp(self):
+        X_train, y_train, _, _ = titanic_survive()
+        self.X = X_train.iloc[:30]
+        model = RandomForestClassifier(n_estimators=3, max_depth=3, random_state=0)
+        model.fit(X_train, y_train)
+        self.shap_explainer = shap.TreeExplainer(model)
+        self.shap_values = self.shap_explainer.shap_values(self.X)
+        self.expected_siv = [normalize_shap_interaction_values(siv, sv) for siv, sv in 
+            zip(self.shap_explainer.shap_interaction_values(self.X), self.shap_values)]
+
+    def test_blockwise_shap_interaction_values(self):
+        siv = blockwise_shap_interaction_values(self.shap_explainer, self.X, 
+                                                self.shap_values, block_size=7)
+        self.assertEqual(len(siv), 2)
+        for class_siv, expected in zip(siv, self.expected_siv):
+            np.testing.assert_allclose(class_siv, expected)
+
+    def test_blockwise_shap_interaction_values_float32_memmap(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            siv = blockwise_shap_interaction_values(self.shap_explainer, self.X, 
+                            self.shap_values, block_size=7, dtype=np.float32,
+                            memmap_path=Path(tmp_dir) / 'siv.npy')
+            for j, (class_siv, expected) in enumerate(zip(siv, self.expected_siv)):
+                self.assertIsInstance(class_siv, np.memmap)
+                self.assertEqual(class_siv.dtype, np.float32)
+                np.testing.assert_allclose(class_siv, expected, rtol=1e-4, atol=1e-6)
+                np.testing.assert_allclose(
+                    np.load(Path(tmp_dir) / f'siv_{j}.npy'), class_siv)
+            del siv, class_siv
+
+
+class MergeCategoricalTests(unittest.TestCase):
+    def setUp(self):
+        self.columns = ['Age', 'Sex_male', 'Sex_female', 'Deck_A', 'Deck_B', 'Deck_C', 'Fare']
+        self.cats = ['Sex', 'Deck']
+        self.X = pd.DataFrame(np.eye(7)[[1, 2, 3, 4, 5, 0, 6] * 3], columns=self.columns)
+        self.X_cats = merge_categorical_columns(self.X, self.cats)
+
+    def test_merge_categorical_columns(self):
+        self.assertEqual(self.X_cats.columns.tolist(), ['Age', 'Fare', 'Sex', 'Deck'])
+        self.assertEqual(self.X_cats.Sex.tolist()[:6], 
+                ['male', 'female', 'NOT_ENCODED', 'NOT_ENCODED', 'NOT_ENCODED', 'NOT_ENCODED'])
+        self.assertEqual(self.X_cats.Deck.tolist()[:6], 
+                ['NOT_ENCODED', 'NOT_ENCODED', 'A', 'B', 'C', 'NOT_ENCODED'])
+
+    def test_merge_categorical_shap_values(self):
+        sv = np.random.rand(2, len(self.X), 7)
+        merged_sv = merge_categorical_shap_values(self.X, sv, self.cats)
+        self.assertEqual(merged_sv.shape, (2, len(self.X), 4))
+        np.testing.assert_allclose(merged_sv.sum(axis=-1), sv.sum(axis=-1))
+        np.testing.assert_allclose(merged_sv[0, :, 2], sv[0, :, 1:3].sum(axis=1))
+        np.testing.assert_allclose(merged_sv[1], 
+                merge_categorical_shap_values(self.X, sv[1], self.cats))
+
+    def test_merge_categorical_shap_interaction_values(self):
+        siv = np.random.rand(len(self.X), 7, 7)
+        merged_siv = merge_categorical_shap_interaction_values(
+                        self.X, self.X_cats, siv, chunk_size=4)
+        self.assertEqual(merged_siv.shape, (len(self.X), 4, 4))
+
+        feature_dict = get_feature_dict(self.columns, self.cats)
+        new_columns = self.X_cats.columns.tolist()
+        for i, col1 in enumerate(new_columns):
+            for j, col2 in enumerate(new_columns):
+                idxs1 = [self.columns.index(col) for col in feature_dict[col1]]
+                idxs2 = [self.columns.index(col) for col in feature_dict[col2]]
+                np.testing.assert_allclose(merged_siv[:, i, j], 
+                    siv[:, idxs1, :][:, :, idxs2].sum(axis=(1, 2)))
+
+
+
+class PermutationImportancesTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = pd.DataFrame(rng.rand(200, 3), columns=['a', 'b', 'c'])
+        self.y = (self.X.a > 0.5).astype(int)
+        self.model = LogisticRegression().fit(self.X, self.y)
+
+    def test_permutation_importances(self):
+        imp = permutation_importances(self.model, self.X, self.y, roc_auc_score,
+                    needs_proba=True, pos_label=1, n_repeats=3, random_state=0)
+        self.assertEqual(imp.columns.tolist(), ['Importance', 'Importance_std'])
+        self.assertEqual(imp.index[0], 'a')
+
+    def test_permutation_importances_multiple_labels(self):
+        imp = permutation_importances(self.model, self.X, self.y, roc_auc_score,
+                    needs_proba=True, pos_label=1, n_repeats=3, random_state=0)
+        imps = permutation_importances(self.model, self.X, self.y, roc_auc_score,
+                    needs_proba=True, pos_label=[0, 1], n_repeats=3, random_state=0, n_jobs=2)
+        self.assertEqual(len(imps), 2)
+        pd.testing.assert_frame_equal(imps[1], imp)
+
+    def test_cv_permutation_importances_multiple_labels(self):
+        imps = cv_permutation_importances(self.model, self.X, self.y, roc_auc_score,
+                    needs_proba=True, pos_label=[0, 1], cv=3, random_state=0)
+        self.assertEqual(len(imps), 2)
+        self.assertEqual(imps[1].index[0], 'a')
+        self.assertEqual(imps[1].columns.tolist(), ['Importance', 'Importance_fold_std'])
+
+
+class PrecisionDfTests(unittest.TestCase):
+    def setUp(self):
+        self.pred_probas = np.array([0.0, 0.1, 0.15, 0.5, 0.55, 0.9, 1.0, 0.3])
+        self.y = np.array([0, 0, 1, 0, 1, 1, 1, 2])
+
+    def test_precision_df_bin_size(self):
+        precision_df = get_precision_df(self.pred_probas, self.y, bin_size=0.5)
+        self.assertEqual(precision_df['count'].tolist(), [5, 3])
+        np.testing.assert_allclose(precision_df.precision, [0.2, 1.0])
+        np.testing.assert_allclose(precision_df.p_avg, [0.21, 2.45/3])
+
+    def test_precision_df_quantiles(self):
+        pred_probas = np.stack([1 - self.pred_probas, self.pred_probas], axis=1)
+        precision_df = get_precision_df(pred_probas, self.y, quantiles=3)
+        self.assertEqual(precision_df['count'].tolist(), [3, 3, 2])
+        np.testing.assert_allclose(precision_df.p_max, [0.15, 0.55, 1.0])
+        np.testing.assert_allclose(precision_df.precision_0, [2/3, 1/3, 0])
+
+
+class ThresholdIndexTests(unittest.TestCase):
+    def test_cutoff_counts(self):
+        pred_probas = np.array([0.1, 0.4, 0.4, 0.6, 0.8, 0.3])
+        y_binary = np.array([0, 1, 0, 1, 1, 0])
+        threshold_index = get_threshold_index(pred_probas, y_binary)
+        self.assertEqual(get_cutoff_counts(threshold_index, 0.4), (3, 0, 1, 2))
+        self.assertEqual(get_cutoff_counts(threshold_index, 0.4, include_cutoff=True), 
+                            (2, 1, 0, 3))
+        metrics = get_cutoff_metrics(*get_cutoff_counts(threshold_index, 0.4))
+        self.assertAlmostEqual(metrics['accuracy'], 5/6)
+        self.assertAlmostEqual(metrics['recall'], 2/3)
+        self.assertAlmostEqual(metrics['f1'], 0.8)
+
+
+class CurveDfTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.y = rng.randint(2, size=20000)
+        self.pred_probas = np.clip(0.3*self.y + 0.7*rng.rand(20000), 0, 1).round(4)
+
+    def assert_within_tolerance(self, x, y, keep, tolerance):
+        # every dropped point should lie within tolerance of the line 
+        # through the kept points before and after it:
+        segment = np.searchsorted(keep, np.arange(len(x)), side='right') - 1
+        start, end = keep[np.minimum(segment, len(keep)-2)], keep[np.minimum(segment+1, len(keep)-1)]
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        distances = np.abs(dx * (y - y[start]) - dy * (x - x[start])) / np.hypot(dx, dy)
+        self.assertLessEqual(distances.max(), tolerance)
+
+    def test_simplify_curve(self):
+        fpr, tpr, _ = roc_curve(self.y, self.pred_probas)
+        keep = simplify_curve(fpr, tpr, tolerance=0.001)
+        self.assertEqual(keep[0], 0)
+        self.assertEqual(keep[-1], len(fpr)-1)
+        self.assertLess(len(keep), len(fpr) / 10)
+        self.assert_within_tolerance(fpr, tpr, keep, 0.001)
+
+    def test_get_roc_curve_df(self):
+        roc_df = get_roc_curve_df(self.pred_probas, self.y)
+        self.assertEqual(roc_df.columns.tolist(), ['fpr', 'tpr', 'threshold'])
+        self.assertEqual((roc_df.fpr.iloc[0], roc_df.tpr.iloc[0]), (0, 0))
+        self.assertEqual((roc_df.fpr.iloc[-1], roc_df.tpr.iloc[-1]), (1, 1))
+        self.assertAlmostEqual(np.trapz(roc_df.tpr, roc_df.fpr), 
+                roc_auc_score(self.y, self.pred_probas), delta=0.001)
+
+    def test_get_pr_curve_df(self):
+        precision, recall, _ = precision_recall_curve(self.y, self.pred_probas)
+        pr_df = get_pr_curve_df(self.pred_probas, self.y)
+        self.assertEqual(pr_df.columns.tolist(), ['precision', 'recall', 'threshold'])
+        self.assertLess(len(pr_df), len(precision) / 10)
+        self.assertTrue(np.isnan(pr_df.threshold.iloc[-1]))
+        self.assertEqual((pr_df.precision.iloc[-1], pr_df.recall.iloc[-1]), (1, 0))
+        self.assert_within_tolerance(precision, recall, 
+                simplify_curve(precision, recall, tolerance=0.001), 0.001)
+
+
+class LiftCurveDfTests(unittest.TestCase):
+    def test_lift_curve_df(self):
+        pred_probas = np.array([0.9, 0.1, 0.8, 0.3, 0.6])
+        y = pd.Series([1, 0, 0, 1, 1])
+        lift_df = get_lift_curve_df(pred_probas, y, pos_label=1)
+        self.assertEqual(lift_df.positives.tolist(), [1, 1, 2, 3, 3])
+        np.testing.assert_allclose(lift_df.precision_0, [0, 50, 100/3, 25, 40])
+
+        lift_df_res = get_lift_curve_df(pred_probas, y, pos_label=1, resolution=3)
+        self.assertEqual(lift_df_res['index'].tolist(), [1, 3, 5])
+        self.assertEqual(lift_df_res.positives.tolist(), [1, 2, 3])
+        np.testing.assert_allclose(lift_df_res.precision_0, [0, 100/3, 40])
+
+
+class ContribDfTests(unittest.TestCase):
+    def setUp(self):
+        self.X = pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, 4.0], 'c': ['x', 'y']})
+        self.shap_values = np.array([[0.1, -0.5, 0.3], [0.6, 0.05, -0.2]])
+
+    def test_get_contrib_df(self):
+        contrib_df = get_contrib_df(0.4, self.shap_values[0], self.X.iloc[[0]], topx=3)
+        self.assertEqual(contrib_df.col.tolist(), ['base_value', 'b', 'c', 'REST'])
+        np.testing.assert_allclose(contrib_df.contribution, [0.4, -0.5, 0.3, 0.1])
+        np.testing.assert_allclose(contrib_df.cumulative, [0.4, -0.1, 0.2, 0.3])
+        np.testing.assert_allclose(contrib_df.base, [0.0, 0.4, -0.1, 0.2])
+
+    def test_get_contrib_df_cutoff_without_topx(self):
+        contrib_df = get_contrib_df(0.4, self.shap_values[0], self.X.iloc[[0]], cutoff=0.35)
+        self.assertEqual(contrib_df.col.tolist(), ['base_value', 'b', 'REST'])
+        np.testing.assert_allclose(contrib_df.contribution, [0.4, -0.5, 0.4])
+
+    def test_get_contrib_summary_df(self):
+        contrib_df = get_contrib_df(0.4, self.shap_values[0], self.X.iloc[[0]])
+        summary_df = get_contrib_summary_df(contrib_df, classification=True, round=1)
+        self.assertEqual(summary_df.Reason.tolist(), 
+                ['BASE VALUE', 'b = 3.0', 'c = x', 'a = 1.0'])
+        self.assertEqual(summary_df.Effect.tolist(), ['+40.0%', '-50.0%', '+30.0%', '+10.0%'])
+
+    def test_get_contrib_dfs(self):
+        contrib_dfs = get_contrib_dfs(0.4, self.shap_values, self.X, 
+                                        topx=2, indexes=['first', 'second'])
+        self.assertEqual(contrib_dfs['index'].tolist(), 3*['first'] + 3*['second'])
+        for i, index in enumerate(['first', 'second']):
+            pd.testing.assert_frame_equal(
+                contrib_dfs[contrib_dfs['index']==index].drop('index', axis=1).reset_index(drop=True),
+                get_contrib_df(0.4, self.shap_values[i], self.X.iloc[[i]], topx=2))
+
+
+class LongContribDfTests(unittest.TestCase):
+    def test_get_long_contrib_df(self):
+        X = pd.DataFrame({'a': [1.234, 2.0], 'Sex': ['male', 'female']})
+        shap_values = np.array([[0.1, -0.3], [0.5, 0.2]])
+        long_df = get_long_contrib_df(0.4, shap_values, X, cats=['Sex'], 
+                        name_ids=['x', 'y'], round=1)
+        self.assertEqual(len(long_df), 6)
+        self.assertEqual(long_df.row_id.tolist(), [0, 0, 0, 1, 1, 1])
+        self.assertEqual(long_df.name_id.tolist(), ['x', 'x', 'x', 'y', 'y', 'y'])
+        # base_value first, then ordered by descending absolute contribution:
+        self.assertEqual(long_df.Feature.tolist(), 
+                ['base_value', 'Sex', 'a', 'base_value', 'a', 'Sex'])
+        np.testing.assert_allclose(long_df.SHAP, [0.4, -0.3, 0.1, 0.4, 0.5, 0.2])
+        self.assertEqual(long_df.Value.tolist()[1:3], ['male', 1.2])
+        self.assertEqual(long_df.Value_Type.tolist()[1:3], ['cat', 'cont'])
+        self.assertEqual(long_df.Feature_Order.tolist(), [0, 1, 2, 0, 1, 2])
+
+        nl_df = get_long_contrib_df(0.4, shap_values, X, cats=['Sex'], lang='nl')
+        self.assertIn('Variabele', nl_df.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
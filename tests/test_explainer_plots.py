@@ -0,0 +1,77 @@
+import unittest
+
+import pandas as pd
+import numpy as np
+import plotly.graph_objs as go
+
+from explainerdashboard.explainer_plots import *
+
+
+class ShapScatterPlotTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = pd.DataFrame({'num': rng.rand(200), 
+                               'cat': rng.choice(['a', 'b', 'c'], 200)})
+        self.shap_values = rng.randn(200, 2)
+
+    def test_sampled_customdata(self):
+        fig = plotly_shap_scatter_plot(self.shap_values, self.X, ['num', 'cat'], 
+                                        max_points=50, random_state=1)
+        self.assertEqual(len(fig.data[0].customdata), 50)
+        for trace in fig.data:
+            rows = np.asarray(trace.customdata)
+            col = 'num' if trace.name == 'num' else 'cat'
+            np.testing.assert_array_equal(trace.x, 
+                self.shap_values[rows, self.X.columns.get_loc(col)])
+            if col == 'cat':
+                self.assertTrue((self.X.cat.values[rows] == trace.name).all())
+
+    def test_seeded_sample(self):
+        fig1 = plotly_shap_scatter_plot(self.shap_values, self.X, ['num'], 
+                                        max_points=50, random_state=1)
+        fig2 = plotly_shap_scatter_plot(self.shap_values, self.X, ['num'], 
+                                        max_points=50, random_state=1)
+        self.assertEqual(fig1.to_json(), fig2.to_json())
+
+
+class DependencePlotTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = pd.DataFrame({'a': rng.rand(300), 'b': rng.rand(300)})
+        self.shap_values = rng.randn(300, 2)
+
+    def test_trace_types(self):
+        fig = plotly_dependence_plot(self.X, self.shap_values, 'a')
+        self.assertIsInstance(fig.data[0], go.Scatter)
+        fig = plotly_dependence_plot(self.X, self.shap_values, 'a', webgl_threshold=100)
+        self.assertIsInstance(fig.data[0], go.Scattergl)
+        fig = plotly_dependence_plot(self.X, self.shap_values, 'a', 'b', 
+                                        webgl_threshold=100, density_threshold=200)
+        self.assertIsInstance(fig.data[0], go.Heatmap)
+
+    def test_density_binned(self):
+        fig = plotly_dependence_plot(self.X, self.shap_values, 'a', density_threshold=200)
+        z = np.array(fig.data[0].z, dtype=float)
+        self.assertEqual(z.shape, (50, 50))
+        self.assertEqual(np.nansum(z), len(self.X))
+
+    def test_density_nullable_dtypes(self):
+        X = pd.DataFrame({
+            'a': pd.array(np.arange(300) % 7, dtype='Int64'),
+            'b': pd.array(self.X.b.values, dtype='Float64')})
+        X.loc[[0, 1], 'a'] = pd.NA
+        for col in ['a', 'b']:
+            fig = plotly_dependence_plot(X, self.shap_values, col, 
+                                density_threshold=200, highlight_idx=5)
+            self.assertIsInstance(fig.data[0], go.Heatmap)
+            self.assertEqual(fig.data[1].name, 'index 5')
+            self.assertEqual(fig.data[1].x[0], X[col][5])
+            self.assertEqual(fig.data[1].y[0], self.shap_values[5, X.columns.get_loc(col)])
+        z = np.array(fig.data[0].z, dtype=float)
+        self.assertEqual(np.nansum(z), len(X))
+        fig = plotly_dependence_plot(X, self.shap_values, 'a', density_threshold=200)
+        self.assertEqual(np.nansum(np.array(fig.data[0].z, dtype=float)), len(X) - 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
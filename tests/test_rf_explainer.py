@@ -1,4 +1,7 @@
 import unittest
+import pickle
+import tempfile
+from pathlib import Path
 
 import pandas as pd
 import numpy as np
@@ -9,6 +12,12 @@ from sklearn.metrics import roc_auc_score
 from explainerdashboard.explainers import RandomForestClassifierBunch
 from explainerdashboard.datasets import titanic_survive, titanic_names
 
+try:
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    ds = None
+
 
 class RandomForestClassifierBunchTests(unittest.TestCase):
     def setUp(self):
@@ -19,7 +28,7 @@ class RandomForestClassifierBunchTests(unittest.TestCase):
         model.fit(X_train, y_train)
 
         self.explainer = RandomForestClassifierBunch(
-                            model, X_test, y_test, roc_auc_score, 
+                            model, X_test, y_test, metric=roc_auc_score, 
                             cats=['Sex', 'Cabin', 'Embarked'],
                             idxs=test_names, 
                             labels=['Not survived', 'Survived'])
@@ -30,6 +39,83 @@ class RandomForestClassifierBunchTests(unittest.TestCase):
     def test_shap_values_shape(self):
         self.assertTrue(self.explainer.shap_values.shape == (len(self.explainer), len(self.explainer.columns)))
 
+    def test_get_int_idx(self):
+        idxs = self.explainer.idxs
+        self.assertEqual(self.explainer.get_int_idx(idxs[5]), 5)
+        self.assertEqual(self.explainer.get_int_idx(5), 5)
+        self.assertIsNone(self.explainer.get_int_idx('not an index'))
+        np.testing.assert_array_equal(
+            self.explainer.get_int_idxs([idxs[3], 'not an index', idxs[0]]), [3, -1, 0])
+        np.testing.assert_array_equal(
+            self.explainer.get_int_idxs([3, len(self.explainer)]), [3, -1])
+
+    def test_state_token(self):
+        token = self.explainer.state_token
+        self.assertEqual(self.explainer.state_token, token)
+        self.explainer.clear_cache()
+        self.assertNotEqual(self.explainer.state_token, token)
+
+    def test_pos_label_argument(self):
+        np.testing.assert_array_almost_equal(
+            self.explainer.get_prop_for_label('pred_probas', 'Not survived'),
+            1 - self.explainer.pred_probas)
+        self.assertAlmostEqual(
+            self.explainer.metrics(pos_label=0)['roc_auc_score'],
+            self.explainer.metrics()['roc_auc_score'])
+        self.assertEqual(self.explainer.pos_label, 1)
+
+    def test_memmap_shap_values(self):
+        with tempfile.TemporaryDirectory() as memmap_dir:
+            self.explainer.memmap_shap_values(memmap_dir, include_interactions=False)
+            shap_values = [np.array(sv) for sv in self.explainer._shap_values]
+            shap_values_cats = [np.array(sv) for sv in self.explainer._shap_values_cats]
+
+            unpickled = pickle.loads(pickle.dumps(self.explainer))
+            for attr, orig in [('_shap_values', shap_values), 
+                               ('_shap_values_cats', shap_values_cats)]:
+                self.assertEqual(len(getattr(unpickled, attr)), len(orig))
+                for label_values, label_orig in zip(getattr(unpickled, attr), orig):
+                    self.assertIsInstance(label_values, np.memmap)
+                    np.testing.assert_array_equal(label_values, label_orig)
+            np.testing.assert_array_equal(
+                unpickled.get_prop_for_label('shap_values', 0), shap_values[0])
+            del unpickled
+
+    @unittest.skipIf(ds is None, "pyarrow not installed")
+    def test_to_parquet(self):
+        with tempfile.TemporaryDirectory() as export_dir:
+            self.explainer.to_parquet(export_dir, chunksize=50)
+            for table, df in zip(['COLS', 'SHAP', 'CONTRIB'], self.explainer.get_dfs()):
+                part_file = Path(export_dir) / table / 'label=Survived' / 'part-0.parquet'
+                self.assertGreater(pq.ParquetFile(part_file).num_row_groups, 1)
+                table_df = ds.dataset(Path(export_dir) / table, format='parquet',
+                                        partitioning='hive').to_table().to_pandas()
+                self.assertEqual(table_df.columns.tolist(), df.columns.tolist() + ['label'])
+                self.assertEqual(table_df.label.value_counts().to_dict(),
+                                    {'Not survived': len(df), 'Survived': len(df)})
+                survived_df = table_df[table_df.label == 'Survived'].reset_index(drop=True)
+                np.testing.assert_array_almost_equal(
+                    survived_df[df.columns[df.dtypes != object]].values.astype(float), 
+                    df[df.columns[df.dtypes != object]].values.astype(float))
+
+    def test_decisiontree_df(self):
+        decisiontree_df = self.explainer.decisiontree_df(tree_idx=2, index=0, pos_label=1)
+        self.assertEqual(decisiontree_df.columns.tolist(), ['node_id', 'average', 'feature',
+                            'value', 'split', 'direction', 'left', 'right', 'diff'])
+        # the last split should end up at the prediction of the tree:
+        self.assertAlmostEqual(
+            decisiontree_df.average.iloc[-1] + decisiontree_df['diff'].iloc[-1],
+            self.explainer.decision_trees[2].predict_proba(self.explainer.X.values[[0]])[0, 1])
+
+    def test_tree_predictions(self):
+        tree_preds = self.explainer.tree_predictions(3, pos_label=0)
+        self.assertEqual(tree_preds.shape, (50,))
+        np.testing.assert_array_almost_equal(tree_preds, 
+            [tree.predict_proba(self.explainer.X.values[[3]])[0, 0] 
+                for tree in self.explainer.decision_trees])
+        all_preds = self.explainer.tree_predictions(list(range(len(self.explainer))))
+        np.testing.assert_array_almost_equal(all_preds.mean(axis=1), self.explainer.pred_probas)
+
 
 if __name__ == '__main__':
     unittest.main()